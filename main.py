@@ -1,45 +1,48 @@
-import asyncio
+import sys
+
+from src.import_profiler import ImportProfiler
+
+# installed before anything else is imported so every module shows up in the report
+import_profiler = ImportProfiler.install() if "--startup-profile" in sys.argv else None
+
+import functools
 import os
 import socket
-import sys
 import time
 import traceback
 
-import requests
 import urllib3
 from colr import color as colr
-from InquirerPy import inquirer
 from rich.console import Console as RichConsole
 
 from src.colors import Colors
 from src.config import Config
-from src.configurator import configure
 from src.constants import *
 from src.content import Content
 from src.errors import Error
 from src.Loadouts import Loadouts
 from src.logs import Logging
+from src.match_store import MatchStore
 from src.names import Names
 from src.player_stats import PlayerStats
 from src.presences import Presences
 from src.rank import Rank
 from src.requestsV import Requests
-from src.rpc import Rpc
+from src.runtime import AsyncRuntime
 from src.server import Server
+from src.startup import Startup
 from src.states.coregame import Coregame
 from src.states.menu import Menu
 from src.states.pregame import Pregame
+from src.static_content import StaticContent
 from src.stats import Stats
 from src.table import Table
 from src.websocket import Ws
 from src.os import get_os
 
-from src.account_manager.account_manager import AccountManager
-from src.account_manager.account_config import AccountConfig
-from src.account_manager.account_auth import AccountAuth
-
 # Import the new party finder function
 from src.party_finder import find_parties
+from src.player_rows import Lobby, PlayerRowPipeline
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -67,15 +70,41 @@ def get_ip():
     return IP
 
 
+def set_lobby_col_flags(table, cfg, lobby):
+    # columns that depend on the loaded players, the live table updates them with every row
+    if cfg.get_feature_flag("auto_hide_leaderboard"):
+        table.set_runtime_col_flag("Pos.", lobby.is_leaderboard_needed)
+
+    if lobby.state == "INGAME" and lobby.is_range:
+        table.set_runtime_col_flag("Agent", False)
+
+
+def start_account_manager(log, static_content, session_for_url):
+    # yaml and InquirerPy are only imported along with the account manager
+    from src.account_manager.account_manager import AccountManager
+    from src.account_manager.account_config import AccountConfig
+    from src.account_manager.account_auth import AccountAuth
+    return AccountManager(log, AccountConfig, AccountAuth, NUMBERTORANKS, static_content, session_for_url)
+
+
+def start_server(log, ErrorSRC, port):
+    server = Server(log, ErrorSRC)
+    server.start_server(port)
+    return server
+
+
 try:
     Logging = Logging()
-    log = Logging.log
+    log = Logging
 
     # OS Logging
     log(f"Operating system: {get_os()}\n")
 
     try:
         if len(sys.argv) > 1 and sys.argv[1] == "--config":
+            from InquirerPy import inquirer
+            from src.configurator import configure
+
             configure()
             run_app = inquirer.confirm(
                 message="Do you want to run vRY now?", default=True
@@ -83,6 +112,7 @@ try:
             if run_app:
                 os.system("cls")
             else:
+                Logging.close()
                 os._exit(0)
         else:
             os.system("cls")
@@ -91,65 +121,97 @@ try:
         log(f"configurator encountered an error")
         log(str(traceback.format_exc()))
         input("press enter to exit...\n")
+        Logging.close()
         os._exit(1)
 
-    acc_manager = AccountManager(log, AccountConfig, AccountAuth, NUMBERTORANKS)
+    if import_profiler is not None:
+        # after the screen was cleared so the report stays visible
+        import_profiler.report(log)
 
-    ErrorSRC = Error(log, acc_manager)
+    static_content = StaticContent(log)
+    cfg = Config(log, static_content)
+    # the account manager is only built if VALORANT isn't running and has to be started,
+    # its requests are only made from the accounts menu, once Requests below exists
+    ErrorSRC = Error(log, functools.cache(lambda: start_account_manager(
+        log, static_content, lambda url: Requests.session_for_url(url))))
 
     # Requests.check_version(version, Requests.copy_run_update_script)
     # Requests.check_status()
-    Requests = Requests(version, log, ErrorSRC)
-
-    cfg = Config(log)
-
-    content = Content(Requests, log)
+    # waiting for the lockfile, starting VALORANT and its prompts stay on the main thread, before any startup step runs
+    Requests = Requests(version, log, ErrorSRC, pool_size=cfg.pool_size, max_concurrency=cfg.max_concurrent_requests,
+                        static_content=static_content)
+
+    # independent network and disk steps run concurrently, see Startup.report() in the log for the timings
+    startup = Startup(log)
+    startup.add("static_content", static_content.load)
+    startup.add("server", lambda: start_server(log, ErrorSRC, cfg.port))
+    startup.add("stats", lambda: Stats(log))
+    startup.add("content", lambda: Content(Requests, log))
+    startup.add("coregame", lambda: Coregame(Requests, log))
+    startup.add("agent_dict", lambda content, _: content.get_all_agents(), deps=["content", "static_content"])
+    startup.add("map_info", lambda content, _: content.get_all_maps(), deps=["content", "static_content"])
+    startup.add("map_urls", lambda content, map_info: content.get_map_urls(map_info), deps=["content", "map_info"])
+    startup.add("map_splashes", lambda content, map_info: content.get_map_splashes(map_info), deps=["content", "map_info"])
+    startup.add("current_map", lambda coregame, map_urls, map_splashes: coregame.get_current_map(map_urls, map_splashes),
+                deps=["coregame", "map_urls", "map_splashes"])
+    startup.add("game_content", lambda content: content.get_content(), deps=["content"])
+    # only needed once loadouts are shown, compiled while the first table is being built
+    startup.add("content_index", lambda _: static_content.get_index(), deps=["static_content"], deferred=True)
+    startup.run()
+
+    content = startup.get("content")
 
     rank = Rank(Requests, log, content, before_ascendant_seasons)
-    pstats = PlayerStats(Requests, log, cfg)
+    matches = MatchStore(Requests, log)
+    pstats = PlayerStats(Requests, log, cfg, matches)
 
-    namesClass = Names(Requests, log)
+    stats = startup.get("stats")
+
+    namesClass = Names(Requests, log, stats)
 
     presences = Presences(Requests, log)
 
     menu = Menu(Requests, log, presences)
     pregame = Pregame(Requests, log)
-    coregame = Coregame(Requests, log)
+    coregame = startup.get("coregame")
 
-    Server = Server(log, ErrorSRC)
-    Server.start_server()
+    Server = startup.get("server")
 
-    agent_dict = content.get_all_agents()
+    agent_dict = startup.get("agent_dict")
 
-    map_info = content.get_all_maps()
-    map_urls = content.get_map_urls(map_info)
-    map_splashes = content.get_map_splashes(map_info)
+    map_urls = startup.get("map_urls")
+    map_splashes = startup.get("map_splashes")
 
-    current_map = coregame.get_current_map(map_urls, map_splashes)
+    current_map = startup.get("current_map")
 
     colors = Colors(log, hide_names, agent_dict, AGENTCOLORLIST)
 
     loadoutsClass = Loadouts(Requests, log, colors, Server, current_map, cfg)
     table = Table(cfg, log)
 
-    stats = Stats()
+    # one event loop for the client websocket and discord rpc
+    runtime = AsyncRuntime(log)
 
     if cfg.get_feature_flag("discord_rpc"):
-        rpc = Rpc(map_urls, gamemodes, colors, log)
+        # pypresence is only imported when discord rpc is enabled
+        from src.rpc import Rpc
+
+        rpc = Rpc(map_urls, gamemodes, colors, log, runtime)
     else:
         rpc = None
 
-    Wss = Ws(Requests.lockfile, Requests, cfg, colors, hide_names, Server, rpc)
-    # loop = asyncio.new_event_loop()
-    # asyncio.set_event_loop(loop)
-    # loop.run_forever()
+    Wss = Ws(Requests.lockfile, Requests, cfg, colors, hide_names, Server, runtime, rpc)
+    # subscribed for the whole session, state changes during a refresh are queued instead of missed
+    Wss.start()
 
     log(f"VALORANT rank yoinker v{version}")
 
-    valoApiSkins = requests.get("https://valorant-api.com/v1/weapons/skins")
-    gameContent = content.get_content()
+    gameContent = startup.get("game_content")
     seasonID = content.get_latest_season_id(gameContent)
     previousSeasonID = content.get_previous_season_id(gameContent)
+    # one row pipeline for the scoreboards of all three game states
+    player_rows = PlayerRowPipeline(Requests, log, cfg, rank, pstats, stats, colors, table, Server, agent_dict,
+                                    (seasonID, previousSeasonID), hide_levels, rpc=rpc, current_map=current_map)
     lastGameState = ""
 
     print("\nvRY Mobile", color(f"- {get_ip()}:{cfg.port}", fore=(255, 127, 80)))
@@ -165,7 +227,11 @@ try:
 
     firstTime = True
     firstPrint = True
+    # players of the current (or last) match, their ranks are refetched once it ended
+    match_puuids = []
     while True:
+        Requests.new_refresh()
+        pstats.new_refresh()
         table.clear()
         table.set_default_field_names()
         table.reset_runtime_col_flags()
@@ -177,13 +243,6 @@ try:
             Ranks = NUMBERTORANKS
 
         try:
-
-            # loop = asyncio.get_event_loop()
-            # loop.run_until_complete(Wss.conntect_to_websocket())
-            # if firstTime:
-            #     loop = asyncio.new_event_loop()
-            #     asyncio.set_event_loop(loop)
-            #     game_state = loop.run_until_complete(Wss.conntect_to_websocket(game_state))
             if firstTime:
                 run = True
                 while run:
@@ -201,28 +260,20 @@ try:
                     time.sleep(2)
                 log(f"first game state: {game_state}")
             else:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
                 previous_game_state = game_state
                 try:
-                    game_state = loop.run_until_complete(
-                        Wss.recconect_to_websocket(game_state)
-                    )
-                    # We invalidate the cached responses when going from any state to menus
-                    if previous_game_state != game_state and game_state == "MENUS":
-                        rank.invalidate_cached_responses()
+                    game_state = Wss.wait_for_state_change(game_state)
+                    # only the ranks and match histories of the players of the match that just ended have changed
+                    if previous_game_state == "INGAME" and game_state != "INGAME":
+                        rank.invalidate(match_puuids)
+                        pstats.invalidate(match_puuids)
                     log(f"new game state: {game_state}")
                 except Exception as e:
                     log(f"Websocket connection error: {e}")
                     print(f"Connection error: {e}")
                     print("Valorant may have been closed. Continuing in MENUS state...")
                     game_state = "MENUS"
-                finally:
-                    loop.close()
             firstTime = False
-            # loop = asyncio.new_event_loop()
-            # asyncio.set_event_loop(loop)
-            # loop.run_until_complete()
         except TypeError:
             game_state = "DISCONNECTED"
 
@@ -250,7 +301,7 @@ try:
             
             Requests.get_headers(refresh=True)
 
-            Wss = Ws(Requests.lockfile, Requests, cfg, colors, hide_names, Server, rpc)
+            Wss.restart(Requests.lockfile)
 
             firstTime = True 
             lastGameState = ""
@@ -268,8 +319,6 @@ try:
             if (not firstPrint) and cfg.get_feature_flag("pre_cls"):
                 os.system("cls")
 
-            is_leaderboard_needed = False
-            
             # get new presence
             try:
                 presence = presences.get_presence()
@@ -307,6 +356,7 @@ try:
                 "players": {},
             }
 
+            lobby = None
             if game_state == "INGAME":
                 coregame_stats = coregame.get_coregame_stats()
                 if coregame_stats == None:
@@ -353,371 +403,23 @@ try:
                     coregame.get_coregame_match_id(),
                     Players,
                     cfg.weapon,
-                    valoApiSkins,
                     names,
                     state="game",
                 )
-                loadouts = loadouts_arr[0]
-                loadouts_data = loadouts_arr[1]
-                # with alive_bar(total=len(Players), title='Fetching Players', bar='classic2') as bar:
-                isRange = False
-                playersLoaded = 1
 
                 heartbeat_data["map"] = (map_urls[coregame_stats["MapID"].lower()],)
-                with richConsole.status("Loading Players...") as status:
-                    partyOBJ = menu.get_party_json(
-                        namesClass.get_players_puuid(Players), presence
-                    )
-                    # log(f"retrieved names dict: {names}")
-                    Players.sort(
-                        key=lambda Players: Players["PlayerIdentity"].get(
-                            "AccountLevel"
-                        ),
-                        reverse=True,
-                    )
-                    Players.sort(key=lambda Players: Players["TeamID"], reverse=True)
-                    partyCount = 0
-                    partyNum = 0
-                    partyIcons = {}
-                    lastTeamBoolean = False
-                    lastTeam = "Red"
-
-                    already_played_with = []
-                    stats_data = stats.read_data()
-
-                    for p in Players:
-                        if p["Subject"] == Requests.puuid:
-                            allyTeam = p["TeamID"]
-                    for player in Players:
-                        status.update(
-                            f"Loading players... [{playersLoaded}/{len(Players)}]"
-                        )
-                        playersLoaded += 1
-
-                        if player["Subject"] in stats_data.keys():
-                            if (
-                                player["Subject"] != Requests.puuid
-                                and player["Subject"] not in partyMembersList
-                            ):
-                                curr_player_stat = stats_data[player["Subject"]][-1]
-                                i = 1
-                                while (
-                                    curr_player_stat["match_id"] == coregame.match_id
-                                    and len(stats_data[player["Subject"]]) > i
-                                ):
-                                    i += 1
-                                    # if curr_player_stat["match_id"] == coregame.match_id and len(stats_data[player["Subject"]]) > 1:
-                                    curr_player_stat = stats_data[player["Subject"]][-i]
-                                if curr_player_stat["match_id"] != coregame.match_id:
-                                    # checking for party members and self players
-                                    times = 0
-                                    m_set = ()
-                                    for m in stats_data[player["Subject"]]:
-                                        if (
-                                            m["match_id"] != coregame.match_id
-                                            and m["match_id"] not in m_set
-                                        ):
-                                            times += 1
-                                            m_set += (m["match_id"],)
-                                    if player["PlayerIdentity"]["Incognito"] == False or not hide_names:
-                                        # Check if the name has changed since last played
-                                        current_name = names[player["Subject"]]
-                                        old_name = curr_player_stat["name"]
-                                        if current_name != old_name:
-                                            display_name = f"{old_name} (now {current_name})"
-                                        else:
-                                            display_name = old_name
-                                        already_played_with.append(
-                                            {
-                                                "times": times,
-                                                "name": display_name,
-                                                "agent": curr_player_stat["agent"],
-                                                "time_diff": time.time() - curr_player_stat["epoch"],
-                                            }
-                                        )
-                                    else:
-                                        if player["TeamID"] == allyTeam:
-                                            team_string = "your"
-                                        else:
-                                            team_string = "enemy"
-                                        already_played_with.append(
-                                            {
-                                                "times": times,
-                                                "name": agent_dict.get(
-                                                    player["CharacterID"].lower(), "Unknown"
-                                                )
-                                                + " on "
-                                                + team_string
-                                                + " team",
-                                                "agent": curr_player_stat["agent"],
-                                                "time_diff": time.time()
-                                                - curr_player_stat["epoch"],
-                                            }
-                                        )
-
-                        # Assign party icon based on the assignments from party_finder
-                        assignment = party_assignments.get(player["Subject"])
-                        if assignment:
-                            number_str, color_hex = assignment
-                            party_icon = f"[{color_hex}]{number_str}[/]"
-                            # Extract party number from the assignment (number_str is already a string like "1", "2", etc.)
-                            try:
-                                partyNum = int(number_str)
-                            except (ValueError, AttributeError):
-                                partyNum = 0
-                        else:
-                            party_icon = ""
-                            partyNum = 0
-
-                        playerRank = rank.get_rank(player["Subject"], seasonID)
-                        previousPlayerRank = rank.get_rank(
-                            player["Subject"], previousSeasonID
-                        )
-
-                        if player["Subject"] == Requests.puuid:
-                            if cfg.get_feature_flag("discord_rpc"):
-                                rpc.set_data(
-                                    {
-                                        "rank": playerRank["rank"],
-                                        "rank_name": colors.escape_ansi(
-                                            format_rank_with_square(playerRank["rank"], playerRank["rr"], config=cfg)
-                                        )
-                                        + " | "
-                                        + str(playerRank["rr"])
-                                        + "rr",
-                                    }
-                                )
-                        # rankStatus = playerRank[1]
-                        # useless code since rate limit is handled in the requestsV
-                        # while not rankStatus:
-                        #     print("You have been rate limited, 😞 waiting 10 seconds!")
-                        #     time.sleep(10)
-                        #     playerRank = rank.get_rank(player["Subject"], seasonID)
-                        #     rankStatus = playerRank[1]
-
-                        ppstats = pstats.get_stats(player["Subject"])
-                        hs = ppstats["hs"]
-                        kd = ppstats["kd"]
-
-                        rr_numeric_value = ppstats["RankedRatingEarned"]
-                        afk_penalty = ppstats["AFKPenalty"]
-                        ranked_rating_earned = colors.get_rr_gradient(
-                            rr_numeric_value, afk_penalty
-                        )
-                        # ΔRR cell: center dash when N/A or 0 (0)
-                        def _is_na(v):
-                            return str(v).strip().lower() in ("n/a", "na", "none", "")
-                        earned_rr_is_dash = False
-                        try:
-                            earned_rr_is_dash = (int(rr_numeric_value) == 0 and int(afk_penalty) == 0)
-                        except (ValueError, TypeError):
-                            earned_rr_is_dash = _is_na(rr_numeric_value) and _is_na(afk_penalty)
-                        earned_rr_cell = table.make_center_cell(color("-", fore=(46,46,46))) if earned_rr_is_dash else ranked_rating_earned
-
-                        player_level = player["PlayerIdentity"].get("AccountLevel")
-
-                        if player["PlayerIdentity"]["Incognito"]:
-                            Namecolor = colors.get_color_from_team(
-                                player["TeamID"],
-                                names[player["Subject"]],
-                                player["Subject"],
-                                Requests.puuid,
-                                agent=player["CharacterID"],
-                                party_members=partyMembersList,
-                            )
-                        else:
-                            Namecolor = colors.get_color_from_team(
-                                player["TeamID"],
-                                names[player["Subject"]],
-                                player["Subject"],
-                                Requests.puuid,
-                                party_members=partyMembersList,
-                            )
-                        if lastTeam != player["TeamID"]:
-                            if lastTeamBoolean:
-                                table.add_empty_row()
-                        lastTeam = player["TeamID"]
-                        lastTeamBoolean = True
-                        if player["PlayerIdentity"]["HideAccountLevel"]:
-                            if (
-                                player["Subject"] == Requests.puuid
-                                or player["Subject"] in partyMembersList
-                                or hide_levels == False
-                            ):
-                                PLcolor = colors.level_to_color(player_level)
-                            else:
-                                PLcolor = ""
-                        else:
-                            PLcolor = colors.level_to_color(player_level)
-                        # AGENT
-                        # agent = str(agent_dict.get(player["CharacterID"].lower()))
-                        agent = colors.get_agent_from_uuid(
-                            player["CharacterID"].lower()
-                        )
-                        if agent == "" and len(Players) == 1:
-                            isRange = True
-
-                        # NAME
-                        name = Namecolor
-
-                        # VIEWS
-                        # views = get_views(names[player["Subject"]])
-
-                        # skin
-                        skin = loadouts.get(player["Subject"], "")
-
-                        # RANK
-                        rankName = format_rank_with_square(playerRank["rank"], playerRank["rr"], config=cfg)
-
-                        # RANK RATING
-                        rr = playerRank["rr"]
-
-                        # short peak rank string
-                        has_letter = any(
-                            c.isalpha() for c in str(playerRank["peakrankep"])
-                        )
-                        peakRankAct = (
-                            f" ({playerRank['peakrankep']}a{playerRank['peakrankact']})"
-                            if has_letter
-                            else f" (e{playerRank['peakrankep']}a{playerRank['peakrankact']})"
-                        )
-                        if not cfg.get_feature_flag("peak_rank_act"):
-                            peakRankAct = ""
-
-                        # PEAK RANK
-                        if playerRank["peakrank"] == 0:
-                            # Unrated peak: no act suffix
-                            peakRank = format_rank_with_square(0, 0, is_peak_rank=True, config=cfg)
-                            peakRankAct = ""
-                        else:
-                            peakRank = format_rank_with_square(playerRank["peakrank"], 0, is_peak_rank=True, config=cfg) + peakRankAct
-
-                        # PREVIOUS RANK
-                        previousRank = format_rank_with_square(previousPlayerRank["rank"], 0, config=cfg)
-
-                        # LEADERBOARD
-                        leaderboard = playerRank["leaderboard"]
-
-                        hs_val = colors.get_hs_gradient(hs) if str(hs).strip().lower() not in ("n/a", "na", "none", "") else color("-", fore=(46,46,46))
-                        hs_cell = table.make_center_cell(hs_val)
-                        wr = (
-                            colors.get_wr_gradient(playerRank["wr"]) + f" ({playerRank['numberofgames']})"
-                        )
-
-                        # PARTY ICON
-                        party_color = party_icon
-
-                        # Only show leaderboard position for ranks below Immortal (rank 24+)
-                        if int(leaderboard) > 0 and playerRank["rank"] < 24:
-                            is_leaderboard_needed = True
-
-                        # LEVEL
-                        level = PLcolor
-
-                        # Build split cells for Rank and Peak Rank
-                        if cfg.get_feature_flag("aggregate_rank_rr"):
-                            # Rank cell shows rank + RR; put RR in right part except for Unrated
-                            if playerRank["rank"] == 0:
-                                # Left-align Unrated by using split cell with empty right part
-                                rank_cell = table.make_split_cell(rankName, "")
-                            else:
-                                # left part: rank label without trailing RR
-                                left_rank = rankName.rsplit("(", 1)[0].rstrip()
-                                right_rr = f"({rr})"
-                                rank_cell = table.make_split_cell(left_rank, right_rr)
-                        else:
-                            # Left-align Unrated too
-                            rank_cell = table.make_split_cell(rankName, "") if playerRank["rank"] == 0 else rankName
-
-                        # Peak rank cell: split left label and right act code
-                        if cfg.get_feature_flag("peak_rank_act") and playerRank["peakrank"] != 0 and peakRankAct:
-                            left_peak = peakRank.rsplit("(", 1)[0].rstrip()
-                            right_peak = peakRank[peakRank.rfind("("):]
-                            peak_cell = table.make_split_cell(left_peak, right_peak)
-                        else:
-                            # Left-align Unrated peak
-                            peak_cell = table.make_split_cell(peakRank, "") if playerRank["peakrank"] == 0 else peakRank
-
-                        # Build WR split cell: left winrate, right games in parentheses
-                        wr_is_na = str(playerRank['wr']).strip().lower() in ("n/a", "na", "none", "")
-                        wr_left = table.make_center_cell(color("-", fore=(46,46,46))) if wr_is_na else colors.get_wr_gradient(playerRank['wr'])
-                        games_text = f"({playerRank['numberofgames']})" if (not wr_is_na and str(playerRank['numberofgames']).isdigit()) else ""
-                        wr_cell = wr_left if wr_is_na else table.make_split_cell(wr_left, games_text)
-
-                        # Build RR split cell (left RR, no right part); use '-' if not available
-                        rr_is_na = str(rr).strip().lower() in ("n/a", "na", "none", "")
-                        rr_text = str(rr) if not rr_is_na else color("-", fore=(46,46,46))
-                        rr_cell = table.make_center_cell(rr_text) if rr_is_na else table.make_split_cell(rr_text, "")
-
-                        table.add_row_table(
-                            [
-                                party_icon,
-                                agent,
-                                name,
-                                # views,
-                                skin,
-                                rank_cell,
-                                rr_cell,
-                                peak_cell,
-                                previousRank,
-                                leaderboard,
-                                hs_cell,
-                                wr_cell,
-                                kd,
-                                level,
-                                earned_rr_cell,
-                            ]
-                        )
-
-                        heartbeat_data["players"][player["Subject"]] = {
-                            "puuid": player["Subject"],
-                            "name": names[player["Subject"]],
-                            "partyNumber": partyNum if party_icon != "" else 0,
-                            "agent": agent_dict.get(player["CharacterID"].lower(), "Unknown"),
-                            "rank": playerRank["rank"],
-                            "peakRank": playerRank["peakrank"],
-                            "peakRankAct": peakRankAct,
-                            "rr": rr,
-                            "kd": ppstats["kd"],
-                            "headshotPercentage": ppstats["hs"],
-                            "winPercentage": f"{playerRank['wr']} ({playerRank['numberofgames']})",
-                            "level": player_level,
-                            "agentImgLink": loadouts_data["Players"][
-                                player["Subject"]
-                            ].get("Agent", None),
-                            "team": loadouts_data["Players"][player["Subject"]].get(
-                                "Team", None
-                            ),
-                            "sprays": loadouts_data["Players"][player["Subject"]].get(
-                                "Sprays", None
-                            ),
-                            "title": loadouts_data["Players"][player["Subject"]].get(
-                                "Title", None
-                            ),
-                            "playerCard": loadouts_data["Players"][
-                                player["Subject"]
-                            ].get("PlayerCard", None),
-                            "weapons": loadouts_data["Players"][player["Subject"]].get(
-                                "Weapons", None
-                            ),
-                        }
-
-                        stats.save_data(
-                            {
-                                player["Subject"]: {
-                                    "name": names[player["Subject"]],
-                                    "agent": agent_dict.get(player["CharacterID"].lower(), "Unknown"),
-                                    "map": current_map,
-                                    "rank": playerRank["rank"],
-                                    "rr": rr,
-                                    "match_id": coregame.match_id,
-                                    "epoch": time.time(),
-                                }
-                            }
-                        )
-                        # bar()
+                match_puuids = player_puuids
+                lobby = Lobby(
+                    game_state,
+                    Players,
+                    names,
+                    party_assignments=party_assignments,
+                    party_members=partyMembersList,
+                    match_id=coregame.match_id,
+                    loadouts=loadouts_arr[0],
+                    loadouts_data=loadouts_arr[1],
+                )
             elif game_state == "PREGAME":
-                already_played_with = []
                 pregame_stats = pregame.get_pregame_stats()
                 if pregame_stats == None:
                     continue
@@ -738,284 +440,25 @@ try:
                 log(f"presences found: {[player['Subject'] for player in Players]}")
                 names = namesClass.get_names_from_puuids(Players)
                 # temporary until other regions gets fixed?
-                # loadouts = loadoutsClass.get_match_loadouts(pregame.get_pregame_match_id(), pregame_stats, cfg.weapon, valoApiSkins, names,
+                # loadouts = loadoutsClass.get_match_loadouts(pregame.get_pregame_match_id(), pregame_stats, cfg.weapon, names,
                 #   state="pregame")
-                playersLoaded = 1
-                with richConsole.status("Loading Players...") as status:
-                    # with alive_bar(total=len(Players), title='Fetching Players', bar='classic2') as bar:
-                    presence = presences.get_presence()
-                    partyOBJ = menu.get_party_json(
-                        namesClass.get_players_puuid(Players), presence
-                    )
-                    partyMembers = menu.get_party_members(Requests.puuid, presence)
-                    partyMembersList = [a["Subject"] for a in partyMembers]
-                    # log(f"retrieved names dict: {names}")
-                    Players.sort(
-                        key=lambda Players: Players["PlayerIdentity"].get(
-                            "AccountLevel"
-                        ),
-                        reverse=True,
-                    )
-                    partyCount = 0
-                    partyIcons = {}
-                    for player in Players:
-                        status.update(
-                            f"Loading players... [{playersLoaded}/{len(Players)}]"
-                        )
-                        playersLoaded += 1
-                        # Assign party icon: numbers (colorblind) when party_finder+party_colorblind, else blocks from game party API
-                        assignment = party_assignments.get(player["Subject"])
-                        partyNum = 0
-                        use_party_numbers = cfg.get_feature_flag("party_finder") and cfg.get_feature_flag("party_colorblind")
-                        if use_party_numbers and assignment:
-                            number_str, color_hex = assignment
-                            party_icon = f"[{color_hex}]{number_str}[/]"
-                            try:
-                                partyNum = int(number_str)
-                            except (ValueError, AttributeError):
-                                partyNum = 0
-                        else:
-                            party_icon = ""
-
-                        # set party premade icon (blocks) when NOT using party numbers
-                        if not use_party_numbers:
-                            for party in partyOBJ:
-                                if player["Subject"] in partyOBJ[party]:
-                                    if party not in partyIcons:
-                                        partyIcons.update(
-                                            {party: PARTYICONLIST[partyCount]}
-                                        )
-                                        # PARTY_ICON
-                                        party_icon = PARTYICONLIST[partyCount]
-                                        partyNum = partyCount + 1
-                                    else:
-                                        # PARTY_ICON
-                                        party_icon = partyIcons[party]
-                                        # Try to extract partyNum from existing partyIcons
-                                        for p, icon in partyIcons.items():
-                                            if icon == party_icon:
-                                                partyNum = PARTYICONLIST.index(icon) + 1 if icon in PARTYICONLIST else 0
-                                                break
-                                    partyCount += 1
-                        playerRank = rank.get_rank(player["Subject"], seasonID)
-                        previousPlayerRank = rank.get_rank(
-                            player["Subject"], previousSeasonID
-                        )
-
-                        if player["Subject"] == Requests.puuid:
-                            if cfg.get_feature_flag("discord_rpc"):
-                                rpc.set_data(
-                                    {
-                                        "rank": playerRank["rank"],
-                                        "rank_name": colors.escape_ansi(
-                                            format_rank_with_square(playerRank["rank"], playerRank["rr"], config=cfg)
-                                        )
-                                        + " | "
-                                        + str(playerRank["rr"])
-                                        + "rr",
-                                    }
-                                )
-                        # rankStatus = playerRank[1]
-                        # useless code since rate limit is handled in the requestsV
-                        # while not rankStatus:
-                        #     print("You have been rate limited, 😞 waiting 10 seconds!")
-                        #     time.sleep(10)
-                        #     playerRank = rank.get_rank(player["Subject"], seasonID)
-                        #     rankStatus = playerRank[1]
-                        # playerRank = playerRank[0]
-
-                        ppstats = pstats.get_stats(player["Subject"])
-                        hs = ppstats["hs"]
-                        kd = ppstats["kd"]
-
-                        rr_numeric_value = ppstats["RankedRatingEarned"]
-                        afk_penalty = ppstats["AFKPenalty"]
-                        ranked_rating_earned = colors.get_rr_gradient(
-                            rr_numeric_value, afk_penalty
-                        )
-                        # ΔRR cell: center dash when N/A or 0 (0)
-                        def _is_na_p(v):
-                            return str(v).strip().lower() in ("n/a", "na", "none", "")
-                        earned_rr_is_dash_p = False
-                        try:
-                            earned_rr_is_dash_p = (int(rr_numeric_value) == 0 and int(afk_penalty) == 0)
-                        except (ValueError, TypeError):
-                            earned_rr_is_dash_p = _is_na_p(rr_numeric_value) and _is_na_p(afk_penalty)
-                        earned_rr_cell_p = table.make_center_cell(color("-", fore=(46,46,46))) if earned_rr_is_dash_p else ranked_rating_earned
-
-                        player_level = player["PlayerIdentity"].get("AccountLevel")
-                        if player["PlayerIdentity"]["Incognito"]:
-                            NameColor = colors.get_color_from_team(
-                                pregame_stats["Teams"][0]["TeamID"],
-                                names[player["Subject"]],
-                                player["Subject"],
-                                Requests.puuid,
-                                agent=player["CharacterID"],
-                                party_members=partyMembersList,
-                            )
-                        else:
-                            NameColor = colors.get_color_from_team(
-                                pregame_stats["Teams"][0]["TeamID"],
-                                names[player["Subject"]],
-                                player["Subject"],
-                                Requests.puuid,
-                                party_members=partyMembersList,
-                            )
-
-                        if player["PlayerIdentity"]["HideAccountLevel"]:
-                            if (
-                                player["Subject"] == Requests.puuid
-                                or player["Subject"] in partyMembersList
-                                or hide_levels == False
-                            ):
-                                PLcolor = colors.level_to_color(player_level)
-                            else:
-                                PLcolor = ""
-                        else:
-                            PLcolor = colors.level_to_color(player_level)
-                        if player["CharacterSelectionState"] == "locked":
-                            agent_color = color(
-                                agent_dict.get(player["CharacterID"].lower(), "Unknown"),
-                                fore=(255, 255, 255),
-                            )
-                        elif player["CharacterSelectionState"] == "selected":
-                            agent_color = color(
-                                agent_dict.get(player["CharacterID"].lower(), "Unknown"),
-                                fore=(128, 128, 128),
-                            )
-                        else:
-                            agent_color = color(
-                                agent_dict.get(player["CharacterID"].lower(), "Unknown"),
-                                fore=(54, 53, 51),
-                            )
-
-                        # AGENT
-                        agent = agent_color
-
-                        # NAME
-                        name = NameColor
-
-                        # VIEWS
-                        # views = get_views(names[player["Subject"]])
-
-                        # temporary until other regions gets fixed?
-                        # skin
-                        # skin = loadouts[player["Subject"]]
-
-                        # RANK
-                        rankName = format_rank_with_square(playerRank["rank"], playerRank["rr"], config=cfg)
-
-                        # RANK RATING
-                        rr = playerRank["rr"]
-
-                        # short peak rank string
-                        has_letter = any(
-                            c.isalpha() for c in str(playerRank["peakrankep"])
-                        )
-                        peakRankAct = (
-                            f" ({playerRank['peakrankep']}a{playerRank['peakrankact']})"
-                            if has_letter
-                            else f" (e{playerRank['peakrankep']}a{playerRank['peakrankact']})"
-                        )
-                        if not cfg.get_feature_flag("peak_rank_act"):
-                            peakRankAct = ""
-                        # PEAK RANK
-                        if playerRank["peakrank"] == 0:
-                            peakRank = format_rank_with_square(0, 0, is_peak_rank=True, config=cfg)
-                            peakRankAct = ""
-                        else:
-                            peakRank = format_rank_with_square(playerRank["peakrank"], 0, is_peak_rank=True, config=cfg) + peakRankAct
-
-                        # PREVIOUS RANK
-                        previousRank = format_rank_with_square(previousPlayerRank["rank"], 0, config=cfg)
-
-                        # LEADERBOARD
-                        leaderboard = playerRank["leaderboard"]
-
-                        hs_val = colors.get_hs_gradient(hs) if str(hs).strip().lower() not in ("n/a", "na", "none", "") else color("-", fore=(46,46,46))
-                        hs_cell = table.make_center_cell(hs_val)
-                        wr = (
-                            colors.get_wr_gradient(playerRank["wr"])
-                            + f" ({playerRank['numberofgames']})"
-                        )
-
-                        # PARTY ICON
-                        party_color = party_icon
-
-                        # Only show leaderboard position for ranks below Immortal (rank 24+)
-                        if int(leaderboard) > 0 and playerRank["rank"] < 24:
-                            is_leaderboard_needed = True
-
-                        # LEVEL
-                        level = PLcolor
-
-                        # Build split cells
-                        if cfg.get_feature_flag("aggregate_rank_rr"):
-                            if playerRank["rank"] == 0:
-                                rank_cell = table.make_split_cell(rankName, "")
-                            else:
-                                left_rank = rankName.rsplit("(", 1)[0].rstrip()
-                                right_rr = f"({rr})"
-                                rank_cell = table.make_split_cell(left_rank, right_rr)
-                        else:
-                            rank_cell = table.make_split_cell(rankName, "") if playerRank["rank"] == 0 else rankName
-
-                        if cfg.get_feature_flag("peak_rank_act") and playerRank["peakrank"] != 0 and peakRankAct:
-                            left_peak = peakRank.rsplit("(", 1)[0].rstrip()
-                            right_peak = peakRank[peakRank.rfind("("):]
-                            peak_cell = table.make_split_cell(left_peak, right_peak)
-                        else:
-                            peak_cell = table.make_split_cell(peakRank, "") if playerRank["peakrank"] == 0 else peakRank
-
-                        # Build WR split cell: left winrate, right games in parentheses
-                        wr_is_na = str(playerRank['wr']).strip().lower() in ("n/a", "na", "none", "")
-                        wr_left = table.make_center_cell(color("-", fore=(46,46,46))) if wr_is_na else colors.get_wr_gradient(playerRank['wr'])
-                        games_text = f"({playerRank['numberofgames']})" if (not wr_is_na and str(playerRank['numberofgames']).isdigit()) else ""
-                        wr_cell = wr_left if wr_is_na else table.make_split_cell(wr_left, games_text)
-
-                        # Build RR split cell (left RR, no right part); use '-' if not available
-                        rr_is_na = str(rr).strip().lower() in ("n/a", "na", "none", "")
-                        rr_text = str(rr) if not rr_is_na else color("-", fore=(46,46,46))
-                        rr_cell = table.make_center_cell(rr_text) if rr_is_na else table.make_split_cell(rr_text, "")
-
-                        table.add_row_table(
-                            [
-                                party_icon,
-                                agent,
-                                name,
-                                # views,
-                                "",
-                                rank_cell,
-                                rr_cell,
-                                peak_cell,
-                                previousRank,
-                                leaderboard,
-                                hs_cell,
-                                wr_cell,
-                                kd,
-                                level,
-                                earned_rr_cell_p,
-                            ]
-                        )
-
-                        heartbeat_data["players"][player["Subject"]] = {
-                            "name": names[player["Subject"]],
-                            "partyNumber": partyNum if party_icon != "" else 0,
-                            "agent": agent_dict.get(player["CharacterID"].lower(), "Unknown"),
-                            "rank": playerRank["rank"],
-                            "peakRank": playerRank["peakrank"],
-                            "peakRankAct": peakRankAct,
-                            "level": player_level,
-                            "rr": rr,
-                            "kd": ppstats["kd"],
-                            "headshotPercentage": ppstats["hs"],
-                            "winPercentage": f"{playerRank['wr']} ({playerRank['numberofgames']})",
-                        }
-
-                        # bar()
-            if game_state == "MENUS":
+                presence = presences.get_presence()
+                partyOBJ = menu.get_party_json(
+                    namesClass.get_players_puuid(Players), presence
+                )
+                partyMembers = menu.get_party_members(Requests.puuid, presence)
+                partyMembersList = [a["Subject"] for a in partyMembers]
+                lobby = Lobby(
+                    game_state,
+                    Players,
+                    names,
+                    party_assignments=party_assignments,
+                    party=partyOBJ,
+                    party_members=partyMembersList,
+                    team_id=pregame_stats["Teams"][0]["TeamID"],
+                )
+            elif game_state == "MENUS":
                 server = ""
-                already_played_with = []
                 Players = menu.get_party_members(Requests.puuid, presence)
                 names = namesClass.get_names_from_puuids(Players)
 
@@ -1028,193 +471,8 @@ try:
                 else:
                     party_assignments = {}
                 # --- End Find Parties ---
+                lobby = Lobby(game_state, Players, names, party_assignments=party_assignments)
 
-                playersLoaded = 1
-                with richConsole.status("Loading Players...") as status:
-                    # with alive_bar(total=len(Players), title='Fetching Players', bar='classic2') as bar:
-                    # log(f"retrieved names dict: {names}")
-                    Players.sort(
-                        key=lambda Players: Players["PlayerIdentity"].get(
-                            "AccountLevel"
-                        ),
-                        reverse=True,
-                    )
-                    seen = []
-                    for player in Players:
-
-                        if player not in seen:
-                            status.update(
-                                f"Loading players... [{playersLoaded}/{len(Players)}]"
-                            )
-                            playersLoaded += 1
-                            # Assign party icon based on the assignments from party_finder
-                            assignment = party_assignments.get(player["Subject"])
-                            partyNum = 0
-                            if assignment:
-                                number_str, color_hex = assignment
-                                party_icon = f"[{color_hex}]{number_str}[/]"
-                                # Extract party number from the assignment (number_str is already a string like "1", "2", etc.)
-                                try:
-                                    partyNum = int(number_str)
-                                except (ValueError, AttributeError):
-                                    partyNum = 0
-                            else:
-                                party_icon = ""
-                            playerRank = rank.get_rank(player["Subject"], seasonID)
-                            previousPlayerRank = rank.get_rank(
-                                player["Subject"], previousSeasonID
-                            )
-                            if player["Subject"] == Requests.puuid:
-                                if cfg.get_feature_flag("discord_rpc"):
-                                    rpc.set_data(
-                                        {
-                                            "rank": playerRank["rank"],
-                                            "rank_name": colors.escape_ansi(
-                                                format_rank_with_square(playerRank["rank"], playerRank["rr"], config=cfg)
-                                            )
-                                            + " | "
-                                            + str(playerRank["rr"])
-                                            + "rr",
-                                        }
-                                    )
-
-                            # rankStatus = playerRank[1]
-                            # useless code since rate limit is handled in the requestsV
-                            # while not rankStatus:
-                            #     print("You have been rate limited, 😞 waiting 10 seconds!")
-                            #     time.sleep(10)
-                            #     playerRank = rank.get_rank(player["Subject"], seasonID)
-                            #     rankStatus = playerRank[1]
-                            # playerRank = playerRank["rank"]
-
-                            ppstats = pstats.get_stats(player["Subject"])
-                            hs = ppstats["hs"]
-                            kd = ppstats["kd"]
-
-                            rr_numeric_value = ppstats["RankedRatingEarned"]
-                            afk_penalty = ppstats["AFKPenalty"]
-                            ranked_rating_earned = colors.get_rr_gradient(
-                                rr_numeric_value, afk_penalty
-                            )
-                            # ΔRR cell: center dash when N/A or 0 (0)
-                            def _is_na_m(v):
-                                return str(v).strip().lower() in ("n/a", "na", "none", "")
-                            earned_rr_is_dash_m = False
-                            try:
-                                earned_rr_is_dash_m = (int(rr_numeric_value) == 0 and int(afk_penalty) == 0)
-                            except (ValueError, TypeError):
-                                earned_rr_is_dash_m = _is_na_m(rr_numeric_value) and _is_na_m(afk_penalty)
-                            earned_rr_cell_m = table.make_center_cell(color("-", fore=(46,46,46))) if earned_rr_is_dash_m else ranked_rating_earned
-
-                            player_level = player["PlayerIdentity"].get("AccountLevel")
-                            PLcolor = colors.level_to_color(player_level)
-
-                            # AGENT
-                            agent = ""
-
-                            # NAME
-                            name = color(names[player["Subject"]], fore=(76, 151, 237))
-
-                            # RANK
-                            rankName = format_rank_with_square(playerRank["rank"], playerRank["rr"], config=cfg)
-
-                            # RANK RATING
-                            rr = playerRank["rr"]
-
-                            # short peak rank string
-                            has_letter = any(
-                                c.isalpha() for c in str(playerRank["peakrankep"])
-                            )
-                            peakRankAct = (
-                                f" ({playerRank['peakrankep']}a{playerRank['peakrankact']})"
-                                if has_letter
-                                else f" (e{playerRank['peakrankep']}a{playerRank['peakrankact']})"
-                            )
-                            if not cfg.get_feature_flag("peak_rank_act"):
-                                peakRankAct = ""
-
-                            # PEAK RANK
-                            if playerRank["peakrank"] == 0:
-                                peakRank = format_rank_with_square(0, 0, is_peak_rank=True, config=cfg)
-                                peakRankAct = ""
-                            else:
-                                peakRank = (
-                                    format_rank_with_square(playerRank["peakrank"], 0, is_peak_rank=True, config=cfg) + peakRankAct
-                                )
-
-                            # PREVIOUS RANK
-                            previousRank = format_rank_with_square(previousPlayerRank["rank"], 0, config=cfg)
-
-                            # LEADERBOARD
-                            leaderboard = playerRank["leaderboard"]
-
-                            hs_val = colors.get_hs_gradient(hs) if str(hs).strip().lower() not in ("n/a", "na", "none", "") else color("-", fore=(46,46,46))
-                            hs_cell = table.make_center_cell(hs_val)
-                            wr = (
-                                colors.get_wr_gradient(playerRank["wr"]) + f" ({playerRank['numberofgames']})"
-                            )
-
-                            # PARTY ICON
-                            party_color = party_icon
-
-                            # Only show leaderboard position for ranks below Immortal (rank 24+)
-                            if int(leaderboard) > 0 and playerRank["rank"] < 24:
-                                is_leaderboard_needed = True
-
-                            # LEVEL
-                            level = PLcolor
-
-                            # Build split cells
-                            if cfg.get_feature_flag("aggregate_rank_rr"):
-                                if playerRank["rank"] == 0:
-                                    rank_cell = rankName
-                                else:
-                                    left_rank = rankName.rsplit("(", 1)[0].rstrip()
-                                    right_rr = f"({rr})"
-                                    rank_cell = table.make_split_cell(left_rank, right_rr)
-                            else:
-                                rank_cell = rankName
-
-                            if cfg.get_feature_flag("peak_rank_act") and playerRank["peakrank"] != 0 and peakRankAct:
-                                left_peak = peakRank.rsplit("(", 1)[0].rstrip()
-                                right_peak = peakRank[peakRank.rfind("("):]
-                                peak_cell = table.make_split_cell(left_peak, right_peak)
-                            else:
-                                peak_cell = peakRank
-
-                            table.add_row_table(
-                                [
-                                    party_icon,
-                                    agent,
-                                    name,
-                                    "",
-                                    rank_cell,
-                                    rr,
-                                    peak_cell,
-                                    previousRank,
-                                    leaderboard,
-                                    hs_cell,
-                                    wr,
-                                    kd,
-                                    level,
-                                    earned_rr_cell_m,
-                                ]
-                            )
-
-                            heartbeat_data["players"][player["Subject"]] = {
-                                "name": names[player["Subject"]],
-                                "rank": playerRank["rank"],
-                                "peakRank": playerRank["peakrank"],
-                                "peakRankAct": peakRankAct,
-                                "level": player_level,
-                                "rr": rr,
-                                "kd": ppstats["kd"],
-                                "headshotPercentage": ppstats["hs"],
-                                "winPercentage": f"{playerRank['wr']} ({playerRank['numberofgames']})",
-                            }
-
-                            # bar()
-                    seen.append(player["Subject"])
             if (title := game_state_dict.get(game_state)) is None:
                 # program_exit(1)
                 print(color("Waiting for Valorant to start...", fore=(255, 165, 0)))
@@ -1233,18 +491,10 @@ try:
             table.set_title(''.join(title_parts))
             
             if title is not None:
-                if cfg.get_feature_flag("auto_hide_leaderboard") and (
-                    not is_leaderboard_needed
-                ):
-                    table.set_runtime_col_flag("Pos.", False)
-
                 if game_state == "MENUS":
                     table.set_runtime_col_flag("Agent", False)
                     table.set_runtime_col_flag(cfg.weapon.capitalize(), False)
 
-                if game_state == "INGAME" and isRange:
-                    table.set_runtime_col_flag("Agent", False)
-
                 # We don't to show the RR column if the "aggregate_rank_rr" feature flag is True.
                 table.set_runtime_col_flag(
                     "RR",
@@ -1253,19 +503,39 @@ try:
                 )
 
                 table.set_caption(f"VALORANT rank yoinker v{version}")
-                Server.send_payload("heartbeat", heartbeat_data)
-                table.display()
-                firstPrint = False
-
-                # print(f"VALORANT rank yoinker v{version}")
-                if cfg.get_feature_flag("last_played"):
-                    if len(already_played_with) > 0:
-                        print("\n")
-                        for played in already_played_with:
-                            print(
-                                f"Already played with {played['name']} (last {played['agent']}) {stats.convert_time(played['time_diff'])} ago. (Total played {played['times']} times)"
-                            )
-                already_played_with = []
+
+                # chat arriving while the table is drawn is printed after it, not into the middle of it
+                with Wss.chat_held():
+                    if cfg.get_feature_flag("live_table"):
+                        # rows show up as soon as their player is loaded, the rest of the lobby keeps loading
+                        with table.live() as live:
+                            def update_live(lobby):
+                                set_lobby_col_flags(table, cfg, lobby)
+                                live.update(table.build(), refresh=True)
+                            player_rows.run(lobby, heartbeat_data, on_update=update_live, live=True)
+                        log.debug("table.rows", rows=table.rows)
+                        Server.send_payload("heartbeat", heartbeat_data)
+                    else:
+                        with richConsole.status("Loading Players...") as status:
+                            player_rows.run(lobby, heartbeat_data, status=status)
+                        set_lobby_col_flags(table, cfg, lobby)
+                        Server.send_payload("heartbeat", heartbeat_data)
+                        table.display()
+                    if firstPrint:
+                        startup.report("time to first table")
+                    firstPrint = False
+                    Requests.log_pool_stats()
+                    rank.log_cache_stats()
+                    Server.send_payload("metrics", Requests.metrics.collect())
+
+                    # print(f"VALORANT rank yoinker v{version}")
+                    if cfg.get_feature_flag("last_played"):
+                        if len(lobby.already_played_with) > 0:
+                            print("\n")
+                            for played in lobby.already_played_with:
+                                print(
+                                    f"Already played with {played['name']} (last {played['agent']}) {stats.convert_time(played['time_diff'])} ago. (Total played {played['times']} times)"
+                                )
         if cfg.cooldown == 0:
             input("Press enter to fetch again...")
         else:
@@ -1273,6 +543,7 @@ try:
             pass
 except KeyboardInterrupt:
     # lame implementation of fast ctrl+c exit
+    Logging.close()
     os._exit(0)
 except:
     log(traceback.format_exc())
@@ -1284,4 +555,5 @@ except:
         )
     )
     input("press enter to exit...\n")
+    Logging.close()
     os._exit(1)
\ No newline at end of file
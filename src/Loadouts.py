@@ -1,11 +1,15 @@
 import time
-import requests
 from colr import color
 from src.constants import sockets, hide_names
 import json
 
 
 class Loadouts:
+    """
+    Builds the weapon column and the website's matchLoadout payload. Processed players are memoized
+    by (match_id, subject) and a hash of everything their entry is built from, so later refreshes of
+    the same match only rebuild and send the players whose loadout changed.
+    """
     def __init__(self, Requests, log, colors, Server, current_map, config=None):
 
         self.Requests = Requests
@@ -14,12 +18,14 @@ class Loadouts:
         self.Server = Server
         self.current_map = current_map
         self.config = config
+        self.match_id = None
+        # (match_id, subject) -> {"hash", "weapon", "json"}
+        self.player_cache = {}
 
-    def get_match_loadouts(self, match_id, players, weaponChoose, valoApiSkins, names, state="game"):
+    def get_match_loadouts(self, match_id, players, weaponChoose, names, state="game"):
         playersBackup = players
         weaponLists = {}
-        valApiWeapons = requests.get(
-            "https://valorant-api.com/v1/weapons").json()
+        content_index = self.Requests.static_content.get_index()
         if state == "game":
             team_id = "Blue"
             PlayerInventorys = self.Requests.fetch(
@@ -39,238 +45,142 @@ class Loadouts:
             if subj and char_id:
                 loadout_by_subject[subj] = loadout_entry["Loadout"] if state == "game" else loadout_entry
 
-        for player in players:
-            subj = player.get("Subject", "").lower()
-            inv = loadout_by_subject.get(subj)
-            if inv is None:
-                continue
-            for weapon in valApiWeapons["data"]:
-                if weapon["displayName"].lower() == weaponChoose.lower():
-                    skin_id = \
-                        inv["Items"][weapon["uuid"].lower()]["Sockets"]["bcef87d6-209b-46c6-8b19-fbe40bd95abc"]["Item"][
-                            "ID"]
-                    json_data = valoApiSkins.json()
-
-                    if "data" not in json_data:
-                        self.log("Skins API response missing 'data'.")
-                        return None
-
-                    for skin in json_data["data"]:
-                        if skin_id.lower() == skin["uuid"].lower():
-                            rgb_color = self.colors.get_rgb_color_from_skin(
-                                skin["uuid"].lower(), valoApiSkins)
-                            display_name = skin.get("displayName", "")
-
-                            truncate_skins = True
-                            if self.config and hasattr(self.config, 'get_feature_flag'):
-                                truncate_skins = self.config.get_feature_flag("truncate_skins")
-
-                            if truncate_skins:
-                                for weapon_obj in valApiWeapons["data"]:
-                                    weapon_name = weapon_obj.get("displayName", "")
-                                    if weapon_name and display_name.lower().endswith(" " + weapon_name.lower()):
-                                        display_name = display_name[: -len(weapon_name)].rstrip()
-                                        break
-                                tokens = display_name.split()
-                                if tokens:
-                                    first_word = tokens[0]
-                                    numeric_tokens = [t for t in tokens if any(ch.isdigit() for ch in t)]
-                                    if numeric_tokens:
-                                        short_name = f"{first_word} {numeric_tokens[-1]}"
-                                    else:
-                                        short_name = first_word
-                                else:
-                                    short_name = display_name
-                            else:
-                                short_name = display_name
-                            weaponLists.update({player["Subject"]: color(short_name, fore=rgb_color)})
-                            # else:
-                            #     weaponLists.update({player["Subject"]: color(skin["Name"], fore=rgb_color)})
-        final_json = self.convertLoadoutToJsonArray(
-            PlayerInventorys, playersBackup, state, names)
-        # self.log(f"json for website: {final_json}")
-        self.Server.send_payload("matchLoadout", final_json)
-        return [weaponLists, final_json]
-
-    # this will convert valorant loadouts to json with player names
-    def convertLoadoutToJsonArray(self, PlayerInventorys, players, state, names):
-        # get agent dict from main in future
-        # names = self.namesClass.get_names_from_puuids(players)
-        valoApiSprays = requests.get("https://valorant-api.com/v1/sprays")
-        valoApiWeapons = requests.get("https://valorant-api.com/v1/weapons")
-        valoApiBuddies = requests.get("https://valorant-api.com/v1/buddies")
-        valoApiAgents = requests.get("https://valorant-api.com/v1/agents")
-        valoApiTitles = requests.get(
-            "https://valorant-api.com/v1/playertitles")
-        valoApiPlayerCards = requests.get(
-            "https://valorant-api.com/v1/playercards")
+        new_match = match_id != self.match_id
+        if new_match:
+            self.match_id = match_id
+            self.player_cache = {}
 
+        truncate_skins = self.get_truncate_skins()
+        weapon_uuid = content_index.get_weapon_uuid(weaponChoose)
         final_final_json = {"Players": {},
                             "time": int(time.time()),
                             "map": self.current_map}
+        changed_players = {}
+        for player in (playersBackup if state == "game" else players):
+            subject = player["Subject"]
+            inv = loadout_by_subject.get(subject.lower())
+            name = names.get(subject) if not hide_names else None
+            player_hash = hash(json.dumps(
+                [inv, player.get("CharacterID"), player.get("TeamID"), player.get("PlayerIdentity"), name,
+                 weaponChoose, truncate_skins, content_index.generation],
+                sort_keys=True,
+            ))
+            cached = self.player_cache.get((match_id, subject))
+            if cached is None or cached["hash"] != player_hash:
+                cached = self.player_cache[(match_id, subject)] = {
+                    "hash": player_hash,
+                    "weapon": self.build_weapon(inv, weapon_uuid, content_index, truncate_skins),
+                    "json": self.build_player_json(player, inv, names, content_index, truncate_skins)
+                    if state == "game" else None,
+                }
+                if cached["json"] is not None:
+                    changed_players[subject] = cached["json"]
+            if cached["weapon"] is not None:
+                weaponLists.update({subject: cached["weapon"]})
+            if cached["json"] is not None:
+                final_final_json["Players"][subject] = cached["json"]
+
+        # self.log(f"json for website: {final_final_json}")
+        if new_match:
+            self.Server.send_payload("matchLoadout", final_final_json)
+        else:
+            self.Server.send_payload_delta("matchLoadout", final_final_json, {
+                "Players": changed_players,
+                "time": final_final_json["time"],
+                "map": self.current_map,
+            } if changed_players else None)
+        self.log(f"match loadouts: {len(changed_players)} of {len(final_final_json['Players'])} players rebuilt")
+        return [weaponLists, final_final_json]
+
+    def get_truncate_skins(self):
+        if self.config and hasattr(self.config, 'get_feature_flag'):
+            return self.config.get_feature_flag("truncate_skins")
+        return True
+
+    def build_weapon(self, inv, weapon_uuid, content_index, truncate_skins):
+        # colored skin name of the weapon chosen in the config, for the table
+        if inv is None or weapon_uuid is None:
+            return None
+        skin_id = inv["Items"][weapon_uuid]["Sockets"][sockets["skin"]]["Item"]["ID"]
+        skin = content_index.get_skin(skin_id)
+        if skin is None:
+            return None
+        rgb_color = self.colors.get_rgb_color_from_skin(skin_id, content_index)
+        short_name = skin["shortName"] if truncate_skins else skin["name"]
+        return color(short_name, fore=rgb_color)
+
+    # this will convert a valorant loadout to the website's json for one player
+    def build_player_json(self, player, PlayerInventory, names, content_index, truncate_skins):
+        subject = player["Subject"]
+        player_json = {}
+        if PlayerInventory is None:
+            return player_json
+
+        agent = content_index.get_agent(player["CharacterID"])
+
+        if hide_names:
+            if agent is not None:
+                player_json.update({"Name": agent["name"]})
+        else:
+            player_json.update({"Name": names[subject]})
+
+        player_json.update({"Team": player["TeamID"]})
+
+        player_json.update({"Sprays": {}})
+
+        player_json.update(
+            {"Level": player["PlayerIdentity"]["AccountLevel"]})
+
+        title = content_index.get_title(player["PlayerIdentity"]["PlayerTitleID"])
+        if title is not None:
+            player_json.update({"Title": title})
+
+        card = content_index.get_card(player["PlayerIdentity"]["PlayerCardID"])
+        if card is not None:
+            player_json.update({"PlayerCard": card})
+
+        if agent is not None:
+            player_json.update({"AgentArtworkName": agent["name"] + "Artwork"})
+            player_json.update({"Agent": agent["displayIcon"]})
+
+        spray_selections = [
+            s for s in PlayerInventory.get("Expressions", {}).get("AESSelections", [])
+            if s.get("TypeID") == "d5f120f8-ff8c-4aac-92ea-f2b5acbe9475"
+        ]
+        for j, spray in enumerate(spray_selections):
+            player_json["Sprays"].update({j: dict(content_index.get_spray(spray["AssetID"]) or {})})
+
+        player_json.update({"Weapons": {}})
+
+        for skin in PlayerInventory["Items"]:
+            item_sockets = PlayerInventory["Items"][skin]["Sockets"]
+            weapon_json = player_json["Weapons"][skin] = {}
+
+            for var_socket in sockets:
+                if sockets[var_socket] in item_sockets:
+                    weapon_json.update({var_socket: item_sockets[sockets[var_socket]]["Item"]["ID"]})
+
+            if sockets["skin_buddy"] in item_sockets:
+                buddy_icon = content_index.get_buddy_icon(item_sockets[sockets["skin_buddy"]]["Item"]["ID"])
+                if buddy_icon is not None:
+                    weapon_json.update({"buddy_displayIcon": buddy_icon})
+
+            weapon = content_index.get_weapon(skin)
+            if weapon is None:
+                continue
+            weapon_json.update({"weapon": weapon["name"]})
 
-        final_json = final_final_json["Players"]
-        if state == "game":
-            PlayerInventorys = PlayerInventorys["Loadouts"]
-
-            # subject (player UUID) -> loadout lookup
-            loadout_by_subject = {}
-            for entry in PlayerInventorys:
-                subj = entry.get("Subject", "").lower()
-                char_id = entry.get("CharacterID", "")
-                if subj and char_id:
-                    loadout_by_subject[subj] = entry["Loadout"]
-
-            for player in players:
-                subject = player["Subject"]
-                subj = subject.lower()
-                loadout_entry = loadout_by_subject.get(subj)
-
-                final_json.update(
-                    {
-                        subject: {}
-                    }
-                )
-
-                if loadout_entry is None:
-                    continue
-
-                PlayerInventory = loadout_entry
-
-                if hide_names:
-                    for agent in valoApiAgents.json()["data"]:
-                        if agent["uuid"] == player["CharacterID"]:
-                            final_json[subject].update(
-                                {"Name": agent["displayName"]})
-                else:
-                    final_json[subject].update({"Name": names[subject]})
-
-                final_json[subject].update({"Team": player["TeamID"]})
-
-                final_json[subject].update({"Sprays": {}})
-
-                final_json[subject].update(
-                    {"Level": player["PlayerIdentity"]["AccountLevel"]})
-
-                for title in valoApiTitles.json()["data"]:
-                    if title["uuid"] == player["PlayerIdentity"]["PlayerTitleID"]:
-                        final_json[subject].update(
-                            {"Title": title["titleText"]})
-
-                for PCard in valoApiPlayerCards.json()["data"]:
-                    if PCard["uuid"] == player["PlayerIdentity"]["PlayerCardID"]:
-                        final_json[subject].update(
-                            {"PlayerCard": PCard["largeArt"]})
-
-                for agent in valoApiAgents.json()["data"]:
-                    if agent["uuid"] == player["CharacterID"]:
-                        final_json[subject].update(
-                            {"AgentArtworkName": agent["displayName"] + "Artwork"})
-                        final_json[subject].update(
-                            {"Agent": agent["displayIcon"]})
-
-                spray_selections = [
-                    s for s in PlayerInventory.get("Expressions", {}).get("AESSelections", [])
-                    if s.get("TypeID") == "d5f120f8-ff8c-4aac-92ea-f2b5acbe9475"
-                ]
-                for j, spray in enumerate(spray_selections):
-                    final_json[subject]["Sprays"].update({j: {}})
-                    for sprayValApi in valoApiSprays.json()["data"]:
-                        if spray["AssetID"].lower() == sprayValApi["uuid"].lower():
-                            final_json[subject]["Sprays"][j].update({
-                                "displayName": sprayValApi["displayName"],
-                                "displayIcon": sprayValApi["displayIcon"],
-                                "fullTransparentIcon": sprayValApi["fullTransparentIcon"]
-                            })
-
-                final_json[subject].update({"Weapons": {}})
-
-                for skin in PlayerInventory["Items"]:
-
-                    final_json[subject]["Weapons"].update({skin: {}})
-
-                    for socket in PlayerInventory["Items"][skin]["Sockets"]:
-                        for var_socket in sockets:
-                            if socket == sockets[var_socket]:
-                                final_json[subject]["Weapons"][skin].update(
-                                    {
-                                        var_socket: PlayerInventory["Items"][skin]["Sockets"][socket]["Item"]["ID"]
-                                    }
-                                )
-
-                    for socket in PlayerInventory["Items"][skin]["Sockets"]:
-                        if sockets["skin_buddy"] == socket:
-                            for buddy in valoApiBuddies.json()["data"]:
-                                if buddy["uuid"] == PlayerInventory["Items"][skin]["Sockets"][socket]["Item"]["ID"]:
-                                    final_json[subject]["Weapons"][skin].update(
-                                        {
-                                            "buddy_displayIcon": buddy["displayIcon"]
-                                        }
-                                    )
-
-                    for weapon in valoApiWeapons.json()["data"]:
-                        if skin == weapon["uuid"]:
-                            final_json[subject]["Weapons"][skin].update(
-                                {
-                                    "weapon": weapon["displayName"]
-                                }
-                            )
-                            for skinValApi in weapon["skins"]:
-                                if skinValApi["uuid"] == PlayerInventory["Items"][skin]["Sockets"][sockets["skin"]]["Item"]["ID"]:
-                                    skin_name = skinValApi["displayName"]
-                                    weapon_name = weapon["displayName"]
-
-                                    truncate_skins = True
-                                    if self.config and hasattr(self.config, 'get_feature_flag'):
-                                        truncate_skins = self.config.get_feature_flag("truncate_skins")
+            skin_info = content_index.get_skin(item_sockets[sockets["skin"]]["Item"]["ID"])
+            if skin_info is None:
+                continue
+            weapon_json.update(
+                {"skinDisplayName": skin_info["shortName"] if truncate_skins else skin_info["name"]})
 
-                                    if truncate_skins:
-                                        if skin_name.lower().endswith(" " + weapon_name.lower()):
-                                            skin_name = skin_name[: -len(weapon_name)].rstrip()
-                                        tokens = skin_name.split()
-                                        if tokens:
-                                            first_word = tokens[0]
-                                            numeric_tokens = [t for t in tokens if any(ch.isdigit() for ch in t)]
-                                            if numeric_tokens:
-                                                skin_name_short = f"{first_word} {numeric_tokens[-1]}"
-                                            else:
-                                                skin_name_short = first_word
-                                        else:
-                                            skin_name_short = skin_name
-                                    else:
-                                        skin_name_short = skin_name
-                                    final_json[subject]["Weapons"][skin].update(
-                                        {
-                                            "skinDisplayName": skin_name_short
-                                        }
-                                    )
-                                    for chroma in skinValApi["chromas"]:
-                                        if chroma["uuid"] == PlayerInventory["Items"][skin]["Sockets"][sockets["skin_chroma"]]["Item"]["ID"]:
-                                            if chroma["displayIcon"] != None:
-                                                final_json[subject]["Weapons"][skin].update(
-                                                    {
-                                                        "skinDisplayIcon": chroma["displayIcon"]
-                                                    }
-                                                )
-                                            elif chroma["fullRender"] != None:
-                                                final_json[subject]["Weapons"][skin].update(
-                                                    {
-                                                        "skinDisplayIcon": chroma["fullRender"]
-                                                    }
-                                                )
-                                            elif skinValApi["displayIcon"] != None:
-                                                final_json[subject]["Weapons"][skin].update(
-                                                    {
-                                                        "skinDisplayIcon": skinValApi["displayIcon"]
-                                                    }
-                                                )
-                                            else:
-                                                final_json[subject]["Weapons"][skin].update(
-                                                    {
-                                                        "skinDisplayIcon": skinValApi["levels"][0]["displayIcon"]
-                                                    }
-                                                )
-                                    if skinValApi["displayName"].startswith("Standard") or skinValApi["displayName"].startswith("Melee"):
-                                        final_json[subject]["Weapons"][skin]["skinDisplayIcon"] = weapon["displayIcon"]
+            skin_icon = content_index.get_chroma_icon(item_sockets[sockets["skin_chroma"]]["Item"]["ID"])
+            if skin_icon is None:
+                # standard and melee skins use the weapon icon even without a matching chroma
+                skin_icon = skin_info["displayIcon"]
+            if skin_icon is not None:
+                weapon_json.update({"skinDisplayIcon": skin_icon})
 
-        return final_final_json
+        return player_json
@@ -31,8 +31,11 @@ class TLSAdapter(requests.adapters.HTTPAdapter):
 
 
 class AccountAuth:
-    def __init__(self, log, NUMBERTORANKS):
+    def __init__(self, log, NUMBERTORANKS, static_content, session_for_url):
         self.log = log
+        self.static_content = static_content
+        # pooled sessions of Requests, the sign-in below keeps its own session for the cookies and TLS ciphers
+        self.session_for_url = session_for_url
 
         log("Getting versions from valorant-api.com for account auth-ing")
         version = self.get_current_version()
@@ -58,8 +61,11 @@ class AccountAuth:
         self.region = ""
         self.NUMBERTORANKS = NUMBERTORANKS
 
+    def request(self, method, url, **kwargs):
+        return self.session_for_url(url).request(method, url, **kwargs)
+
     def get_current_version(self):
-        return requests.get("https://valorant-api.com/v1/version").json()["data"]
+        return self.static_content.get("/v1/version")["data"]
 
         
 
@@ -118,9 +124,9 @@ class AccountAuth:
         self.auth_headers.update({
             'Authorization': f"Bearer {access_token}",
             'X-Riot-Entitlements-JWT': entitlements_token})
-        r = requests.put("https://riot-geo.pas.si.riotgames.com/pas/v1/product/valorant", headers={'Authorization': 'Bearer ' + access_token}, json={"id_token": id_token})
+        r = self.request("put", "https://riot-geo.pas.si.riotgames.com/pas/v1/product/valorant", headers={'Authorization': 'Bearer ' + access_token}, json={"id_token": id_token})
         self.region = r.json()["affinities"]["live"]
-        r = requests.post("https://auth.riotgames.com/userinfo", headers={'Authorization': 'Bearer ' + access_token})
+        r = self.request("post", "https://auth.riotgames.com/userinfo", headers={'Authorization': 'Bearer ' + access_token})
         self.lol_region = r.json()["region"]["tag"]
 
         self.puuid = self.session.cookies.get_dict()["sub"]
@@ -133,14 +139,14 @@ class AccountAuth:
     def get_latest_season_id(self):
         self.log("get latest season id")
         if self.content is None:
-            self.content = requests.get(f"https://shared.{self.region}.a.pvp.net/content-service/v3/content", headers=self.auth_headers, verify=False)
+            self.content = self.request("get", f"https://shared.{self.region}.a.pvp.net/content-service/v3/content", headers=self.auth_headers, verify=False)
         for season in self.content.json()["Seasons"]:
             if season["IsActive"]:
                 return season["ID"]
 
     def get_account_data(self):
         #if more advande account data wants to be supported requestsV needs to be edited so it can bue used with custom headers and not lockfile
-        r_mmr = requests.get(f"https://pd.{self.region}.a.pvp.net/mmr/v1/players/{self.puuid}", headers=self.auth_headers, verify=False)
+        r_mmr = self.request("get", f"https://pd.{self.region}.a.pvp.net/mmr/v1/players/{self.puuid}", headers=self.auth_headers, verify=False)
         if r_mmr.json()["QueueSkills"]["competitive"].get("SeasonalInfoBySeasonID") is not None:
             season_info = r_mmr.json()["QueueSkills"]["competitive"]["SeasonalInfoBySeasonID"].get(self.get_latest_season_id())
             if season_info is not None:
@@ -150,14 +156,14 @@ class AccountAuth:
         else:
             rank = 0
         rank = self.escape_ansi(self.NUMBERTORANKS[rank])
-        name = requests.put(f"https://pd.{self.region}.a.pvp.net/name-service/v2/players", headers=self.auth_headers, json=[self.puuid]).json()
+        name = self.request("put", f"https://pd.{self.region}.a.pvp.net/name-service/v2/players", headers=self.auth_headers, json=[self.puuid]).json()
         name = name[0]["GameName"] + "#" + name[0]["TagLine"]
-        r_account_xp = requests.get(f"https://pd.{self.region}.a.pvp.net/account-xp/v1/players/{self.puuid}", headers=self.auth_headers, verify=False)
+        r_account_xp = self.request("get", f"https://pd.{self.region}.a.pvp.net/account-xp/v1/players/{self.puuid}", headers=self.auth_headers, verify=False)
         level = r_account_xp.json()["Progress"]["Level"]
-        contracts = requests.get("https://valorant-api.com/v1/contracts")
-        contracts = [a for a in contracts.json()["data"] if a["content"]["relationType"] == "Season"]
+        contracts = self.static_content.get("/v1/contracts")
+        contracts = [a for a in contracts["data"] if a["content"]["relationType"] == "Season"]
         bp = contracts[-1]
-        r_contracts = requests.get(f"https://pd.{self.region}.a.pvp.net/contracts/v1/contracts/{self.puuid}", headers=self.auth_headers, verify=False)
+        r_contracts = self.request("get", f"https://pd.{self.region}.a.pvp.net/contracts/v1/contracts/{self.puuid}", headers=self.auth_headers, verify=False)
         for contract in r_contracts.json()["Contracts"]:
             if contract["ContractDefinitionID"] == bp["uuid"]:
                 bp_level = contract["ProgressionLevelReached"]
@@ -4,15 +4,24 @@ from InquirerPy import inquirer
 
 
 class AccountManager:
-    def __init__(self, log, AccountConfig, AccountAuth, NUMBERTORANKS):
+    def __init__(self, log, AccountConfig, AccountAuth, NUMBERTORANKS, static_content, session_for_url):
         self.log = log
         self.account_config = AccountConfig(log)
-        self.auth = AccountAuth(log, NUMBERTORANKS)
+        self.AccountAuth = AccountAuth
+        self.NUMBERTORANKS = NUMBERTORANKS
+        self.static_content = static_content
+        self.session_for_url = session_for_url
+        self._auth = None
         self.last_account_data = None
 
         self.log("Account manager initialized")
 
-
+    @property
+    def auth(self):
+        # the auth session (TLS adapter, client version headers) is only needed by the accounts menu
+        if self._auth is None:
+            self._auth = self.AccountAuth(self.log, self.NUMBERTORANKS, self.static_content, self.session_for_url)
+        return self._auth
 
     def menu_change_accounts(self):
         change_accounts_prompt = {
@@ -37,16 +37,11 @@ class Colors:
             Teamcolor = color(orig_name, fore=(221, 224, 41))
         return Teamcolor
 
-    def get_rgb_color_from_skin(self, skin_id, valoApiSkins):
-        json_data = valoApiSkins.json()
-        
-        if "data" not in json_data:
-            self.log("Skins API response missing 'data'.")
+    def get_rgb_color_from_skin(self, skin_id, content_index):
+        skin = content_index.get_skin(skin_id)
+        if skin is None:
             return None
-        
-        for skin in json_data["data"]:
-            if skin_id == skin["uuid"]:
-                return self.tier_dict.get(skin.get('contentTierUuid'))
+        return skin["tierColor"]
 
     def level_to_color(self, level):
         if level >= 400:
@@ -1,10 +1,10 @@
 import json
 from io import TextIOWrapper
 from json import JSONDecodeError
-import requests
 import os
 
 from src.constants import DEFAULT_CONFIG
+from src.logs import DEBUG, INFO
 
 def apply_defaults(cls):
     for name, value in DEFAULT_CONFIG.items():
@@ -13,8 +13,9 @@ def apply_defaults(cls):
 
 @apply_defaults
 class Config:
-    def __init__(self, log):
+    def __init__(self, log, static_content):
         self.log = log
+        self.static_content = static_content
 
         if not os.path.exists("config.json"):
             self.log("config.json not found, creating new one")
@@ -49,7 +50,8 @@ class Config:
             for name, value in config.items():
                 setattr(self, name, value)
 
-            self.log(f"config class dict: {self.__dict__}")
+            self.log.set_level(DEBUG if self.debug_logging else INFO)
+            self.log.debug("config", values=self.__dict__)
 
             self.log(f"got cooldown with value '{self.cooldown}'")
 
@@ -72,7 +74,11 @@ class Config:
         return jsonToWrite
 
     def weapon_check(self, name):
-        if name in [weapon["displayName"] for weapon in requests.get("https://valorant-api.com/v1/weapons").json()["data"]]:
+        weapons = self.static_content.get_cached("/v1/weapons")
+        if weapons is None:
+            # not downloaded yet on a first run, the configured weapon is kept
+            return True
+        if name in [weapon["displayName"] for weapon in weapons["data"]]:
             return True
         else:
             return False
@@ -193,6 +193,11 @@ DEFAULT_CONFIG = {
     "port": 1100,
     "weapon": "Vandal",
     "chat_limit": 5,
+    "pool_size": 10,
+    "max_concurrent_requests": 4,
+    "debug_logging": False,
+    "stats_matches": 5,
+    "stats_request_budget": 30,
     "table": {
         "skin": True,
         "rr": True,
@@ -221,7 +226,10 @@ DEFAULT_CONFIG = {
         "truncate_names": True,
         "truncate_ranks": True,
         "roman_numerals": True,
-        "starting_side": False
+        "starting_side": False,
+        # opt-in: the live table is redrawn in place while rows arrive, which the legacy windows console
+        # shows with flicker and leftover lines, and its columns change width until the lobby is loaded
+        "live_table": False
     }
 }
 
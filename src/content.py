@@ -1,5 +1,3 @@
-import requests
-
 class Content():
     def __init__(self, Requests, log):
         self.Requests = Requests
@@ -28,13 +26,13 @@ class Content():
         return None
 
     def get_all_agents(self):
-        rAgents = requests.get("https://valorant-api.com/v1/agents?isPlayableCharacter=true").json()
+        rAgents = self.Requests.get_static("/v1/agents?isPlayableCharacter=true")
         agent_dict = {}
         agent_dict.update({None: None})
         agent_dict.update({"": ""})
         for agent in rAgents["data"]:
             agent_dict.update({agent['uuid'].lower(): agent['displayName']})
-        self.log(f"retrieved agent dict: {agent_dict}")
+        self.log.debug("content.agents", count=len(agent_dict), agents=agent_dict)
         return agent_dict
 
     def get_all_maps(self):
@@ -42,14 +40,14 @@ class Content():
         Requests data and assets of all maps.
         :return: JSON of all map information.
         """
-        return requests.get("https://valorant-api.com/v1/maps").json()
+        return self.Requests.get_static("/v1/maps")
 
     def get_map_urls(self, maps) -> dict:
         map_dict = {}
         map_dict.update({None: None})
         for Vmap in maps["data"]:
             map_dict.update({Vmap['mapUrl'].lower(): Vmap['displayName']})
-        self.log(f"retrieved map dict: {map_dict}")
+        self.log.debug("content.maps", count=len(map_dict), maps=map_dict)
         return map_dict
 
     def get_map_splashes(self, val_maps) -> dict:
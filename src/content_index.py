@@ -0,0 +1,105 @@
+from src.constants import tierDict
+
+
+def get_short_skin_name(skin_name, weapon_name):
+    # "Prime 2.0 Vandal" -> "Prime 2.0", "Reaver Vandal" -> "Reaver"
+    if weapon_name and skin_name.lower().endswith(" " + weapon_name.lower()):
+        skin_name = skin_name[: -len(weapon_name)].rstrip()
+    tokens = skin_name.split()
+    if not tokens:
+        return skin_name
+    numeric_tokens = [t for t in tokens if any(ch.isdigit() for ch in t)]
+    if numeric_tokens:
+        return f"{tokens[0]} {numeric_tokens[-1]}"
+    return tokens[0]
+
+
+class ContentIndex:
+    """
+    Static content compiled into uuid -> fields lookups, built once per StaticContent build.
+    Every uuid is lowercased, lookups of unknown uuids return None.
+    """
+    def __init__(self, static_content):
+        self.generation = static_content.generation
+        self.weapons = {}
+        self.weapon_by_name = {}
+        self.skins = {}
+        self.chromas = {}
+        self.buddies = {}
+        self.sprays = {}
+        self.titles = {}
+        self.cards = {}
+        self.agents = {}
+
+        for weapon in static_content.get("/v1/weapons")["data"]:
+            weapon_uuid = weapon["uuid"].lower()
+            self.weapons[weapon_uuid] = {"name": weapon["displayName"], "displayIcon": weapon["displayIcon"]}
+            self.weapon_by_name[weapon["displayName"].lower()] = weapon_uuid
+            for skin in weapon["skins"]:
+                self.index_skin(weapon, skin)
+
+        for buddy in static_content.get("/v1/buddies")["data"]:
+            self.buddies[buddy["uuid"].lower()] = buddy["displayIcon"]
+        for spray in static_content.get("/v1/sprays")["data"]:
+            self.sprays[spray["uuid"].lower()] = {
+                "displayName": spray["displayName"],
+                "displayIcon": spray["displayIcon"],
+                "fullTransparentIcon": spray["fullTransparentIcon"],
+            }
+        for title in static_content.get("/v1/playertitles")["data"]:
+            self.titles[title["uuid"].lower()] = title["titleText"]
+        for card in static_content.get("/v1/playercards")["data"]:
+            self.cards[card["uuid"].lower()] = card["largeArt"]
+        for agent in static_content.get("/v1/agents")["data"]:
+            self.agents[agent["uuid"].lower()] = {"name": agent["displayName"], "displayIcon": agent["displayIcon"]}
+
+    def index_skin(self, weapon, skin):
+        skin_uuid = skin["uuid"].lower()
+        # standard and melee skins are shown with the weapon's own icon whatever the chroma
+        default_skin = skin["displayName"].startswith("Standard") or skin["displayName"].startswith("Melee")
+        self.skins[skin_uuid] = {
+            "name": skin["displayName"],
+            "shortName": get_short_skin_name(skin["displayName"], weapon["displayName"]),
+            "tierColor": tierDict.get(skin.get("contentTierUuid")),
+            "weapon": weapon["displayName"],
+            "displayIcon": weapon["displayIcon"] if default_skin else None,
+        }
+        for chroma in skin["chromas"]:
+            if default_skin:
+                icon = weapon["displayIcon"]
+            elif chroma["displayIcon"] is not None:
+                icon = chroma["displayIcon"]
+            elif chroma["fullRender"] is not None:
+                icon = chroma["fullRender"]
+            elif skin["displayIcon"] is not None:
+                icon = skin["displayIcon"]
+            else:
+                icon = skin["levels"][0]["displayIcon"]
+            self.chromas[chroma["uuid"].lower()] = icon
+
+    def get_skin(self, skin_uuid):
+        return self.skins.get(skin_uuid.lower())
+
+    def get_chroma_icon(self, chroma_uuid):
+        return self.chromas.get(chroma_uuid.lower())
+
+    def get_weapon(self, weapon_uuid):
+        return self.weapons.get(weapon_uuid.lower())
+
+    def get_weapon_uuid(self, weapon_name):
+        return self.weapon_by_name.get(weapon_name.lower())
+
+    def get_buddy_icon(self, buddy_uuid):
+        return self.buddies.get(buddy_uuid.lower())
+
+    def get_spray(self, spray_uuid):
+        return self.sprays.get(spray_uuid.lower())
+
+    def get_title(self, title_uuid):
+        return self.titles.get(title_uuid.lower())
+
+    def get_card(self, card_uuid):
+        return self.cards.get(card_uuid.lower())
+
+    def get_agent(self, agent_uuid):
+        return self.agents.get(agent_uuid.lower())
@@ -5,9 +5,10 @@ import os
 
 class Error:
     
-    def __init__(self, log, acc_manager):
+    def __init__(self, log, get_acc_manager=None):
         self.log = log
-        self.acc_manager = acc_manager
+        # the account manager is only built when VALORANT actually has to be started
+        self.get_acc_manager = get_acc_manager
 
     def PortError(self, port):
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -30,7 +31,8 @@ class Error:
             return True
         else:
             self.log("Lockfile does not exist, VALORANT is not open")
-            self.acc_manager.start_valorant()
+            if self.get_acc_manager is not None:
+                self.get_acc_manager().start_valorant()
             
             while not os.path.exists(path):
                 time.sleep(1)
@@ -0,0 +1,95 @@
+import sys
+import threading
+import time
+
+# modules taking less than this (cumulative, in ms) are left out of the printed report, the log gets all of them
+PRINT_THRESHOLD_MS = 5
+
+
+class TimedLoader:
+    """Wraps a module loader and times exec_module, which is where the import actually runs."""
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec):
+        create_module = getattr(self._loader, "create_module", None)
+        return create_module(spec) if create_module is not None else None
+
+    def exec_module(self, module):
+        self._profiler.enter(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.leave(self._name)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class ImportProfiler:
+    """
+    --startup-profile: records self and cumulative import time of every module imported after
+    install(), the same numbers `python -X importtime` prints, but also in the frozen vry.exe.
+    """
+    def __init__(self):
+        # imports running in the startup threads nest independently
+        self.local = threading.local()
+        self.timings = {}
+        self.order = []
+        self.total = 0.0
+
+    @classmethod
+    def install(cls):
+        profiler = cls()
+        sys.meta_path.insert(0, profiler)
+        return profiler
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        # asks the real finders and wraps whatever loader they come up with
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = TimedLoader(spec.loader, self, fullname)
+                return spec
+        return None
+
+    def get_stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def enter(self, name):
+        # [name, started, time spent in nested imports]
+        self.get_stack().append([name, time.perf_counter(), 0.0])
+
+    def leave(self, name):
+        stack = self.get_stack()
+        name, started, children = stack.pop()
+        cumulative = time.perf_counter() - started
+        if stack:
+            stack[-1][2] += cumulative
+        else:
+            self.total += cumulative
+        self.timings[name] = (cumulative - children, cumulative)
+        self.order.append(name)
+
+    def report(self, log):
+        self.uninstall()
+        log(f"startup profile: {len(self.order)} modules imported in {self.total * 1000:.0f}ms")
+        print(f"{'self [ms]':>10} | {'cumulative [ms]':>15} | module")
+        for name in self.order:
+            self_time, cumulative = self.timings[name]
+            log(f"import time: self {self_time * 1000:.1f}ms, cumulative {cumulative * 1000:.1f}ms, {name}")
+            if cumulative * 1000 >= PRINT_THRESHOLD_MS:
+                print(f"{self_time * 1000:>10.1f} | {cumulative * 1000:>15.1f} | {name}")
+        print(f"total: {self.total * 1000:.0f}ms for {len(self.order)} modules")
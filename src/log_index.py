@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+
+# read the log in blocks, markers are near the top so the first scan usually stops after one block
+BLOCK_SIZE = 1024 * 1024
+KEYS = ("version", "pd_shard", "glz")
+# how long wait_for() polls for markers the game hasn't written yet
+WAIT_TIMEOUT = 120
+
+
+class ShooterLogIndex:
+    """
+    Tails ShooterGame.log from the last read byte offset and keeps the values vRY needs from it
+    (client version, pd shard and glz region). The index starts over when the game writes a new log.
+    """
+    def __init__(self, log, path=None):
+        self.log = log
+        self.path = path or os.path.join(os.getenv('LOCALAPPDATA'), R'VALORANT\Saved\Logs\ShooterGame.log')
+        self.lock = threading.Lock()
+        self.signature = None
+        self.offset = 0
+        self.last_stat = None
+        self.values = {}
+
+    def get(self, key):
+        with self.lock:
+            self.refresh()
+            return self.values.get(key)
+
+    def wait_for(self, *keys, timeout=WAIT_TIMEOUT):
+        # polls instead of spinning at EOF while the game hasn't written the markers yet
+        deadline = time.monotonic() + timeout
+        logged = False
+        while True:
+            with self.lock:
+                self.refresh()
+                if all(key in self.values for key in keys):
+                    return {key: self.values[key] for key in keys}
+                missing = [key for key in keys if key not in self.values]
+            if time.monotonic() >= deadline:
+                break
+            if not logged:
+                self.log(f"waiting for {missing} to appear in ShooterGame.log")
+                print("Waiting for VALORANT to write ShooterGame.log...")
+                logged = True
+            time.sleep(1)
+
+        # like the old full scan, a missing log is an error, and so is one that never gets the markers
+        if not os.path.exists(self.path):
+            error = FileNotFoundError(f"ShooterGame.log not found at {self.path}")
+        else:
+            error = TimeoutError(f"{missing} not found in ShooterGame.log after {timeout}s")
+        self.log(str(error))
+        print(error)
+        raise error
+
+    def refresh(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+
+        signature = (stat.st_dev, stat.st_ino)
+        if signature != self.signature or stat.st_size < self.offset:
+            # new or truncated log (game restarted), index it from the beginning
+            self.signature = signature
+            self.offset = 0
+            self.values = {}
+        elif (stat.st_size, stat.st_mtime_ns) == self.last_stat:
+            return
+        self.last_stat = (stat.st_size, stat.st_mtime_ns)
+
+        if all(key in self.values for key in KEYS):
+            return
+
+        with open(self.path, "rb") as file:
+            file.seek(self.offset)
+            while not all(key in self.values for key in KEYS):
+                block = file.read(BLOCK_SIZE)
+                # only whole lines are indexed, a partially written last line is read again next time
+                last_newline = block.rfind(b"\n")
+                if last_newline == -1:
+                    if len(block) == BLOCK_SIZE:
+                        # a single line longer than a block can't hold any of the markers, skip it
+                        self.offset += len(block)
+                        continue
+                    break
+                self.offset += last_newline + 1
+                for line in block[:last_newline].decode("utf8", "replace").splitlines():
+                    self.index_line(line)
+                if len(block) < BLOCK_SIZE:
+                    break
+                file.seek(self.offset)
+
+    def index_line(self, line):
+        if "version" not in self.values and 'CI server version:' in line:
+            version_without_shipping = line.split('CI server version: ')[1].strip()
+            version = version_without_shipping.split("-")
+            version.insert(2, "shipping")
+            self.values["version"] = "-".join(version)
+            self.log(f"got version from logs '{self.values['version']}'")
+        if "pd_shard" not in self.values and '.a.pvp.net/account-xp/v1/' in line:
+            self.values["pd_shard"] = line.split('.a.pvp.net/account-xp/v1/')[0].split('.')[-1]
+        elif "glz" not in self.values and 'https://glz' in line:
+            self.values["glz"] = [(line.split('https://glz-')[1].split(".")[0]),
+                                  (line.split('https://glz-')[1].split(".")[1])]
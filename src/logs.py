@@ -1,35 +1,143 @@
+import atexit
 import glob
 import os
+import queue
+import threading
 import time
 
+# the writer thread flushes at least this often, lines are never more than this late on disk
+FLUSH_INTERVAL = 1
+# a new log-N.txt is started once the current one is this big
+MAX_LOG_BYTES = 5 * 1024 * 1024
+# only the newest log files are kept, older ones are deleted on startup and on rotation
+MAX_LOG_FILES = 20
+
+# record levels, debug records (big payload dumps) are only written when debug_logging is enabled in the config
+DEBUG = 10
+INFO = 20
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO"}
+
+
 class Logging:
-    # logFileOpened is a variable that keeps track of the log file status. 
-    # It is initialized as False to represent the log file wasn't open.
-    def __init__(self):
-        self.logFileOpened = False
+    """
+    Writes log lines to logs/log-N.txt from a background thread. The log file is resolved once,
+    log() only timestamps the line and queues it, the writer flushes periodically and at exit.
+
+    The instance is what gets passed around as `log`: log("message") writes a plain line,
+    log.debug("key", name=value) writes a keyed record that is dropped before any formatting
+    when its level is disabled. Callable values are only called when the record is written.
+    """
+    def __init__(self, directory=None, max_bytes=MAX_LOG_BYTES, max_files=MAX_LOG_FILES, level=INFO):
+        self.logs_directory = directory or os.path.join(os.getcwd(), "logs")
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.level = level
+        self.queue = queue.Queue()
+        self.closed = False
+
+        os.makedirs(self.logs_directory, exist_ok=True)
+        log_file_numbers = self.get_log_file_numbers()
+        self.log_file_number = max(log_file_numbers, default=0) + 1
+        self.log_file = self.open_log_file()
+        self.prune()
+
+        self.writer = threading.Thread(target=self.write_loop, name="log-writer", daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    # `log_string` is a string that is the log message that will be written to the log file.
+    def log(self, log_string: str, level=INFO):
+        if self.closed or level < self.level:
+            return
+        now = time.time()
+        current_time = time.strftime("%Y.%m.%d-%H.%M.%S", time.localtime(now))
+        self.queue.put(f"[{current_time}.{int(now * 1000) % 1000:03d}] {log_string.encode('ascii', 'replace').decode()}\n")
+
+    def __call__(self, log_string: str):
+        self.log(log_string)
+
+    def set_level(self, level):
+        self.level = level
 
-    # `log_string` is a string that is the log message that will be written to the log file. 
-    def log(self, log_string: str):
-        logs_directory = os.getcwd() + "/logs"
+    def is_enabled(self, level):
+        return level >= self.level
 
-        if not os.path.exists(logs_directory):
-            os.mkdir(logs_directory)
-        
-        log_files = glob.glob(r"logs/log-*.txt")
+    def record(self, level, key, **fields):
+        # keyed record, one line: "LEVEL key name=value name=value"
+        if not self.is_enabled(level):
+            return
+        values = " ".join(f"{name}={value() if callable(value) else value}" for name, value in fields.items())
+        self.log(f"{LEVEL_NAMES[level]} {key} {values}".rstrip(), level)
 
+    def debug(self, key, **fields):
+        self.record(DEBUG, key, **fields)
+
+    def info(self, key, **fields):
+        self.record(INFO, key, **fields)
+
+    def get_log_file_numbers(self):
         # The log file numbers are extracted from the filenames
-        log_file_numbers = [int(file[9:-4]) for file in log_files]
-        
-        # If log_file_numbers list is empty, append the value 0 to it.
-        # This ensures that the list always contains at least one value.
-        if not log_file_numbers:
-            log_file_numbers.append(0)
-        
-        log_file_name = f"logs/log-{max(log_file_numbers) + 1 if not self.logFileOpened else max(log_file_numbers)}.txt"
-
-        
-        with open(log_file_name, "a" if self.logFileOpened else "w") as log_file:
-            self.logFileOpened = True
-
-            current_time = time.strftime("%Y.%m.%d-%H.%M.%S", time.localtime(time.time()))
-            log_file.write(f"[{current_time}] {log_string.encode('ascii', 'replace').decode()}\n")
\ No newline at end of file
+        numbers = []
+        for file in glob.glob(os.path.join(self.logs_directory, "log-*.txt")):
+            try:
+                numbers.append(int(os.path.basename(file)[4:-4]))
+            except ValueError:
+                pass
+        return numbers
+
+    def open_log_file(self):
+        return open(os.path.join(self.logs_directory, f"log-{self.log_file_number}.txt"), "w")
+
+    def prune(self):
+        log_file_numbers = sorted(self.get_log_file_numbers())
+        for number in log_file_numbers[:-self.max_files]:
+            try:
+                os.remove(os.path.join(self.logs_directory, f"log-{number}.txt"))
+            except OSError:
+                pass
+
+    def rotate(self):
+        self.log_file.close()
+        self.log_file_number += 1
+        self.log_file = self.open_log_file()
+        self.prune()
+
+    def write_loop(self):
+        while True:
+            try:
+                line = self.queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+            # drain everything that queued up meanwhile, then hit the disk once
+            lines = [line]
+            while True:
+                try:
+                    lines.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in lines
+            self.write(line for line in lines if line is not None)
+            if stop:
+                return
+
+    def write(self, lines):
+        try:
+            self.log_file.writelines(lines)
+            self.log_file.flush()
+            if self.log_file.tell() >= self.max_bytes:
+                self.rotate()
+        except (OSError, ValueError):
+            # logging must never take vRY down, the lines are lost instead
+            pass
+
+    def close(self):
+        # called at exit, and before os._exit() which skips atexit handlers
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.writer.join(timeout=5)
+        try:
+            self.log_file.close()
+        except OSError:
+            pass
@@ -0,0 +1,151 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# finished matches never change, the store only has to be bounded
+MAX_MATCHES = 500
+
+
+def get_endpoint(match_id):
+    return f"/match-details/v1/matches/{match_id}"
+
+
+class RequestBudget:
+    """Number of match-details downloads one refresh may spend on optional matches, reset by every refresh."""
+    def __init__(self, log, limit):
+        self.log = log
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.left = limit
+        self.skipped = 0
+
+    def reset(self):
+        with self.lock:
+            if self.skipped:
+                self.log(f"stats request budget of {self.limit} used up, left out {self.skipped} older matches")
+            self.left = self.limit
+            self.skipped = 0
+
+    def take(self):
+        with self.lock:
+            if self.left <= 0:
+                self.skipped += 1
+                return False
+            self.left -= 1
+            return True
+
+
+class PlayerMatchStats:
+    __slots__ = ("hits", "headshots", "kills", "deaths")
+
+    def __init__(self):
+        self.hits = 0
+        self.headshots = 0
+        self.kills = 0
+        self.deaths = 0
+
+
+class MatchSummary:
+    """What vRY needs of one match-details document: the shooting and kill stats of every subject."""
+    __slots__ = ("match_id", "players")
+
+    def __init__(self, match_id, match_data):
+        self.match_id = match_id
+        self.players = {}
+        # a single pass over the rounds for all subjects at once
+        for rround in match_data.get("roundResults") or ():
+            for player in rround.get("playerStats") or ():
+                stats = self.get_or_add(player["subject"])
+                for hits in player.get("damage") or ():
+                    headshots = hits.get("headshots", 0)
+                    stats.hits += hits.get("legshots", 0) + hits.get("bodyshots", 0) + headshots
+                    stats.headshots += headshots
+        for player in match_data.get("players") or ():
+            stats = self.get_or_add(player["subject"])
+            player_stats = player.get("stats") or {}
+            stats.kills = player_stats.get("kills", 0)
+            stats.deaths = player_stats.get("deaths", 0)
+
+    def get_or_add(self, subject):
+        stats = self.players.get(subject)
+        if stats is None:
+            stats = self.players[subject] = PlayerMatchStats()
+        return stats
+
+    def get(self, subject):
+        return self.players.get(subject)
+
+
+class MatchStore:
+    """
+    MatchSummary by match_id, shared by every refresh and game state. Players who queued together
+    share their matches, each of them is downloaded and scanned once, concurrent callers wait for it.
+    """
+    def __init__(self, Requests, log, max_matches=MAX_MATCHES):
+        self.Requests = Requests
+        self.log = log
+        self.max_matches = max_matches
+        self.lock = threading.Lock()
+        self.matches = OrderedDict()
+        self.inflight = {}
+
+    def get(self, match_id):
+        return self.get_many([match_id]).get(match_id)
+
+    def get_many(self, match_ids, budget=None):
+        # {match_id: MatchSummary or None if it couldn't be fetched}
+        # with a budget, matches that would have to be downloaded are only fetched while it has downloads left,
+        # the ones in Requests' response cache don't cost anything
+        match_ids = list(dict.fromkeys(match_ids))
+        cached = set()
+        if budget is not None:
+            cached = {match_id for match_id in match_ids
+                      if match_id not in self.matches and self.Requests.is_cached("pd", get_endpoint(match_id))}
+        found = {}
+        owned = []
+        waiting = {}
+        with self.lock:
+            for match_id in match_ids:
+                if match_id in self.matches:
+                    self.matches.move_to_end(match_id)
+                    found[match_id] = self.matches[match_id]
+                elif match_id in self.inflight:
+                    waiting[match_id] = self.inflight[match_id]
+                elif budget is not None and match_id not in cached and not budget.take():
+                    continue
+                else:
+                    self.inflight[match_id] = Future()
+                    owned.append(match_id)
+
+        summaries = {}
+        try:
+            responses = self.Requests.fetch_many(
+                [("pd", get_endpoint(match_id), "get") for match_id in owned]
+            )
+            for match_id, response in zip(owned, responses):
+                summaries[match_id] = self.parse(match_id, response)
+        finally:
+            # failed matches aren't stored, the next caller tries again
+            with self.lock:
+                futures = [self.inflight.pop(match_id) for match_id in owned]
+                for match_id in owned:
+                    if summaries.get(match_id) is not None:
+                        self.matches[match_id] = summaries[match_id]
+                while len(self.matches) > self.max_matches:
+                    self.matches.popitem(last=False)
+            for match_id, future in zip(owned, futures):
+                future.set_result(summaries.get(match_id))
+        found.update(summaries)
+
+        for match_id, future in waiting.items():
+            found[match_id] = future.result()
+        return found
+
+    def parse(self, match_id, response):
+        try:
+            if response is None or response.status_code == 404:
+                return None
+            return MatchSummary(match_id, response.json())
+        except Exception as e:
+            self.log(f"Error fetching match details: {e}")
+            return None
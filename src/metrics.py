@@ -0,0 +1,94 @@
+import threading
+import time
+
+from src.rate_limiter import get_endpoint_class
+
+# upper bounds of the latency histogram buckets in milliseconds, the last bucket catches everything slower
+LATENCY_BUCKETS = [50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.cache_hits = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add_latency(self, latency_ms):
+        self.latency_total += latency_ms
+        self.latency_max = max(self.latency_max, latency_ms)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency_ms <= bound:
+                self.histogram[i] += 1
+                return
+        self.histogram[-1] += 1
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "rateLimited": self.rate_limited,
+            "cacheHits": self.cache_hits,
+            "latencyAvgMs": round(self.latency_total / self.requests, 1) if self.requests else 0,
+            "latencyMaxMs": round(self.latency_max, 1),
+            "latencyHistogram": {
+                **{f"<={bound}": count for bound, count in zip(LATENCY_BUCKETS, self.histogram)},
+                f">{LATENCY_BUCKETS[-1]}": self.histogram[-1],
+            },
+        }
+
+
+class Metrics:
+    """Per endpoint class request metrics of one refresh, keyed like 'pd:mmr' or 'glz:core-game'."""
+    def __init__(self, log):
+        self.log = log
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.started = time.time()
+
+    def get(self, url_type, endpoint):
+        key = f"{url_type}:{get_endpoint_class(endpoint)}"
+        metrics = self.endpoints.get(key)
+        if metrics is None:
+            metrics = self.endpoints[key] = EndpointMetrics()
+        return metrics
+
+    def record_request(self, url_type, endpoint, started, response):
+        latency_ms = (time.perf_counter() - started) * 1000
+        with self.lock:
+            metrics = self.get(url_type, endpoint)
+            metrics.requests += 1
+            metrics.add_latency(latency_ms)
+            if response is not None:
+                metrics.bytes += len(response.content)
+                if response.status_code == 429:
+                    metrics.rate_limited += 1
+
+    def record_retry(self, url_type, endpoint):
+        with self.lock:
+            self.get(url_type, endpoint).retries += 1
+
+    def record_cache_hit(self, url_type, endpoint):
+        with self.lock:
+            self.get(url_type, endpoint).cache_hits += 1
+
+    def collect(self):
+        # snapshot of everything since the last collect, logged and then reset for the next refresh
+        with self.lock:
+            endpoints, self.endpoints = self.endpoints, {}
+            started, self.started = self.started, time.time()
+        snapshot = {
+            "time": int(time.time()),
+            "duration": round(time.time() - started, 2),
+            "endpoints": {key: metrics.to_dict() for key, metrics in sorted(endpoints.items())},
+        }
+        for key, metrics in snapshot["endpoints"].items():
+            self.log(f"metrics {key}: requests: {metrics['requests']}, bytes: {metrics['bytes']},"
+                     f" avg: {metrics['latencyAvgMs']}ms, max: {metrics['latencyMaxMs']}ms, retries: {metrics['retries']},"
+                     f" 429s: {metrics['rateLimited']}, cache hits: {metrics['cacheHits']}")
+        return snapshot
@@ -1,40 +1,130 @@
 import json
-import requests
 import os
+import threading
+import time
+from collections import OrderedDict
 from src.constants import hide_names  # import the global flag
 
+# names almost never change, a resolved name is trusted for this long before it is asked for again
+NAME_TTL = 30 * 60
+MAX_NAMES = 500
+
+
+class NameResolver:
+    """
+    puuid -> "GameName#TagLine" cache shared by every refresh and game state. Only unknown puuids are
+    sent to the name service, in one batch, and recent names are kept in %APPDATA%/vry/names.json.
+    Expired names (e.g. loaded after a restart) are still shown right away and revalidated in the background.
+    """
+    def __init__(self, Requests, log, path=None, ttl=NAME_TTL, max_size=MAX_NAMES):
+        self.Requests = Requests
+        self.log = log
+        self.ttl = ttl
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.revalidating = set()
+        if path is None:
+            try:
+                os.mkdir(os.path.join(os.getenv('APPDATA'), "vry"))
+            except FileExistsError:
+                pass
+            path = os.path.join(os.getenv('APPDATA'), "vry/names.json")
+        self.path = path
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                for puuid, (name, fetched_at) in json.load(f).items():
+                    self.cache[puuid] = (name, fetched_at)
+            self.log(f"loaded {len(self.cache)} cached names")
+        except (FileNotFoundError, json.JSONDecodeError, TypeError, ValueError):
+            self.cache = OrderedDict()
+
+    def save(self):
+        try:
+            with open(self.path, "w") as f:
+                json.dump(self.cache, f)
+        except OSError as e:
+            self.log(f"failed saving names cache: {e}")
+
+    def resolve(self, puuids):
+        puuids = list(dict.fromkeys(puuids))
+        now = time.time()
+        with self.lock:
+            misses = [puuid for puuid in puuids if puuid not in self.cache]
+            expired = [puuid for puuid in puuids if puuid in self.cache and puuid not in self.revalidating
+                       and now - self.cache[puuid][1] > self.ttl]
+            self.revalidating.update(expired)
+        # the name service is asked without holding the lock, other lookups go on meanwhile
+        if misses:
+            self.log(f"resolving {len(misses)} of {len(puuids)} names")
+            self.store(self.fetch_names(misses))
+        if expired:
+            threading.Thread(target=self.revalidate, args=(expired,), name="names-revalidate", daemon=True).start()
+        with self.lock:
+            names = {}
+            for puuid in puuids:
+                if puuid in self.cache:
+                    self.cache.move_to_end(puuid)
+                    names[puuid] = self.cache[puuid][0]
+            return names
+
+    def revalidate(self, puuids):
+        try:
+            self.log(f"revalidating {len(puuids)} expired names")
+            self.store(self.fetch_names(puuids))
+        except Exception as e:
+            # the expired names stay in use, they are tried again on the next lookup
+            self.log(f"failed revalidating names: {e}")
+        finally:
+            with self.lock:
+                self.revalidating.difference_update(puuids)
+
+    def store(self, players):
+        now = time.time()
+        with self.lock:
+            for player in players:
+                self.cache[player["Subject"]] = (f"{player['GameName']}#{player['TagLine']}", now)
+                self.cache.move_to_end(player["Subject"])
+            while len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+            self.save()
+
+    def fetch_names(self, puuids):
+        response = self.Requests.fetch("pd", "/name-service/v2/players", "put", json_data=puuids)
+        if 'errorCode' in response.json():
+            self.log(f'{response.json()["errorCode"]}, new token retrieved')
+            self.Requests.get_headers(refresh=True)
+            response = self.Requests.fetch("pd", "/name-service/v2/players", "put", json_data=puuids)
+        return response.json()
+
 
 class Names:
 
-    def __init__(self, Requests, log):
+    def __init__(self, Requests, log, stats):
         self.Requests = Requests
         self.log = log
+        self.stats = stats
+        self.resolver = NameResolver(Requests, log)
 
     def mask_name(self, name):
         # Returns a placeholder if names are to be hidden.
         return "Player"
 
-    def get_stats_data(self):
-        try:
-            with open(os.path.join(os.getenv('APPDATA'), "vry/stats.json"), "r") as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-
     def check_and_update_name(self, puuid, current_name, force_show=False):
         # If force_show is True, ignore any stored value and update with current full name.
         if force_show:
             return current_name
 
-        # Load stats data to get previous names
-        stats_data = self.get_stats_data()
-        
+        # Look up the name this player had the last time we met them
+        old_name = self.stats.get_last_name(puuid)
+
         # If we've seen this player before, compare names.
-        if puuid in stats_data and len(stats_data[puuid]) > 0:
-            # Get the most recent entry for this player
-            latest_entry = stats_data[puuid][-1]
-            old_name = latest_entry.get("name", "")
-            
+        if old_name is not None:
+            old_name = old_name or ""
+
             # Extract the base name if it already has a "(now ...)" format
             if "(now " in old_name:
                 old_name = old_name.split(" (now ")[0]
@@ -61,35 +151,12 @@ class Names:
             return current_name
 
     def get_name_from_puuid(self, puuid, force_show=False):
-        response = requests.put(
-            self.Requests.pd_url + "/name-service/v2/players",
-            headers=self.Requests.get_headers(),
-            json=[puuid],
-            verify=False
-        )
-        full_name = response.json()[0]["GameName"] + "#" + response.json()[0]["TagLine"]
+        full_name = self.resolver.resolve([puuid])[puuid]
         return self.check_and_update_name(puuid, full_name, force_show=force_show)
 
     def get_multiple_names_from_puuid(self, puuids, force_show=False):
-        response = requests.put(
-            self.Requests.pd_url + "/name-service/v2/players",
-            headers=self.Requests.get_headers(),
-            json=puuids,
-            verify=False
-        )
-        if 'errorCode' in response.json():
-            self.log(f'{response.json()["errorCode"]}, new token retrieved')
-            response = requests.put(
-                self.Requests.pd_url + "/name-service/v2/players",
-                headers=self.Requests.get_headers(refresh=True),
-                json=puuids,
-                verify=False
-            )
-
         name_dict = {}
-        for player in response.json():
-            puuid = player["Subject"]
-            full_name = f"{player['GameName']}#{player['TagLine']}"
+        for puuid, full_name in self.resolver.resolve(puuids).items():
             name_dict[puuid] = self.check_and_update_name(puuid, full_name, force_show=force_show)
         return name_dict
 
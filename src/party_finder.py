@@ -1,5 +1,4 @@
 import time
-from collections import defaultdict
 import itertools
 
 # Define a list of distinct hex colors suitable for Rich console
@@ -18,42 +17,30 @@ PARTY_COLORS = [
     "#9B59B6",  # Amethyst Purple
 ]
 
-def get_recent_match_history(puuid, Requests_obj, log_func, retries=2, backoff_factor=1):
-    """Fetches the last 5 match IDs for a given PUUID from any queue via competitiveupdates endpoint."""
+def get_match_history_endpoint(puuid):
     # Use competitiveupdates endpoint, request last 5, NO queue filter
-    endpoint = f"/mmr/v1/players/{puuid}/competitiveupdates?startIndex=0&endIndex=4"
-    for attempt in range(retries + 1):
-        try:
-            response = Requests_obj.fetch('pd', endpoint, 'get', rate_limit_seconds=1)
-            
-            if response.ok:
-                matches_data = response.json()
-                matches = matches_data.get("Matches", [])
-                if not matches:
-                    log_func(f"Empty match history found for {puuid} via competitiveupdates")
-                    return set()
-                    
-                match_ids = {match.get("MatchID") for match in matches if match.get("MatchID")}
-                log_func(f"Fetched {len(match_ids)} match IDs for {puuid} via competitiveupdates")
-                return match_ids
-                
-            elif response.status_code == 404:
-                log_func(f"Match history not found (404) for {puuid} via competitiveupdates")
-                return set()
-            elif response.status_code == 429:
-                wait_time = backoff_factor * (2 ** attempt)
-                log_func(f"Rate limited (429) fetching match history for {puuid}. Retrying in {wait_time}s...")
-                time.sleep(wait_time)
-            else:
-                log_func(f"Error fetching match history for {puuid}: Status {response.status_code}, Response: {response.text}")
-                return set()
-        except Exception as e:
-            log_func(f"Exception fetching match history for {puuid}: {e}")
-            if attempt == retries:
-                return set()
-            wait_time = backoff_factor * (2 ** attempt)
-            log_func(f"Retrying fetch for {puuid} in {wait_time}s...")
-            time.sleep(wait_time)
+    return f"/mmr/v1/players/{puuid}/competitiveupdates?startIndex=0&endIndex=4"
+
+def parse_match_history(puuid, response, log_func):
+    """Turns a competitiveupdates response into a set of match IDs."""
+    if response.ok:
+        matches_data = response.json()
+        matches = matches_data.get("Matches", [])
+        if not matches:
+            log_func(f"Empty match history found for {puuid} via competitiveupdates")
+            return set()
+
+        match_ids = {match.get("MatchID") for match in matches if match.get("MatchID")}
+        log_func(f"Fetched {len(match_ids)} match IDs for {puuid} via competitiveupdates")
+        return match_ids
+
+    elif response.status_code == 404:
+        log_func(f"Match history not found (404) for {puuid} via competitiveupdates")
+    elif response.status_code == 429:
+        # Requests already waited and retried through the shared rate limiter
+        log_func(f"Rate limited (429) fetching match history for {puuid}, retry budget exhausted")
+    else:
+        log_func(f"Error fetching match history for {puuid}: Status {response.status_code}, Response: {response.text}")
     return set()
 
 def find_parties(puuids: list[str], Requests_obj, log_func, current_teams: dict[str, str] | None = None) -> dict[str, tuple[str, str]]:
@@ -80,14 +67,24 @@ def find_parties(puuids: list[str], Requests_obj, log_func, current_teams: dict[
     color_iterator = itertools.cycle(PARTY_COLORS)
 
     log_func(f"Fetching recent match history for {len(puuids)} players...")
-    for puuid in puuids:
-        if puuid not in match_history_cache:
-            # Use the updated history function
-            match_history_cache[puuid] = get_recent_match_history(puuid, Requests_obj, log_func)
-            time.sleep(0.1) 
+    unique_puuids = list(dict.fromkeys(puuids))
+    responses = Requests_obj.fetch_many(
+        [("pd", get_match_history_endpoint(puuid), "get") for puuid in unique_puuids],
+        rate_limit_seconds=1,
+    )
+    for puuid, response in zip(unique_puuids, responses):
+        if response is None:
+            # already logged by fetch_many
+            match_history_cache[puuid] = set()
+            continue
+        try:
+            match_history_cache[puuid] = parse_match_history(puuid, response, log_func)
+        except Exception as e:
+            log_func(f"Exception fetching match history for {puuid}: {e}")
+            match_history_cache[puuid] = set()
 
     log_func("Finished fetching history. Identifying parties...")
-    log_func(f"Match History Cache Contents: {match_history_cache}") 
+    log_func.debug("party_finder.history_cache", players=len(match_history_cache), cache=match_history_cache)
 
     sorted_puuids = sorted(puuids)
 
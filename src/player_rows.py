@@ -0,0 +1,464 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from colr import color
+
+from src.constants import PARTYICONLIST, format_rank_with_square
+
+STAGES = ("fetch", "derive", "render", "publish")
+
+# what differs between the scoreboards of the three game states, everything else is shared
+STATE_OPTIONS = {
+    "INGAME": {"team_gaps": True, "skins": True, "encounters": True, "party_blocks": False, "split_cells": True},
+    "PREGAME": {"team_gaps": False, "skins": False, "encounters": False, "party_blocks": True, "split_cells": True},
+    "MENUS": {"team_gaps": False, "skins": False, "encounters": False, "party_blocks": False, "split_cells": False},
+}
+
+
+def is_na(value):
+    return str(value).strip().lower() in ("n/a", "na", "none", "")
+
+
+class Lobby:
+    """The players of one scoreboard refresh plus what the state already fetched for them."""
+    def __init__(self, state, players, names, party_assignments=None, party=None, party_members=(),
+                 team_id=None, match_id=None, loadouts=None, loadouts_data=None):
+        self.state = state
+        self.options = STATE_OPTIONS[state]
+        # party members of the menu lobby can show up twice
+        self.players = list({player["Subject"]: player for player in players}.values())
+        self.names = names
+        self.party_assignments = party_assignments or {}
+        # {party id: [puuids]} of the game party api, used for the premade blocks in agent select
+        self.party = party or {}
+        self.party_icons = {}
+        # premade blocks are picked by how many party members came before, like the old agent select loop did
+        self.party_count = 0
+        self.party_members = list(party_members)
+        # agent select only knows the ally team
+        self.team_id = team_id
+        self.match_id = match_id
+        self.loadouts = loadouts or {}
+        self.loadouts_data = loadouts_data or {"Players": {}}
+
+        self.encounters = {}
+        self.rows = []
+        self.already_played_with = []
+        self.match_encounters = {}
+        self.is_leaderboard_needed = False
+        self.is_range = False
+
+
+class PlayerRow:
+    def __init__(self, player):
+        self.player = player
+        self.subject = player["Subject"]
+        self.mmr = None
+        self.rank = None
+        self.previous_rank = None
+        self.stats = None
+        self.party_icon = ""
+        self.party_number = 0
+        self.rank_name = ""
+        self.peak_rank = ""
+        self.peak_rank_act = ""
+        self.previous_rank_name = ""
+        self.encounter = None
+        self.index = None
+        self.cells = None
+
+
+class PlayerRowPipeline:
+    """
+    Builds the scoreboard rows of every game state in four stages: fetch (every player concurrently),
+    derive (rank strings, party, encounters), render (table cells) and publish (heartbeat, rpc, stats).
+    Derive, render and publish run on the calling thread for each player as soon as it was fetched.
+    The rank and match caches behind fetch are shared by all states, so players carried over from
+    agent select or the menu lobby are not downloaded again.
+    """
+    def __init__(self, Requests, log, cfg, rank, pstats, stats, colors, table, Server, agent_dict, season_ids,
+                 hide_levels, rpc=None, current_map=None):
+        self.Requests = Requests
+        self.Server = Server
+        self.log = log
+        self.cfg = cfg
+        self.rank = rank
+        self.pstats = pstats
+        self.stats = stats
+        self.colors = colors
+        self.table = table
+        self.agent_dict = agent_dict
+        self.season_id, self.previous_season_id = season_ids
+        self.hide_levels = hide_levels
+        self.rpc = rpc
+        self.current_map = current_map
+        # one worker per player of a full lobby, the requests themselves are bounded per url type by Requests
+        self.executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="vry-rows")
+        self.timings = {}
+
+    def run(self, lobby, heartbeat, status=None, on_update=None, live=False):
+        # live: the companion gets every player as a heartbeat delta instead of waiting for the whole lobby
+        self.timings = {stage: 0.0 for stage in STAGES}
+        started = time.perf_counter()
+        first_row = None
+        if live:
+            self.Server.send_payload("heartbeat", heartbeat)
+
+        self.sort(lobby)
+        if lobby.options["encounters"]:
+            lobby.encounters = self.stats.get_encounters([player["Subject"] for player in lobby.players],
+                                                         exclude_match_id=lobby.match_id)
+        # placeholders in the final order, rows are filled in whatever order the players arrive
+        last_team = None
+        for player in lobby.players:
+            row = PlayerRow(player)
+            self.derive_party(lobby, row)
+            if lobby.options["team_gaps"] and last_team is not None and last_team != player["TeamID"]:
+                self.table.add_empty_row()
+            last_team = player.get("TeamID")
+            row.index = self.table.add_row_table(self.render_placeholder(lobby, row))
+            lobby.rows.append(row)
+        if on_update is not None:
+            on_update(lobby)
+
+        futures = {self.executor.submit(self.fetch, row.subject): row for row in lobby.rows}
+        arrived = as_completed(futures)
+        for loaded in range(1, len(futures) + 1):
+            with self.timed("fetch"):
+                future = next(arrived)
+            row = futures[future]
+            row.mmr, row.stats = future.result()
+            with self.timed("derive"):
+                self.derive(lobby, row)
+            with self.timed("render"):
+                row.cells = self.render(lobby, row)
+                self.table.set_row_table(row.index, row.cells)
+            with self.timed("publish"):
+                self.publish(lobby, row, heartbeat, live)
+            if first_row is None:
+                first_row = time.perf_counter() - started
+            if status is not None:
+                status.update(f"Loading players... [{loaded}/{len(futures)}]")
+            if on_update is not None:
+                on_update(lobby)
+
+        lobby.already_played_with = [row.encounter for row in lobby.rows if row.encounter is not None]
+        if lobby.options["encounters"]:
+            with self.timed("publish"):
+                # one write for the whole lobby
+                self.stats.save_data(lobby.match_encounters)
+        self.log(f"player rows {lobby.state}: {len(lobby.rows)} players, first row after "
+                 f"{(first_row or 0) * 1000:.0f}ms, all after {(time.perf_counter() - started) * 1000:.0f}ms, "
+                 + ", ".join(f"{stage} {self.timings[stage] * 1000:.0f}ms" for stage in STAGES))
+        return lobby
+
+    def timed(self, stage):
+        return StageTimer(self.timings, stage)
+
+    # fetch
+
+    def fetch(self, puuid):
+        # runs on the row executor, derive builds both ranks from the returned PlayerMMR
+        return self.rank.get_mmr(puuid), self.pstats.get_stats(puuid)
+
+    def sort(self, lobby):
+        lobby.players.sort(key=lambda player: player["PlayerIdentity"].get("AccountLevel"), reverse=True)
+        if lobby.options["team_gaps"]:
+            lobby.players.sort(key=lambda player: player["TeamID"], reverse=True)
+
+    # derive
+
+    def derive(self, lobby, row):
+        row.rank = self.rank.get_rank_from_mmr(row.mmr, self.season_id)
+        row.previous_rank = self.rank.get_rank_from_mmr(row.mmr, self.previous_season_id)
+
+        player_rank = row.rank
+        # short peak rank string
+        has_letter = any(c.isalpha() for c in str(player_rank["peakrankep"]))
+        row.peak_rank_act = (
+            f" ({player_rank['peakrankep']}a{player_rank['peakrankact']})"
+            if has_letter
+            else f" (e{player_rank['peakrankep']}a{player_rank['peakrankact']})"
+        )
+        if not self.cfg.get_feature_flag("peak_rank_act"):
+            row.peak_rank_act = ""
+        if player_rank["peakrank"] == 0:
+            # Unrated peak: no act suffix
+            row.peak_rank = format_rank_with_square(0, 0, is_peak_rank=True, config=self.cfg)
+            row.peak_rank_act = ""
+        else:
+            row.peak_rank = format_rank_with_square(player_rank["peakrank"], 0, is_peak_rank=True,
+                                                    config=self.cfg) + row.peak_rank_act
+        row.rank_name = format_rank_with_square(player_rank["rank"], player_rank["rr"], config=self.cfg)
+        row.previous_rank_name = format_rank_with_square(row.previous_rank["rank"], 0, config=self.cfg)
+
+        # Only show leaderboard position for ranks below Immortal (rank 24+)
+        if int(player_rank["leaderboard"]) > 0 and player_rank["rank"] < 24:
+            lobby.is_leaderboard_needed = True
+
+        if lobby.options["encounters"]:
+            self.derive_encounter(lobby, row)
+
+    def derive_party(self, lobby, row):
+        # only depends on the lobby, so it's known before any player was fetched
+        if lobby.options["party_blocks"]:
+            self.derive_party_blocks(lobby, row)
+        else:
+            self.derive_party_number(lobby, row)
+
+    def derive_party_number(self, lobby, row):
+        # party numbers from party_finder
+        assignment = lobby.party_assignments.get(row.subject)
+        if assignment:
+            number_str, color_hex = assignment
+            row.party_icon = f"[{color_hex}]{number_str}[/]"
+            try:
+                row.party_number = int(number_str)
+            except (ValueError, AttributeError):
+                row.party_number = 0
+
+    def derive_party_blocks(self, lobby, row):
+        # numbers (colorblind) when party_finder+party_colorblind, else blocks from the game party api
+        if self.cfg.get_feature_flag("party_finder") and self.cfg.get_feature_flag("party_colorblind"):
+            self.derive_party_number(lobby, row)
+            return
+        for party in lobby.party:
+            if row.subject in lobby.party[party]:
+                if party not in lobby.party_icons:
+                    lobby.party_icons[party] = PARTYICONLIST[min(lobby.party_count, len(PARTYICONLIST) - 1)]
+                row.party_icon = lobby.party_icons[party]
+                row.party_number = PARTYICONLIST.index(row.party_icon) + 1
+                lobby.party_count += 1
+
+    def derive_encounter(self, lobby, row):
+        player = row.player
+        if row.subject not in lobby.encounters or row.subject == self.Requests.puuid \
+                or row.subject in lobby.party_members:
+            return
+        # last match played together before this one
+        last = lobby.encounters[row.subject]["last"]
+        if not player["PlayerIdentity"]["Incognito"] or not self.colors.hide_names:
+            # Check if the name has changed since last played
+            current_name = lobby.names[row.subject]
+            if current_name != last["name"]:
+                display_name = f"{last['name']} (now {current_name})"
+            else:
+                display_name = last["name"]
+        else:
+            team_string = "your" if player["TeamID"] == self.get_ally_team(lobby) else "enemy"
+            display_name = f"{self.agent_dict.get(player['CharacterID'].lower(), 'Unknown')} on {team_string} team"
+        row.encounter = (
+            {
+                "times": lobby.encounters[row.subject]["times"],
+                "name": display_name,
+                "agent": last["agent"],
+                "time_diff": time.time() - last["epoch"],
+            }
+        )
+
+    def get_ally_team(self, lobby):
+        for player in lobby.players:
+            if player["Subject"] == self.Requests.puuid:
+                return player["TeamID"]
+        return None
+
+    # render
+
+    def render(self, lobby, row):
+        player_rank = row.rank
+        split_cells = lobby.options["split_cells"]
+        dash = color("-", fore=(46, 46, 46))
+
+        hs = row.stats["hs"]
+        hs_cell = self.table.make_center_cell(self.colors.get_hs_gradient(hs) if not is_na(hs) else dash)
+
+        rr_numeric_value = row.stats["RankedRatingEarned"]
+        afk_penalty = row.stats["AFKPenalty"]
+        # ΔRR cell: center dash when N/A or 0 (0)
+        try:
+            earned_rr_is_dash = int(rr_numeric_value) == 0 and int(afk_penalty) == 0
+        except (ValueError, TypeError):
+            earned_rr_is_dash = is_na(rr_numeric_value) and is_na(afk_penalty)
+        if earned_rr_is_dash:
+            earned_rr_cell = self.table.make_center_cell(dash)
+        else:
+            earned_rr_cell = self.colors.get_rr_gradient(rr_numeric_value, afk_penalty)
+
+        rr = player_rank["rr"]
+        rank_name = row.rank_name
+        if self.cfg.get_feature_flag("aggregate_rank_rr") and player_rank["rank"] != 0:
+            # left part: rank label without trailing RR
+            rank_cell = self.table.make_split_cell(rank_name.rsplit("(", 1)[0].rstrip(), f"({rr})")
+        elif split_cells and player_rank["rank"] == 0:
+            # Left-align Unrated by using split cell with empty right part
+            rank_cell = self.table.make_split_cell(rank_name, "")
+        else:
+            rank_cell = rank_name
+
+        peak_rank = row.peak_rank
+        if self.cfg.get_feature_flag("peak_rank_act") and player_rank["peakrank"] != 0 and row.peak_rank_act:
+            # split left label and right act code
+            peak_cell = self.table.make_split_cell(peak_rank.rsplit("(", 1)[0].rstrip(), peak_rank[peak_rank.rfind("("):])
+        elif split_cells and player_rank["peakrank"] == 0:
+            peak_cell = self.table.make_split_cell(peak_rank, "")
+        else:
+            peak_cell = peak_rank
+
+        if split_cells:
+            # WR: left winrate, right games in parentheses
+            if is_na(player_rank["wr"]):
+                wr_cell = self.table.make_center_cell(dash)
+            else:
+                games = player_rank["numberofgames"]
+                wr_cell = self.table.make_split_cell(self.colors.get_wr_gradient(player_rank["wr"]),
+                                                     f"({games})" if str(games).isdigit() else "")
+            # RR: left RR, no right part; '-' if not available
+            rr_cell = self.table.make_center_cell(dash) if is_na(rr) else self.table.make_split_cell(str(rr), "")
+        else:
+            wr_cell = self.colors.get_wr_gradient(player_rank["wr"]) + f" ({player_rank['numberofgames']})"
+            rr_cell = rr
+
+        return [
+            row.party_icon,
+            self.render_agent(lobby, row),
+            self.render_name(lobby, row),
+            lobby.loadouts.get(row.subject, "") if lobby.options["skins"] else "",
+            rank_cell,
+            rr_cell,
+            peak_cell,
+            row.previous_rank_name,
+            player_rank["leaderboard"],
+            hs_cell,
+            wr_cell,
+            row.stats["kd"],
+            self.render_level(lobby, row),
+            earned_rr_cell,
+        ]
+
+    def render_placeholder(self, lobby, row):
+        # everything the lobby already knows, the rest is filled in once the player has been fetched
+        loading = color("…", fore=(46, 46, 46))
+        return [
+            row.party_icon,
+            self.render_agent(lobby, row),
+            self.render_name(lobby, row),
+            lobby.loadouts.get(row.subject, "") if lobby.options["skins"] else "",
+            loading,
+            loading,
+            loading,
+            loading,
+            "",
+            loading,
+            loading,
+            loading,
+            self.render_level(lobby, row),
+            loading,
+        ]
+
+    def render_agent(self, lobby, row):
+        player = row.player
+        if lobby.state == "INGAME":
+            agent = self.colors.get_agent_from_uuid(player["CharacterID"].lower())
+            if agent == "" and len(lobby.players) == 1:
+                lobby.is_range = True
+            return agent
+        if lobby.state == "PREGAME":
+            agent_name = self.agent_dict.get(player["CharacterID"].lower(), "Unknown")
+            if player["CharacterSelectionState"] == "locked":
+                return color(agent_name, fore=(255, 255, 255))
+            elif player["CharacterSelectionState"] == "selected":
+                return color(agent_name, fore=(128, 128, 128))
+            return color(agent_name, fore=(54, 53, 51))
+        return ""
+
+    def render_name(self, lobby, row):
+        player = row.player
+        if lobby.state == "MENUS":
+            return color(lobby.names[row.subject], fore=(76, 151, 237))
+        return self.colors.get_color_from_team(
+            player["TeamID"] if lobby.state == "INGAME" else lobby.team_id,
+            lobby.names[row.subject],
+            row.subject,
+            self.Requests.puuid,
+            agent=player["CharacterID"] if player["PlayerIdentity"]["Incognito"] else None,
+            party_members=lobby.party_members,
+        )
+
+    def render_level(self, lobby, row):
+        identity = row.player["PlayerIdentity"]
+        player_level = identity.get("AccountLevel")
+        if lobby.state != "MENUS" and identity["HideAccountLevel"] and not (
+            row.subject == self.Requests.puuid
+            or row.subject in lobby.party_members
+            or self.hide_levels == False
+        ):
+            return ""
+        return self.colors.level_to_color(player_level)
+
+    # publish
+
+    def publish(self, lobby, row, heartbeat, live=False):
+        player = row.player
+        player_rank = row.rank
+        if row.subject == self.Requests.puuid and self.cfg.get_feature_flag("discord_rpc"):
+            self.rpc.set_data(
+                {
+                    "rank": player_rank["rank"],
+                    "rank_name": self.colors.escape_ansi(row.rank_name) + " | " + str(player_rank["rr"]) + "rr",
+                }
+            )
+
+        player_heartbeat = {
+            "name": lobby.names[row.subject],
+            "rank": player_rank["rank"],
+            "peakRank": player_rank["peakrank"],
+            "peakRankAct": row.peak_rank_act,
+            "level": player["PlayerIdentity"].get("AccountLevel"),
+            "rr": player_rank["rr"],
+            "kd": row.stats["kd"],
+            "headshotPercentage": row.stats["hs"],
+            "winPercentage": f"{player_rank['wr']} ({player_rank['numberofgames']})",
+        }
+        if lobby.state != "MENUS":
+            player_heartbeat["partyNumber"] = row.party_number if row.party_icon != "" else 0
+            player_heartbeat["agent"] = self.agent_dict.get(player["CharacterID"].lower(), "Unknown")
+        if lobby.state == "INGAME":
+            loadout = lobby.loadouts_data["Players"].get(row.subject, {})
+            player_heartbeat["puuid"] = row.subject
+            player_heartbeat["agentImgLink"] = loadout.get("Agent", None)
+            player_heartbeat["team"] = loadout.get("Team", None)
+            player_heartbeat["sprays"] = loadout.get("Sprays", None)
+            player_heartbeat["title"] = loadout.get("Title", None)
+            player_heartbeat["playerCard"] = loadout.get("PlayerCard", None)
+            player_heartbeat["weapons"] = loadout.get("Weapons", None)
+        heartbeat["players"][row.subject] = player_heartbeat
+        if live:
+            self.Server.send_payload_delta("heartbeat", heartbeat, {
+                "time": heartbeat["time"],
+                "state": heartbeat["state"],
+                "players": {row.subject: player_heartbeat},
+            })
+
+        if lobby.options["encounters"]:
+            lobby.match_encounters[row.subject] = {
+                "name": lobby.names[row.subject],
+                "agent": self.agent_dict.get(player["CharacterID"].lower(), "Unknown"),
+                "map": self.current_map,
+                "rank": player_rank["rank"],
+                "rr": player_rank["rr"],
+                "match_id": lobby.match_id,
+                "epoch": time.time(),
+            }
+
+
+class StageTimer:
+    def __init__(self, timings, stage):
+        self.timings = timings
+        self.stage = stage
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timings[self.stage] += time.perf_counter() - self.started
@@ -1,100 +1,109 @@
+from src.match_store import PlayerMatchStats, RequestBudget
+
+
+# competitiveupdates returns at most this many matches per request
+MAX_STATS_MATCHES = 20
+
+
 class PlayerStats:
-    def __init__(self, Requests, log, config):
+    def __init__(self, Requests, log, config, matches):
         self.Requests = Requests
         self.log = log
         self.config = config
+        # shared MatchStore, every match is downloaded and scanned once for all of its players
+        self.matches = matches
+        self.window = max(1, min(int(getattr(config, "stats_matches", 1)), MAX_STATS_MATCHES))
+        self.budget = RequestBudget(log, getattr(config, "stats_request_budget", 0))
+
+    def new_refresh(self):
+        self.budget.reset()
+
+    def invalidate(self, puuids):
+        # a finished match is new in the players' history, the finished matches themselves never change
+        for puuid in puuids:
+            self.Requests.invalidate_cached("pd", f"/mmr/v1/players/{puuid}/competitiveupdates", prefix=True)
 
     def get_stats(self, puuid):
+        return self.get_many_stats([puuid])[puuid]
+
+    def get_many_stats(self, puuids):
+        puuids = list(dict.fromkeys(puuids))
+
         # Early exit if no stats are required
         if not self.config.get_table_flag(
             "headshot_percent"
         ) and not self.config.get_table_flag("kd"):
-            return {
-                "kd": "N/A",
-                "hs": "N/A",
-                "RankedRatingEarned": "N/A",
-                "AFKPenalty": "N/A",
-            }
-
-        # Fetch competitive updates
-        try:
-            response = self.Requests.fetch(
-                "pd",
-                f"/mmr/v1/players/{puuid}/competitiveupdates?startIndex=0&endIndex=1&queue=competitive",
-                "get",
-            )
-            matches = response.json().get("Matches", [])
-            if not matches:
-                return {
-                    "kd": "N/A",
-                    "hs": "N/A",
-                    "RankedRatingEarned": "N/A",
-                    "AFKPenalty": "N/A",
-                }
-        except Exception as e:
-            self.log(f"Error fetching competitive updates: {e}")
-            return {
-                "kd": "N/A",
-                "hs": "N/A",
-                "RankedRatingEarned": "N/A",
-                "AFKPenalty": "N/A",
-            }
-
-        match_id = matches[0].get("MatchID")
-        try:
-            match_response = self.Requests.fetch(
-                "pd",
-                f"/match-details/v1/matches/{match_id}",
-                "get",
-            )
-            if match_response.status_code == 404:
-                return {
-                    "kd": "N/A",
-                    "hs": "N/A",
-                    "RankedRatingEarned": "N/A",
-                    "AFKPenalty": "N/A",
-                }
-
-            match_data = match_response.json()
-        except Exception as e:
-            self.log(f"Error fetching match details: {e}")
-            return {
-                "kd": "N/A",
-                "hs": "N/A",
-                "RankedRatingEarned": "N/A",
-                "AFKPenalty": "N/A",
-            }
-
-        return self._process_match_data(puuid, match_data, matches[0])
-
-    def _process_match_data(self, puuid, match_data, match_summary):
-        total_hits, total_headshots, kills, deaths = 0, 0, 0, 0
+            return {puuid: self._empty_stats() for puuid in puuids}
+
+        stats = {}
+        recent_matches = {}
+
+        # Fetch competitive updates of the whole lobby at once
+        responses = self.Requests.fetch_many(
+            [
+                (
+                    "pd",
+                    f"/mmr/v1/players/{puuid}/competitiveupdates?startIndex=0&endIndex={self.window}&queue=competitive",
+                    "get",
+                )
+                for puuid in puuids
+            ]
+        )
+        for puuid, response in zip(puuids, responses):
+            try:
+                matches = response.json().get("Matches", [])
+            except Exception as e:
+                self.log(f"Error fetching competitive updates: {e}")
+                matches = []
+            if matches:
+                recent_matches[puuid] = matches[:self.window]
+            else:
+                stats[puuid] = self._empty_stats()
+
+        # Players who queued together share their matches, the store downloads each one only once.
+        # The last match of every player is always fetched, older ones only while the refresh has budget left
+        match_data = self.matches.get_many([matches[0].get("MatchID") for matches in recent_matches.values()])
+        match_data.update(self.matches.get_many(
+            [match.get("MatchID") for matches in recent_matches.values() for match in matches[1:]],
+            budget=self.budget,
+        ))
+
+        for puuid, matches in recent_matches.items():
+            stats[puuid] = self._process_match_data(puuid, matches, match_data)
+        return stats
+
+    def _empty_stats(self):
+        return {
+            "kd": "N/A",
+            "hs": "N/A",
+            "RankedRatingEarned": "N/A",
+            "AFKPenalty": "N/A",
+        }
 
-        # Extract round stats
-        for rround in match_data.get("roundResults", []):
-            for player in rround.get("playerStats", []):
-                if player["subject"] == puuid:
-                    for hits in player.get("damage", []):
-                        total_hits += (
-                            hits.get("legshots", 0)
-                            + hits.get("bodyshots", 0)
-                            + hits.get("headshots", 0)
-                        )
-                        total_headshots += hits.get("headshots", 0)
-
-        # Extract overall player stats
-        for player in match_data.get("players", []):
-            if player["subject"] == puuid:
-                kills = player["stats"].get("kills", 0)
-                deaths = player["stats"].get("deaths", 0)
-                break
+    def _process_match_data(self, puuid, matches, match_data):
+        # matches: the competitive updates of the window, newest first
+        if match_data.get(matches[0].get("MatchID")) is None:
+            return self._empty_stats()
+
+        total_hits, total_headshots, kills, deaths = 0, 0, 0, 0
+        ranked_rating_earned, afk_penalty = 0, 0
+        for match_summary in matches:
+            data = match_data.get(match_summary.get("MatchID"))
+            if data is None:
+                # left out by the request budget (or failed), the window just gets shorter for all four stats
+                continue
+            ranked_rating_earned += match_summary.get("RankedRatingEarned") or 0
+            afk_penalty += match_summary.get("AFKPenalty") or 0
+
+            player = data.get(puuid) or PlayerMatchStats()
+            total_hits += player.hits
+            total_headshots += player.headshots
+            kills += player.kills
+            deaths += player.deaths
 
         # Calculate KD
         kd = round(kills / deaths, 2) if deaths else kills
 
-        ranked_rating_earned = match_summary["RankedRatingEarned"]
-        afk_penalty = match_summary["AFKPenalty"]
-
         # Compile final stats
         final_stats = {
             "kd": kd,
@@ -106,19 +115,24 @@ class PlayerStats:
 
 
 if __name__ == "__main__":
-    from constants import version
-    from requestsV import Requests
-    from logs import Logging
-    from errors import Error
+    # python -m src.player_stats, with VALORANT running
+    from src.config import Config
+    from src.constants import version
+    from src.requestsV import Requests
+    from src.logs import Logging
+    from src.errors import Error
+    from src.match_store import MatchStore
     import urllib3
 
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
     Logging = Logging()
-    log = Logging.log
+    log = Logging
     ErrorSRC = Error(log)
     Requests = Requests(version, log, ErrorSRC)
 
-    player_stats = PlayerStats(Requests, log, "a")
+    cfg = Config(log, Requests.static_content)
+    player_stats = PlayerStats(Requests, log, cfg, MatchStore(Requests, log))
     result = player_stats.get_stats("963ad672-61e1-537e-8449-06ece1a5ceb7")
     print(result)
+    Logging.close()
@@ -8,9 +8,9 @@ TABLE_OPTS = {
     "leaderboard": "Leaderboard Position",
     "peakrank": "Peak Rank",
     "previousrank": "Previous Act Rank",
-    "headshot_percent": "Headshot Percentage",
+    "headshot_percent": "Headshot Percentage (recent competitive games)",
     "winrate": "WinRate",
-    "kd": "K/D Ratio <!> Last Game Only <!>",
+    "kd": "K/D Ratio (recent competitive games)",
     "level": "Account Level"
 }
 
@@ -30,7 +30,8 @@ FLAGS_OPTS = {
     "truncate_names": "Truncate long player names if the window is too small",
     "truncate_ranks": "Use short rank names (Imm instead of Immortal)",
     "roman_numerals": "Show roman numerals in rank display (I, II, III)",
-    "starting_side": "Display starting side (Attacker/Defender) while in the pregame lobby"
+    "starting_side": "Display starting side (Attacker/Defender) while in the pregame lobby",
+    "live_table": "Show players in the table as soon as they are loaded"
 }
 
 weapon_question = lambda config: {
@@ -85,10 +86,21 @@ chat_limit_question = lambda config: {
         "filter": lambda ans: int(ans)
     }
 
+stats_matches_question = lambda config: {
+        "type": "number",
+        "name": "stats_matches",
+        "message": "Please enter the number of recent competitive games for KD, HS and RR gained:",
+        "default": config.get("stats_matches", 5),
+        "min_allowed": 1,
+        "max_allowed": 20,
+        "filter": lambda ans: int(ans)
+    }
+
 basic_questions = lambda config: [
     weapon_question(config=config),
     table_question(config=config),
-    chat_limit_question(config=config)
+    chat_limit_question(config=config),
+    stats_matches_question(config=config)
 ]
 
 advance_questions = lambda config: [
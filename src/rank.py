@@ -1,134 +1,197 @@
+import threading
+import time
+from collections import OrderedDict
+
+# an mmr only changes when its player finishes a match, the ones of our own matches are invalidated right away
+RANK_CACHE_TTL = 15 * 60
+RANK_CACHE_SIZE = 500
+
+
+class SeasonMMR:
+    __slots__ = ("tier", "rr", "leaderboard", "wins", "games")
+
+    def __init__(self, info):
+        self.tier = int(info.get("CompetitiveTier") or 0)
+        self.rr = info.get("RankedRating")
+        self.leaderboard = info.get("LeaderboardRank")
+        self.wins = info.get("NumberOfWinsWithPlacements")
+        self.games = info.get("NumberOfGames")
+
+
+class PlayerMMR:
+    """
+    One /mmr/v1/players response, parsed once. Every season is indexed by its id and the peak rank over
+    all seasons is computed up front, so ranks of any season are attribute reads afterwards.
+    """
+    __slots__ = ("ok", "status_code", "seasons", "peak_rank", "peak_season")
+
+    def __init__(self, response, ranks_before):
+        self.ok = response is not None and response.ok
+        self.status_code = response.status_code if response is not None else None
+        self.seasons = {}
+        self.peak_rank = 0
+        self.peak_season = None
+        if not self.ok:
+            return
+        try:
+            seasons = response.json()["QueueSkills"]["competitive"].get("SeasonalInfoBySeasonID") or {}
+        except (KeyError, TypeError, ValueError):
+            return
+        for season_id, info in seasons.items():
+            self.seasons[season_id] = SeasonMMR(info)
+            for tier in info.get("WinsByTier") or ():
+                tier = int(tier)
+                # the ascendant tiers were added in between diamond and immortal
+                if tier > 20 and season_id in ranks_before:
+                    tier += 3
+                if tier > self.peak_rank:
+                    self.peak_rank = tier
+                    self.peak_season = season_id
+
+
+class RankCache:
+    """PlayerMMR by puuid, entries expire after ttl seconds and the least recently used go once max_size is reached."""
+    def __init__(self, ttl=RANK_CACHE_TTL, max_size=RANK_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        # puuid -> (expires, mmr), oldest access first
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, puuid):
+        with self.lock:
+            entry = self.entries.get(puuid)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self.entries.move_to_end(puuid)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, puuid, mmr):
+        with self.lock:
+            self.entries[puuid] = (time.monotonic() + self.ttl, mmr)
+            self.entries.move_to_end(puuid)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, puuids):
+        with self.lock:
+            for puuid in puuids:
+                self.entries.pop(puuid, None)
+
 
 class Rank:
     def __init__(self, Requests, log, content, ranks_before):
         self.Requests = Requests
         self.log = log
-        self.ranks_before = ranks_before
+        self.ranks_before = frozenset(ranks_before)
         self.content = content
-        self.requestMap = {}
-
-    def get_request(self, puuid):
-        if puuid in self.requestMap:
-            return self.requestMap[puuid]
-
-        response = self.Requests.fetch('pd', f"/mmr/v1/players/{puuid}", "get")
-        self.requestMap[puuid] = response
-        return response
-
-    def invalidate_cached_responses(self):
-        self.requestMap = {}
+        self.cache = RankCache()
+        self.act_episodes = {}
+
+    def get_mmr(self, puuid):
+        mmr = self.cache.get(puuid)
+        if mmr is None:
+            # bounded like fetch_many, the row pipeline calls this from one thread per player
+            mmr = self.parse(puuid, self.Requests.bounded_fetch('pd', f"/mmr/v1/players/{puuid}", "get"))
+        return mmr
+
+    def parse(self, puuid, response):
+        mmr = PlayerMMR(response, self.ranks_before)
+        if mmr.ok:
+            self.cache.put(puuid, mmr)
+        else:
+            # failures aren't cached, the next refresh tries again
+            self.log("failed getting rank")
+            if response is not None:
+                self.log(response.text)
+        return mmr
+
+    def invalidate(self, puuids):
+        # the players of a finished match have a new rank, everyone else stays cached until the ttl runs out
+        puuids = list(puuids)
+        self.cache.invalidate(puuids)
+        for puuid in puuids:
+            self.Requests.invalidate_cached("pd", f"/mmr/v1/players/{puuid}")
+        self.log(f"rank cache: invalidated {len(puuids)} players of the finished match")
+
+    def log_cache_stats(self):
+        cache = self.cache
+        self.log(f"rank cache: {len(cache.entries)} players, hits: {cache.hits}, misses: {cache.misses},"
+                 f" evictions: {cache.evictions}")
+
+    def get_act_episode(self, season_id):
+        act_episode = self.act_episodes.get(season_id)
+        if act_episode is None:
+            act_episode = self.act_episodes[season_id] = self.content.get_act_episode_from_act_id(season_id)
+        return act_episode
 
-    #in future rewrite this code
     def get_rank(self, puuid, seasonID):
-        response = self.get_request(puuid)
-        # pyperclip.copy(str(response.json()))
+        return self.get_rank_from_mmr(self.get_mmr(puuid), seasonID)
+
+    def get_rank_from_mmr(self, mmr, seasonID):
         final = {
-            "rank": None,
-            "rr": None,
-            "leaderboard": None,
+            "rank": 0,
+            "rr": 0,
+            "leaderboard": 0,
             "peakrank": None,
-            "wr": None,
+            "wr": "N/A",
             "numberofgames": 0,
             "peakrankact": None,
             "peakrankep": None,
-            "statusgood": None,
-            "statuscode": None,
+            "statusgood": mmr.ok,
+            "statuscode": mmr.status_code,
             }
-        try:
-            if response.ok:
-                # self.log("retrieved rank successfully")
-                r = response.json()
-                rankTIER = r["QueueSkills"]["competitive"]["SeasonalInfoBySeasonID"][seasonID]["CompetitiveTier"]
-                if int(rankTIER) >= 21:
-                    # rank = [rankTIER,
-                            # r["QueueSkills"]["competitive"]["SeasonalInfoBySeasonID"][seasonID]["RankedRating"],
-                            # r["QueueSkills"]["competitive"]["SeasonalInfoBySeasonID"][seasonID]["LeaderboardRank"]]
-
-                    final["rank"] = rankTIER
-                    final["rr"] = r["QueueSkills"]["competitive"]["SeasonalInfoBySeasonID"][seasonID]["RankedRating"]
-                    final["leaderboard"] = r["QueueSkills"]["competitive"]["SeasonalInfoBySeasonID"][seasonID]["LeaderboardRank"]
-                elif int(rankTIER) not in (0, 1, 2):
-                    final["rank"] = rankTIER
-                    final["rr"] = r["QueueSkills"]["competitive"]["SeasonalInfoBySeasonID"][seasonID]["RankedRating"]
-                    final["leaderboard"] = 0
-
-                    # rank = [rankTIER,
-                            # r["QueueSkills"]["competitive"]["SeasonalInfoBySeasonID"][seasonID]["RankedRating"],
-                            # 0]
-                else:
-                    final["rank"] = 0
-                    final["rr"] = 0
-                    final["leaderboard"] = 0
-
-            else:
-                self.log("failed getting rank")
-                self.log(response.text)
-                final["rank"] = 0
-                final["rr"] = 0
-                final["leaderboard"] = 0
-        except TypeError:
-            final["rank"] = 0
-            final["rr"] = 0
-            final["leaderboard"] = 0
-        except KeyError:
-            final["rank"] = 0
-            final["rr"] = 0
-            final["leaderboard"] = 0
-        max_rank = final["rank"]
-        max_rank_season = seasonID
-        seasons = r["QueueSkills"]["competitive"].get("SeasonalInfoBySeasonID")
-        if seasons is not None:
-            for season in r["QueueSkills"]["competitive"]["SeasonalInfoBySeasonID"]:
-                if r["QueueSkills"]["competitive"]["SeasonalInfoBySeasonID"][season]["WinsByTier"] is not None:
-                    for winByTier in r["QueueSkills"]["competitive"]["SeasonalInfoBySeasonID"][season]["WinsByTier"]:
-                        if season in self.ranks_before:
-                            if int(winByTier) > 20:
-                                winByTier = int(winByTier) + 3
-                        if int(winByTier) > max_rank:
-                            max_rank = int(winByTier)
-                            max_rank_season = season
-            # rank.append(max_rank)
-            final["peakrank"] = max_rank
+        season = mmr.seasons.get(seasonID)
+        if season is not None:
+            if season.tier >= 21:
+                final["rank"] = season.tier
+                final["rr"] = season.rr
+                final["leaderboard"] = season.leaderboard
+            elif season.tier not in (0, 1, 2):
+                final["rank"] = season.tier
+                final["rr"] = season.rr
+
+            if season.games is not None:
+                final["numberofgames"] = season.games
+            if season.wins is not None and season.games is not None:
+                try:
+                    final["wr"] = int(season.wins / season.games * 100)
+                except ZeroDivisionError: #no loses
+                    final["wr"] = 100
+
+        # the current rank counts as peak unless a season has a higher one
+        if mmr.peak_rank > final["rank"]:
+            final["peakrank"] = mmr.peak_rank
+            peak_season = mmr.peak_season
         else:
-            # rank.append(max_rank)
-            final["peakrank"] = max_rank
-        try:
-            wins = r["QueueSkills"]["competitive"]["SeasonalInfoBySeasonID"][seasonID]["NumberOfWinsWithPlacements"]
-            total_games = r["QueueSkills"]["competitive"]["SeasonalInfoBySeasonID"][seasonID]["NumberOfGames"]
-            final["numberofgames"] = total_games
-            try:
-                wr = int(wins / total_games * 100)
-            except ZeroDivisionError: #no loses
-                wr = 100
-        except (KeyError, TypeError): #haven't played this season, #no data?
-            # print("test")
-            wr = "N/A"
-
-
-        # rank.append(wr)
-        final["wr"] = wr
-        final["statusgood"] = response.ok
-        final["statuscode"] = response.status_code
-        
+            final["peakrank"] = final["rank"]
+            peak_season = seasonID
 
         #peak rank act and ep
-        peak_rank_act_ep = self.content.get_act_episode_from_act_id(max_rank_season)
+        peak_rank_act_ep = self.get_act_episode(peak_season)
         final["peakrankact"] = peak_rank_act_ep["act"]
         final["peakrankep"] = peak_rank_act_ep["episode"]
         return final
 
 
 if __name__ == "__main__":
-    from constants import before_ascendant_seasons, version, NUMBERTORANKS
-    from requestsV import Requests
-    from logs import Logging
-    from errors import Error
+    # python -m src.rank, with VALORANT running
+    from src.constants import before_ascendant_seasons, version, NUMBERTORANKS
+    from src.content import Content
+    from src.requestsV import Requests
+    from src.logs import Logging
+    from src.errors import Error
     import urllib3
-    import pyperclip
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
     Logging = Logging()
-    log = Logging.log
+    log = Logging
 
     ErrorSRC = Error(log)
 
@@ -139,9 +202,8 @@ if __name__ == "__main__":
     #season id
     s_id = "67e373c7-48f7-b422-641b-079ace30b427" 
 
-    r = Rank(Requests, log, before_ascendant_seasons)
+    r = Rank(Requests, log, Content(Requests, log), before_ascendant_seasons)
 
-    res = r.get_rank("", s_id)
+    res = r.get_rank(Requests.puuid, s_id)
     print(res)
-    #[[rank, rr, leadeboard, peak rank, wr,] status]
-    # print(f"Rank: {res[0][0]} - {NUMBERTORANKS[res[0][0]]}\nPeak Rank: {res[0][3]} - {NUMBERTORANKS[res[0][3]]}\nRR: {res[0][1]}\nLeaderboard: {res[0][2]}\nStatus is good: {res[1]}\nWR: {res[0][4]}%")
+    Logging.close()
@@ -0,0 +1,168 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# (substring of the endpoint, endpoint class), first match wins so more specific paths go first
+ENDPOINT_CLASSES = [
+    ("/competitiveupdates", "competitiveupdates"),
+    ("/match-details/", "match-details"),
+    ("/name-service/", "names"),
+    ("/mmr/", "mmr"),
+    ("/core-game/", "core-game"),
+    ("/pregame/", "pregame"),
+    ("/chat/", "chat"),
+    ("/entitlements/", "entitlements"),
+    ("/content-service/", "content"),
+]
+
+# only the remote riot hosts are rate limited, local client and custom urls are not
+LIMITED_URL_TYPES = ("pd", "glz")
+
+# tokens per second and burst size each bucket starts with, buckets slow down on 429s and recover on successes
+HOST_RATE = 10.0
+HOST_BURST = 40
+ENDPOINT_RATE = 5.0
+ENDPOINT_BURST = 20
+MIN_RATE = 0.25
+# a 429 only slows down its endpoint class, unless it is host wide: said so by the response,
+# or a second endpoint class of the same host got one within this many seconds
+HOST_WIDE_WINDOW = 10.0
+
+
+def get_endpoint_class(endpoint):
+    for marker, endpoint_class in ENDPOINT_CLASSES:
+        if marker in endpoint:
+            return endpoint_class
+    return "other"
+
+
+def get_retry_after(response, default):
+    """Seconds to wait according to the Retry-After header (delta-seconds or http date), default if missing."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return default
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return default
+
+
+def is_host_wide(response):
+    # riot marks limits of the whole application (as opposed to one method) with this header
+    return response.headers.get("X-Rate-Limit-Type", "").lower() == "application"
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self):
+        # takes a token and returns 0, or returns how long the caller has to wait before trying again
+        with self.lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def give_back(self):
+        with self.lock:
+            self.tokens = min(self.burst, self.tokens + 1)
+
+    def penalize(self, retry_after):
+        # multiplicative decrease on 429, nothing goes out until retry_after has passed
+        with self.lock:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+            self.rate = max(MIN_RATE, self.rate / 2)
+            # empty once the block is over too, instead of a full burst saved up while waiting
+            self.tokens = 0
+            self.updated = self.blocked_until
+
+    def reward(self):
+        # additive increase back towards the starting rate
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class RateLimiter:
+    def __init__(self, log):
+        self.log = log
+        self.buckets = {}
+        # url_type -> {endpoint class: when it last got a 429}
+        self.rate_limited = {}
+        self.lock = threading.Lock()
+
+    def get_bucket(self, key, rate, burst):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            with self.lock:
+                bucket = self.buckets.setdefault(key, TokenBucket(rate, burst))
+        return bucket
+
+    def get_buckets(self, url_type, endpoint):
+        if url_type not in LIMITED_URL_TYPES:
+            return []
+        return [
+            self.get_bucket(url_type, HOST_RATE, HOST_BURST),
+            self.get_bucket((url_type, get_endpoint_class(endpoint)), ENDPOINT_RATE, ENDPOINT_BURST),
+        ]
+
+    def acquire(self, url_type, endpoint):
+        # blocks only the calling thread (a fetch_many worker most of the time) until both buckets have a token
+        buckets = self.get_buckets(url_type, endpoint)
+        while True:
+            taken = []
+            wait = 0
+            for bucket in buckets:
+                wait = bucket.try_take()
+                if wait > 0:
+                    break
+                taken.append(bucket)
+            if wait <= 0:
+                return
+            for bucket in taken:
+                bucket.give_back()
+            time.sleep(wait)
+
+    def on_success(self, url_type, endpoint):
+        for bucket in self.get_buckets(url_type, endpoint):
+            bucket.reward()
+
+    def on_rate_limited(self, url_type, endpoint, response, default):
+        retry_after = get_retry_after(response, default)
+        buckets = self.get_buckets(url_type, endpoint)
+        if not buckets:
+            return retry_after
+        host_bucket, endpoint_bucket = buckets
+        endpoint_class = get_endpoint_class(endpoint)
+        now = time.monotonic()
+        with self.lock:
+            recent = self.rate_limited.setdefault(url_type, {})
+            others = [other for other, at in recent.items() if other != endpoint_class and now - at < HOST_WIDE_WINDOW]
+            recent[endpoint_class] = now
+        host_wide = is_host_wide(response) or bool(others)
+        self.log(f"rate limited on '{url_type}' ({endpoint_class}{', host wide' if host_wide else ''}),"
+                 f" backing off for {retry_after:.1f}s")
+        endpoint_bucket.penalize(retry_after)
+        if host_wide:
+            host_bucket.penalize(retry_after)
+        return retry_after
@@ -10,15 +10,55 @@ import sys
 import zipfile
 import io
 import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError
 
+from src.log_index import ShooterLogIndex
+from src.metrics import Metrics
+from src.rate_limiter import RateLimiter
+from src.response_cache import ResponseCache
+from src.static_content import StaticContent
+from src.token_manager import TokenManager
+
+# every host vRY talks to is mapped to one of these families, each family owns one pooled session
+HOST_FAMILIES = ["pd", "glz", "shared", "local", "valorant-api"]
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_CONCURRENCY = 4
+# GETs of these url types are coalesced and memoized for the length of one refresh
+COALESCED_URL_TYPES = ("pd", "glz")
+# retries of a pd/glz request after the first attempt (429, bad claims or other errors)
+MAX_RETRIES = 3
+
 class Requests:
-    def __init__(self, version, log, Error):
+    def __init__(self, version, log, Error, pool_size=DEFAULT_POOL_SIZE, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 static_content=None):
         self.Error = Error
         self.version = version
-        self.headers = {}
         self.log = log
 
+        self.pool_size = pool_size
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+
+        # fetch_many workers, every url type gets its own semaphore so one host can't starve the others
+        self.max_concurrency = max(1, min(max_concurrency, pool_size))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency * 2, thread_name_prefix="vry-fetch")
+        self.semaphores = {}
+        self.rate_limiter = RateLimiter(log)
+        self.log_index = ShooterLogIndex(log)
+        self.token_manager = TokenManager(self, log)
+        self.response_cache = ResponseCache(log)
+        self.metrics = Metrics(log)
+        self.static_content = static_content or StaticContent(log)
+        # valorant-api.com downloads share the pool with every other request
+        self.static_content.set_session(self.get_session("valorant-api"))
+
+        self.coalesce_lock = threading.Lock()
+        self.inflight = {}
+        self.memo = {}
 
         self.lockfile = self.get_lockfile()
         self.region = self.get_region()
@@ -97,56 +137,87 @@ class Requests:
             print(color("[WARNING] Failed processing status - skipping...", fore=(255, 165, 0)))
             return
             
-    def fetch(self, url_type: str, endpoint: str, method: str, rate_limit_seconds=5):
+    def fetch(self, url_type: str, endpoint: str, method: str, rate_limit_seconds=5, json_data=None):
+        if url_type in COALESCED_URL_TYPES and method.lower() == "get":
+            return self.fetch_coalesced(url_type, endpoint, method, rate_limit_seconds)
+        return self.fetch_direct(url_type, endpoint, method, rate_limit_seconds, json_data)
+
+    def fetch_coalesced(self, url_type, endpoint, method, rate_limit_seconds):
+        # identical GETs share one in-flight request, and successful results are reused until the next refresh
+        key = (url_type, endpoint)
+        with self.coalesce_lock:
+            if key in self.memo:
+                self.metrics.record_cache_hit(url_type, endpoint)
+                return self.memo[key]
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self.inflight[key] = Future()
+        if not owner:
+            self.metrics.record_cache_hit(url_type, endpoint)
+            return future.result()
+
         try:
-            if url_type == "glz":
-                response = requests.request(method, self.glz_url + endpoint, headers=self.get_headers(), verify=False)
-                self.log(f"fetch: url: '{url_type}', endpoint: {endpoint}, method: {method},"
-                    f" response code: {response.status_code}")
+            result = self.fetch_direct(url_type, endpoint, method, rate_limit_seconds)
+        except Exception as e:
+            with self.coalesce_lock:
+                del self.inflight[key]
+            future.set_exception(e)
+            raise
+        with self.coalesce_lock:
+            del self.inflight[key]
+            if self.is_memoizable(result):
+                self.memo[key] = result
+        future.set_result(result)
+        return result
+
+    def is_memoizable(self, result):
+        # errors are never reused so a retry on the next call still goes to the network
+        if isinstance(result, requests.Response):
+            return result.ok
+        return isinstance(result, dict) and "errorCode" not in result
+
+    def new_refresh(self):
+        # called at the start of every scoreboard refresh, drops the per-refresh memo
+        with self.coalesce_lock:
+            self.memo = {}
 
-                if response.status_code == 404:
-                    return response.json()
-
-                try:
-                    if response.json().get("errorCode") == "BAD_CLAIMS":
-                        self.log("detected bad claims")
-                        self.headers = {}
-                        return self.fetch(url_type, endpoint, method)
-                except JSONDecodeError:
-                    pass
-                if not response.ok:
-                    if response.status_code == 429:
-                        self.log("response not ok glz endpoint: rate limit 429")
-                    else:
-                        self.log("response not ok glz endpoint: " + response.text)
-                    time.sleep(rate_limit_seconds+5)
-                    self.headers = {}
-                    self.fetch(url_type, endpoint, method)
+    def is_cached(self, url_type, endpoint):
+        # whether a GET would be answered without a network request, from the refresh memo or the response cache
+        with self.coalesce_lock:
+            if (url_type, endpoint) in self.memo:
+                return True
+        return url_type == "pd" and self.response_cache.contains(self.pd_url + endpoint, endpoint)
+
+    def invalidate_cached(self, url_type, endpoint, prefix=False):
+        # forgets a response that is known to be stale, in the refresh memo and on disk
+        # with prefix, every endpoint starting with it is forgotten (whatever its query string)
+        with self.coalesce_lock:
+            if prefix:
+                for key in [key for key in self.memo if key[0] == url_type and key[1].startswith(endpoint)]:
+                    del self.memo[key]
+            else:
+                self.memo.pop((url_type, endpoint), None)
+        if url_type == "pd":
+            if prefix:
+                self.response_cache.invalidate_prefix(self.pd_url + endpoint)
+            else:
+                self.response_cache.invalidate(self.pd_url + endpoint)
+
+    def fetch_direct(self, url_type: str, endpoint: str, method: str, rate_limit_seconds=5, json_data=None):
+        try:
+            if url_type == "glz":
+                response = self.fetch_riot(url_type, self.glz_url, endpoint, method, rate_limit_seconds, json_data)
                 return response.json()
             elif url_type == "pd":
-                response = requests.request(method, self.pd_url + endpoint, headers=self.get_headers(), verify=False)
-                self.log(
-                    f"fetch: url: '{url_type}', endpoint: {endpoint}, method: {method},"
-                    f" response code: {response.status_code}")
-                if response.status_code == 404:
-                    return response
-
-                try:
-                    if response.json().get("errorCode") == "BAD_CLAIMS":
-                        self.log("detected bad claims")
-                        self.headers = {}
-                        return self.fetch(url_type, endpoint, method)
-                except JSONDecodeError:
-                    pass
-
-                if not response.ok:
-                    if response.status_code == 429:
-                        self.log(f"response not ok pd endpoint, rate limit 429")
-                    else:
-                        self.log(f"response not ok pd endpoint, {response.text}")
-                    time.sleep(rate_limit_seconds+5)
-                    self.headers = {}
-                    return self.fetch(url_type, endpoint, method, rate_limit_seconds=rate_limit_seconds+5)
+                if method.lower() != "get":
+                    return self.fetch_riot(url_type, self.pd_url, endpoint, method, rate_limit_seconds, json_data)
+                response = self.response_cache.get(self.pd_url + endpoint, endpoint)
+                if response is not None:
+                    self.metrics.record_cache_hit(url_type, endpoint)
+                else:
+                    response = self.fetch_riot(url_type, self.pd_url, endpoint, method, rate_limit_seconds, json_data)
+                    self.response_cache.put(self.pd_url + endpoint, endpoint, response)
                 return response
             elif url_type == "local":
                 local_headers = {'Authorization': 'Basic ' + base64.b64encode(
@@ -154,10 +225,14 @@ class Requests:
                 
                 max_retries = 3
                 for i in range(max_retries):
+                    if i > 0:
+                        self.metrics.record_retry(url_type, endpoint)
+                    started = time.perf_counter()
                     try:
-                        response = requests.request(method, f"https://127.0.0.1:{self.lockfile['port']}{endpoint}",
-                                                    headers=local_headers,
-                                                    verify=False, timeout=5)
+                        response = self.get_session("local").request(method, f"https://127.0.0.1:{self.lockfile['port']}{endpoint}",
+                                                                     headers=local_headers,
+                                                                     verify=False, timeout=5)
+                        self.metrics.record_request(url_type, endpoint, started, response)
                         if response.status_code == 200 and response.json().get("errorCode") != "RPC_ERROR":
                             if endpoint != "/chat/v4/presences":
                                 self.log(
@@ -168,51 +243,150 @@ class Requests:
                             self.log(f"Local API is not ready yet (RPC_ERROR or status code {response.status_code}). Retrying...")
                             time.sleep(5)
                     except (requests.exceptions.RequestException, ConnectionError):
+                        self.metrics.record_request(url_type, endpoint, started, None)
                         self.log(f"Connection error on local request. Retrying... ({i + 1}/{max_retries})")
                         time.sleep(5)
                 
                 self.log(f"Failed to connect to local client after {max_retries} attempts.")
                 return None
             elif url_type == "custom":
-                response = requests.request(method, f"{endpoint}", headers=self.get_headers(), verify=False)
+                started = time.perf_counter()
+                response = self.session_for_url(endpoint).request(method, f"{endpoint}", headers=self.get_headers(), verify=False)
+                self.metrics.record_request(url_type, endpoint, started, response)
                 self.log(
                     f"fetch: url: '{url_type}', endpoint: {endpoint}, method: {method},"
                     f" response code: {response.status_code}")
-                if not response.ok: self.headers = {}
+                if not response.ok: self.token_manager.invalidate()
                 return response.json()
         except json.decoder.JSONDecodeError:
             self.log(f"JSONDecodeError in fetch function, resp.code: {response.status_code}, resp_text: '{response.text}")
             print(response)
             print(response.text)
 
+    def fetch_riot(self, url_type, base_url, endpoint, method, rate_limit_seconds, json_data=None):
+        # pd/glz request with a bounded retry budget, waiting is left to the shared rate limiter
+        for attempt in range(MAX_RETRIES + 1):
+            if attempt > 0:
+                self.metrics.record_retry(url_type, endpoint)
+            self.rate_limiter.acquire(url_type, endpoint)
+            started = time.perf_counter()
+            response = self.get_session(url_type).request(method, base_url + endpoint, headers=self.get_headers(),
+                                                          json=json_data, verify=False)
+            self.metrics.record_request(url_type, endpoint, started, response)
+            self.log(f"fetch: url: '{url_type}', endpoint: {endpoint}, method: {method},"
+                     f" response code: {response.status_code}")
+
+            if response.status_code == 404:
+                return response
+
+            try:
+                response_json = response.json()
+                if isinstance(response_json, dict) and response_json.get("errorCode") == "BAD_CLAIMS":
+                    self.log("detected bad claims")
+                    self.token_manager.invalidate()
+                    continue
+            except JSONDecodeError:
+                pass
+
+            if response.ok:
+                self.rate_limiter.on_success(url_type, endpoint)
+                return response
+
+            if attempt == MAX_RETRIES:
+                self.log(f"response not ok {url_type} endpoint, giving up after {MAX_RETRIES} retries")
+                break
+            if response.status_code == 429:
+                # the next acquire waits until the bucket's Retry-After has passed
+                self.rate_limiter.on_rate_limited(url_type, endpoint, response, default=rate_limit_seconds + 5 * (attempt + 1))
+            else:
+                self.log(f"response not ok {url_type} endpoint, {response.text}")
+                time.sleep(rate_limit_seconds)
+                self.token_manager.invalidate()
+        return response
+
+    def fetch_many(self, calls, **kwargs):
+        # calls: [(url_type, endpoint, method), ...], results are returned in the same order
+        # a failed call returns None instead of raising so one bad player doesn't break the whole lobby
+        # must not be called from inside a fetch_many worker
+        futures = [self.executor.submit(self.bounded_fetch, url_type, endpoint, method, **kwargs)
+                   for url_type, endpoint, method in calls]
+        results = []
+        for (url_type, endpoint, method), future in zip(calls, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                self.log(f"fetch_many: url: '{url_type}', endpoint: {endpoint}, method: {method} failed: {e}")
+                results.append(None)
+        return results
+
+    def bounded_fetch(self, url_type, endpoint, method, **kwargs):
+        semaphore = self.semaphores.get(url_type)
+        if semaphore is None:
+            with self.sessions_lock:
+                semaphore = self.semaphores.setdefault(url_type, threading.BoundedSemaphore(self.max_concurrency))
+        with semaphore:
+            return self.fetch(url_type, endpoint, method, **kwargs)
+
+    def get_session(self, host_family):
+        # one keep-alive session per host family, created on first use so connections are reused between refreshes
+        session = self.sessions.get(host_family)
+        if session is None:
+            with self.sessions_lock:
+                session = self.sessions.get(host_family)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+                    self.sessions[host_family] = session
+                    self.log(f"created pooled session for '{host_family}' with pool size {self.pool_size}")
+        return session
+
+    def get_host_family(self, url):
+        host = urlparse(url).hostname or ""
+        if host in ("127.0.0.1", "localhost"):
+            return "local"
+        elif host == "valorant-api.com":
+            return "valorant-api"
+        elif host.startswith("glz-"):
+            return "glz"
+        elif host.startswith("pd."):
+            return "pd"
+        elif host.startswith("shared."):
+            return "shared"
+        return host
+
+    def session_for_url(self, url):
+        return self.get_session(self.get_host_family(url))
+
+    def get_static(self, endpoint):
+        # static game content (agents, maps, skins...) from valorant-api.com, parsed json from the versioned cache
+        return self.static_content.get(endpoint)
+
+    def log_pool_stats(self):
+        # num_connections only grows when urllib3 has to open a new socket (new TCP+TLS handshake)
+        for host_family, session in list(self.sessions.items()):
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is None:
+                        continue
+                    reused = pool.num_requests - pool.num_connections
+                    self.log(f"pool stats '{host_family}' {pool.host}: requests: {pool.num_requests},"
+                             f" new connections: {pool.num_connections}, reused: {max(reused, 0)}")
+
     def get_region(self):
-        path = os.path.join(os.getenv('LOCALAPPDATA'), R'VALORANT\Saved\Logs\ShooterGame.log')
-        with open(path, "r", encoding="utf8") as file:
-            while True:
-                line = file.readline()
-                if '.a.pvp.net/account-xp/v1/' in line:
-                    pd_url = line.split('.a.pvp.net/account-xp/v1/')[0].split('.')[-1]
-                elif 'https://glz' in line:
-                    glz_url = [(line.split('https://glz-')[1].split(".")[0]),
-                               (line.split('https://glz-')[1].split(".")[1])]
-                if "pd_url" in locals().keys() and "glz_url" in locals().keys():
-                    self.log(f"got region from logs '{[pd_url, glz_url]}'")
-                    if pd_url == "pbe":
-                        return ["na", "na-1", "na"]
-                    return [pd_url, glz_url]
+        values = self.log_index.wait_for("pd_shard", "glz")
+        pd_url, glz_url = values["pd_shard"], values["glz"]
+        self.log(f"got region from logs '{[pd_url, glz_url]}'")
+        if pd_url == "pbe":
+            return ["na", "na-1", "na"]
+        return [pd_url, glz_url]
 
     def get_current_version(self):
-        path = os.path.join(os.getenv('LOCALAPPDATA'), R'VALORANT\Saved\Logs\ShooterGame.log')
-        with open(path, "r", encoding="utf8") as file:
-            while True:
-                line = file.readline()
-                if 'CI server version:' in line:
-                    version_without_shipping = line.split('CI server version: ')[1].strip()
-                    version = version_without_shipping.split("-")
-                    version.insert(2, "shipping")
-                    version = "-".join(version)
-                    self.log(f"got version from logs '{version}'")
-                    return version
+        return self.log_index.wait_for("version")["version"]
 
     def get_lockfile(self, ignoreLockfile=False):
         #ignoring lockfile is for when lockfile exists but it's not really valid, (local endpoints are not initialized yet)
@@ -227,44 +401,4 @@ class Requests:
 
 
     def get_headers(self, refresh=False, init=False):
-        if self.headers == {} or refresh:
-            try_again = True
-            while try_again:
-                local_headers = {'Authorization': 'Basic ' + base64.b64encode(
-                    ('riot:' + self.lockfile['password']).encode()).decode()}
-                try:
-                    response = requests.get(f"https://127.0.0.1:{self.lockfile['port']}/entitlements/v1/token",
-                                            headers=local_headers, verify=False)
-                    self.log(f"https://127.0.0.1:{self.lockfile['port']}/entitlements/v1/token\n{local_headers}")
-                except ConnectionError:
-                    self.log(f"https://127.0.0.1:{self.lockfile['port']}/entitlements/v1/token\n{local_headers}")
-                    self.log("Connection error, retrying in 1 seconds, getting new lockfile")
-                    time.sleep(1)
-                    self.lockfile = self.get_lockfile()
-                    continue
-                entitlements = response.json()
-                if entitlements.get("message") == "Entitlements token is not ready yet":
-                    try_again = True
-                    time.sleep(1)
-                elif entitlements.get("message") == "Invalid URI format":
-                    self.log(f"Invalid uri format: {entitlements}")
-                    if init:
-                        return False
-                    else:
-                        try_again = True
-                        time.sleep(5)
-                else:
-                    try_again = False
-
-            self.puuid = entitlements['subject']
-            headers = {
-                'Authorization': f"Bearer {entitlements['accessToken']}",
-                'X-Riot-Entitlements-JWT': entitlements['token'],
-                'X-Riot-ClientPlatform': "ew0KCSJwbGF0Zm9ybVR5cGUiOiAiUEMiLA0KCSJwbGF0Zm9ybU9TIjog"
-                                         "IldpbmRvd3MiLA0KCSJwbGF0Zm9ybU9TVmVyc2lvbiI6ICIxMC4wLjE5"
-                                         "MDQyLjEuMjU2LjY0Yml0IiwNCgkicGxhdGZvcm1DaGlwc2V0IjogIlVua25vd24iDQp9",
-                'X-Riot-ClientVersion': self.get_current_version(),
-                "User-Agent": "ShooterGame/13 Windows/10.0.19043.1.256.64bit"
-            }
-            self.headers = headers
-        return self.headers
+        return self.token_manager.get_headers(refresh=refresh, init=init)
@@ -0,0 +1,150 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import requests
+
+# (endpoint pattern, ttl in seconds), first match wins
+# None never expires (finished matches don't change), endpoints without a policy are never cached
+CACHE_POLICIES = [
+    (re.compile(r"^/match-details/v1/matches/"), None),
+    (re.compile(r"^/mmr/v1/players/[^/]+/competitiveupdates"), 60),
+    (re.compile(r"^/mmr/v1/players/[^/?]+$"), 60),
+]
+
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+# size is only checked every few writes, a SUM over the table isn't free
+EVICTION_INTERVAL = 20
+
+
+def get_ttl(endpoint):
+    for pattern, ttl in CACHE_POLICIES:
+        if pattern.search(endpoint):
+            return ttl
+    return 0
+
+
+class ResponseCache:
+    """On-disk cache of pd responses in %APPDATA%/vry/cache.db, evicts the least recently used entries."""
+    def __init__(self, log, path=None, max_bytes=MAX_CACHE_BYTES):
+        self.log = log
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.writes = 0
+        self.hits = 0
+        self.misses = 0
+        if path is None:
+            try:
+                os.mkdir(os.path.join(os.getenv('APPDATA'), "vry"))
+            except FileExistsError:
+                pass
+            path = os.path.join(os.getenv('APPDATA'), "vry", "cache.db")
+        try:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, status INTEGER, body BLOB, expires REAL, accessed REAL, size INTEGER)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self.db.commit()
+        except sqlite3.Error as e:
+            # a broken cache must never stop vRY, it just runs without one
+            self.log(f"response cache disabled, could not open {path}: {e}")
+            self.db = None
+
+    def get(self, url, endpoint):
+        if self.db is None or get_ttl(endpoint) == 0:
+            return None
+        now = time.time()
+        with self.lock:
+            try:
+                row = self.db.execute(
+                    "SELECT status, body, expires FROM responses WHERE key = ?", (url,)
+                ).fetchone()
+                if row is None or (row[2] is not None and row[2] < now):
+                    self.misses += 1
+                    return None
+                self.db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, url))
+                self.db.commit()
+            except sqlite3.Error as e:
+                self.log(f"response cache read failed: {e}")
+                return None
+            self.hits += 1
+
+        response = requests.Response()
+        response.status_code = row[0]
+        response._content = row[1]
+        response.url = url
+        response.encoding = "utf-8"
+        response.headers["Content-Type"] = "application/json"
+        return response
+
+    def contains(self, url, endpoint):
+        # like get() without reading the body or counting as an access
+        if self.db is None or get_ttl(endpoint) == 0:
+            return False
+        with self.lock:
+            try:
+                row = self.db.execute("SELECT expires FROM responses WHERE key = ?", (url,)).fetchone()
+            except sqlite3.Error as e:
+                self.log(f"response cache read failed: {e}")
+                return False
+        return row is not None and (row[0] is None or row[0] >= time.time())
+
+    def put(self, url, endpoint, response):
+        ttl = get_ttl(endpoint)
+        if self.db is None or ttl == 0 or response is None or not response.ok:
+            return
+        now = time.time()
+        body = response.content
+        with self.lock:
+            try:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses (key, status, body, expires, accessed, size) VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, response.status_code, body, None if ttl is None else now + ttl, now, len(body)),
+                )
+                self.writes += 1
+                if self.writes % EVICTION_INTERVAL == 0:
+                    self.evict()
+                self.db.commit()
+            except sqlite3.Error as e:
+                self.log(f"response cache write failed: {e}")
+
+    def invalidate(self, url):
+        if self.db is None:
+            return
+        with self.lock:
+            try:
+                self.db.execute("DELETE FROM responses WHERE key = ?", (url,))
+                self.db.commit()
+            except sqlite3.Error as e:
+                self.log(f"response cache delete failed: {e}")
+
+    def invalidate_prefix(self, prefix):
+        # every cached url starting with prefix, e.g. all pages of one player's match history
+        if self.db is None:
+            return
+        with self.lock:
+            try:
+                self.db.execute("DELETE FROM responses WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+                self.db.commit()
+            except sqlite3.Error as e:
+                self.log(f"response cache delete failed: {e}")
+
+    def evict(self):
+        # drop expired rows, then the least recently used ones until the cache fits again
+        self.db.execute("DELETE FROM responses WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        evicted = []
+        for key, size in self.db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if total - freed <= self.max_bytes:
+                break
+            evicted.append((key,))
+            freed += size
+        self.db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self.log(f"response cache evicted {len(evicted)} entries ({freed} bytes)")
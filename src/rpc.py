@@ -2,6 +2,7 @@ import time
 import asyncio
 import threading
 import atexit
+from concurrent.futures import Future
 from typing import Any, Dict, Optional
 
 from pypresence import AioPresence
@@ -9,8 +10,9 @@ from pypresence.exceptions import DiscordNotFound, InvalidID, PipeClosed
 
 
 class Rpc:
-    def __init__(self, map_dict, gamemodes, colors, log):
+    def __init__(self, map_dict, gamemodes, colors, log, runtime):
         self.log = log
+        self.runtime = runtime
         self.map_dict = map_dict
         self.gamemodes = gamemodes
         self.colors = colors
@@ -49,11 +51,12 @@ class Rpc:
         # Cache last payload (for dedupe)
         self._last_sent_payload: Optional[Dict[str, Any]] = None
 
-        self._loop: Optional[asyncio.AbstractEventLoop] = None
-        self._runner_task: Optional[asyncio.Task] = None
-        self._thread: Optional[threading.Thread] = None
+        # runs on the shared AsyncRuntime loop
+        self._loop: asyncio.AbstractEventLoop = runtime.loop
+        self._runner: Optional[Future] = None
+        self._closed = threading.Event()
 
-        self._start_thread()
+        self._start()
         atexit.register(self.shutdown)
 
     def set_data(self, data: Dict[str, Any]):
@@ -87,60 +90,44 @@ class Rpc:
             self._loop.call_soon_threadsafe(_apply)
 
     def shutdown(self):
-        if not self._thread or not self._thread.is_alive():
+        if not self._runner or self._runner.done():
             return
 
-        def _cancel_runner():
-            if self._runner_task and not self._runner_task.done():
-                self._runner_task.cancel()
-
         try:
-            if self._loop and self._loop.is_running():
-                self._loop.call_soon_threadsafe(_cancel_runner)
-                self._thread.join(timeout=3.0)
+            self._runner.cancel()
+            # gives _main a moment to close the discord connection
+            self._closed.wait(timeout=3.0)
         except Exception:
             pass
 
-    def _start_thread(self):
-        if self._thread and self._thread.is_alive():
+    def _start(self):
+        if self._runner and not self._runner.done():
             return
+        self._closed.clear()
+        self._runner = self.runtime.submit(self._main())
 
-        def _thread_target():
-            self._loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self._loop)
-            self._update_event = asyncio.Event()
-
-            # Initializes internal state from the shadows
-            self._data = dict(self._shadow_data)
-            self._desired_presence = dict(self._shadow_presence)
+    async def _main(self):
+        self._update_event = asyncio.Event()
 
-            self._runner_task = self._loop.create_task(self._run())
+        # Initializes internal state from the shadows
+        self._data = dict(self._shadow_data)
+        self._desired_presence = dict(self._shadow_presence)
 
+        try:
+            await self._run()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
             try:
-                self._loop.run_until_complete(self._runner_task)
-            except asyncio.CancelledError:
+                self.log(f"RPC: Loop crashed: {e}")
+            except Exception:
                 pass
-            except Exception as e:
-                try:
-                    self.log(f"RPC: Loop crashed: {e}")
-                except Exception:
-                    pass
-            finally:
-                try:
-                    self._loop.run_until_complete(self._safe_close())
-                except Exception:
-                    pass
-                try:
-                    self._loop.run_until_complete(self._loop.shutdown_asyncgens())
-                except Exception:
-                    pass
-                try:
-                    self._loop.close()
-                except Exception:
-                    pass
-
-        self._thread = threading.Thread(target=_thread_target, name="RpcAioPresenceLoop", daemon=True)
-        self._thread.start()
+        finally:
+            try:
+                await self._safe_close()
+            except Exception:
+                pass
+            self._closed.set()
 
     async def _run(self):
         await self._connect()
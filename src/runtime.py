@@ -0,0 +1,25 @@
+import asyncio
+import threading
+
+
+class AsyncRuntime:
+    """
+    The one asyncio event loop of vRY, running on a daemon thread for the whole session.
+    The client websocket and discord rpc run on it, the rest of vRY hands coroutines over with submit().
+    """
+    def __init__(self, log):
+        self.log = log
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.run, name="vry-asyncio", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        # returns a concurrent.futures.Future, cancelling it cancels the task on the loop
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
@@ -14,11 +14,9 @@ class Server:
         self.log = log
         self.lastMessages = {}
 
-    def start_server(self):
+    def start_server(self, port):
         try:
             # print(self.lastMessage)
-            with open("config.json", "r") as conf:
-                port = json.load(conf)["port"]
             self.server = WebsocketServer(host="0.0.0.0", port=port)
             # server = websocket.WebSocketApp("wss://localhost:1100", on_open=on_open, on_message=on_message, on_close=on_close)
             self.server.set_fn_new_client(self.handle_new_client)
@@ -42,3 +40,11 @@ class Server:
         msg_str = json.dumps(payload)
         self.lastMessages[type] = msg_str
         self.server.send_message_to_all(msg_str)
+
+    def send_payload_delta(self, type, payload, delta):
+        # new clients still get the full payload from lastMessages, connected ones only get the changes
+        payload["type"] = type
+        self.lastMessages[type] = json.dumps(payload)
+        if delta:
+            delta["type"] = f"{type}Delta"
+            self.server.send_message_to_all(json.dumps(delta))
@@ -0,0 +1,78 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class StartupStep:
+    def __init__(self, name, func, deps, deferred):
+        self.name = name
+        self.func = func
+        self.deps = deps
+        self.deferred = deferred
+        self.future = Future()
+        self.started = None
+        self.finished = None
+
+
+class Startup:
+    """
+    Runs the startup steps as a dependency graph. Every step gets its own thread and waits only for
+    the steps it depends on, the results of those are passed to it as arguments in order.
+    Deferred steps start once every other step is done, so they never hold up the first table.
+    """
+    def __init__(self, log):
+        self.log = log
+        self.steps = {}
+        self.started = None
+
+    def add(self, name, func, deps=(), deferred=False):
+        self.steps[name] = StartupStep(name, func, tuple(deps), deferred)
+
+    def run(self):
+        self.started = time.perf_counter()
+        for step in self.steps.values():
+            for dep in step.deps:
+                if dep not in self.steps:
+                    raise ValueError(f"startup step '{step.name}' depends on unknown step '{dep}'")
+        for step in self.steps.values():
+            deps = step.deps
+            if step.deferred:
+                # deferred steps wait for the whole critical path, not only for their own dependencies
+                deps = tuple(name for name, other in self.steps.items() if not other.deferred)
+            threading.Thread(target=self.run_step, args=(step, deps), name=f"startup-{step.name}", daemon=True).start()
+
+    def run_step(self, step, wait_for):
+        try:
+            for name in wait_for:
+                # only a failed dependency fails this step, other steps just have to be finished
+                self.steps[name].future.exception()
+            args = [self.steps[name].future.result() for name in step.deps]
+            step.started = time.perf_counter()
+            result = step.func(*args)
+        except BaseException as e:
+            step.finished = time.perf_counter()
+            step.future.set_exception(e)
+            return
+        step.finished = time.perf_counter()
+        step.future.set_result(result)
+
+    def get(self, name):
+        # blocks until the step is done, a failed step (or a failed dependency) raises here
+        return self.steps[name].future.result()
+
+    def done(self, name):
+        return self.steps[name].future.done()
+
+    def report(self, label):
+        # per step breakdown relative to the start of the pipeline
+        now = time.perf_counter()
+        self.log(f"startup: {label} after {now - self.started:.2f}s")
+        for step in sorted(self.steps.values(), key=lambda s: s.started if s.started is not None else now):
+            if step.started is None:
+                self.log(f"startup step '{step.name}': not started")
+            elif step.finished is None:
+                self.log(f"startup step '{step.name}': running since {step.started - self.started:.2f}s")
+            else:
+                self.log(f"startup step '{step.name}': {step.started - self.started:.2f}s -> "
+                         f"{step.finished - self.started:.2f}s ({(step.finished - step.started) * 1000:.0f}ms)"
+                         f"{' deferred' if step.deferred else ''}")
@@ -39,7 +39,7 @@ class Menu:
         for party in parties_to_delete:
             del party_json[party]
 
-        self.log(f"retrieved party json: {party_json}")
+        self.log.debug("menu.party_json", party=party_json)
         return party_json
 
     def get_party_members(self, self_puuid, presencesDICT):
@@ -0,0 +1,195 @@
+import json
+import os
+import re
+import threading
+
+import requests
+
+from src.content_index import ContentIndex
+
+BASE_URL = "https://valorant-api.com"
+VERSION_ENDPOINT = "/v1/version"
+# datasets downloaded together whenever the build changes, anything else requested is cached on first use
+DATASETS = [
+    "/v1/agents",
+    "/v1/agents?isPlayableCharacter=true",
+    "/v1/maps",
+    "/v1/weapons",
+    "/v1/weapons/skins",
+    "/v1/sprays",
+    "/v1/buddies",
+    "/v1/playertitles",
+    "/v1/playercards",
+]
+# all the first table needs, on a first run only these are downloaded before it and the rest follows in the background
+STARTUP_DATASETS = [
+    "/v1/agents?isPlayableCharacter=true",
+    "/v1/maps",
+]
+REQUEST_TIMEOUT = 30
+
+
+def get_build(version):
+    return version.get("data", {}).get("riotClientVersion")
+
+
+def get_file_name(endpoint):
+    return re.sub(r"[^a-zA-Z0-9]+", "_", endpoint).strip("_") + ".json"
+
+
+def get_empty(endpoint):
+    # what a dataset looks like when it couldn't be downloaded, callers see no entries instead of an exception
+    return {"data": {} if endpoint == VERSION_ENDPOINT else []}
+
+
+class StaticContent:
+    """
+    valorant-api.com datasets cached in %APPDATA%/vry/static, keyed by the /v1/version build.
+    The cached copy is used right away and refreshed in the background only when the build changed,
+    so vRY also starts offline as long as the datasets were downloaded once. A dataset that is neither
+    cached nor downloadable is served empty.
+    """
+    def __init__(self, log, path=None):
+        self.log = log
+        if path is None:
+            path = os.path.join(os.getenv('APPDATA'), "vry", "static")
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+        # Requests' pooled "valorant-api" session, handed over by set_session() before anything is downloaded
+        self.session = None
+        self.lock = threading.Lock()
+        self.refresh_thread = None
+        self.data = {}
+        self.manifest = self.read_json("manifest.json") or {}
+        # bumped whenever the datasets are swapped for a new build, indexes built on top compare against it
+        self.generation = 0
+        self.index = None
+        # held while the index is compiled, so the deferred startup step and Loadouts don't both build it
+        self.index_lock = threading.Lock()
+
+    def set_session(self, session):
+        self.session = session
+
+    @property
+    def build(self):
+        return self.manifest.get("build")
+
+    def load(self):
+        if self.build is None:
+            self.log("no cached static content, downloading what the first table needs")
+            for endpoint in STARTUP_DATASETS:
+                try:
+                    self.data[endpoint] = self.download(endpoint)
+                except (requests.RequestException, ValueError) as e:
+                    self.log(f"could not download static content {endpoint}: {e}")
+        else:
+            self.log(f"using cached static content for build {self.build}")
+        self.refresh_thread = threading.Thread(target=self.refresh, name="static-content", daemon=True)
+        self.refresh_thread.start()
+
+    def get(self, endpoint):
+        """Parsed json of a valorant-api.com endpoint, from memory, then disk, then the network."""
+        if endpoint == VERSION_ENDPOINT and "version" in self.manifest:
+            return self.manifest["version"]
+        data = self.get_cached(endpoint)
+        if data is not None:
+            return data
+        refresh_thread = self.refresh_thread
+        if refresh_thread is not None and refresh_thread.is_alive():
+            # a first run (or a new build) is still downloading in the background, it most likely brings this one
+            refresh_thread.join()
+            data = self.get_cached(endpoint)
+            if data is not None:
+                return data
+        with self.lock:
+            data = self.data.get(endpoint)
+            if data is not None:
+                return data
+            try:
+                data = self.download(endpoint)
+            except (requests.RequestException, ValueError) as e:
+                # kept in memory only, so it isn't tried again on every call but is downloaded on the next start
+                self.log(f"static content {endpoint} is not cached and could not be downloaded, using empty data: {e}")
+                data = self.data[endpoint] = get_empty(endpoint)
+                return data
+            self.write_json(get_file_name(endpoint), data)
+            if endpoint not in self.manifest.setdefault("datasets", []):
+                self.manifest["datasets"].append(endpoint)
+                self.write_json("manifest.json", self.manifest)
+            self.data[endpoint] = data
+        return data
+
+    def get_cached(self, endpoint):
+        # from memory or disk only, None if the dataset would have to be downloaded
+        data = self.data.get(endpoint)
+        if data is not None:
+            return data
+        with self.lock:
+            data = self.data.get(endpoint)
+            if data is None:
+                data = self.read_json(get_file_name(endpoint))
+                if data is not None:
+                    self.data[endpoint] = data
+        return data
+
+    def get_index(self):
+        # compiled once per build, a background update swaps in a new one on the next call
+        index = self.index
+        if index is None or index.generation != self.generation:
+            with self.index_lock:
+                index = self.index
+                if index is None or index.generation != self.generation:
+                    index = self.index = ContentIndex(self)
+        return index
+
+    def refresh(self):
+        try:
+            version = self.download(VERSION_ENDPOINT)
+        except (requests.RequestException, ValueError) as e:
+            self.log(f"could not check static content version, staying on build {self.build}: {e}")
+            return
+        build = get_build(version)
+        if build is not None and build == self.build:
+            return
+
+        self.log(f"static content build changed from {self.build} to {build}, downloading datasets")
+        endpoints = list(dict.fromkeys(DATASETS + self.manifest.get("datasets", [])))
+        # on a first run load() already downloaded the startup datasets of this build
+        downloaded = {endpoint: self.data[endpoint] for endpoint in STARTUP_DATASETS
+                      if endpoint in self.data} if self.build is None else {}
+        try:
+            data = {endpoint: downloaded.get(endpoint) or self.download(endpoint) for endpoint in endpoints}
+        except (requests.RequestException, ValueError) as e:
+            self.log(f"static content download failed, staying on build {self.build}: {e}")
+            return
+
+        with self.lock:
+            for endpoint, dataset in data.items():
+                self.write_json(get_file_name(endpoint), dataset)
+            # the manifest goes last, a crash before this just downloads everything again next time
+            self.manifest = {"build": build, "version": version, "datasets": endpoints}
+            self.write_json("manifest.json", self.manifest)
+            self.data = data
+            self.generation += 1
+        self.log(f"static content updated to build {build}")
+
+    def download(self, endpoint):
+        response = self.session.get(f"{BASE_URL}{endpoint}", timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def read_json(self, file_name):
+        try:
+            with open(os.path.join(self.path, file_name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.decoder.JSONDecodeError):
+            return None
+
+    def write_json(self, file_name, data):
+        file_path = os.path.join(self.path, file_name)
+        try:
+            with open(file_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(file_path + ".tmp", file_path)
+        except OSError as e:
+            self.log(f"could not write static content {file_name}: {e}")
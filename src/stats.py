@@ -1,42 +1,106 @@
 import os
-import time
 import json
+import sqlite3
+import threading
 
 class Stats:
-    def __init__(self):
-        pass
-
-    def save_data(self, data):
-        # path = os.path.join(os.getenv('APPDATA'), R'vry\stats.json')
+    """
+    Players met in previous matches, one row per (player, match) in %APPDATA%/vry/stats.db.
+    The old stats.json is imported once and renamed to stats.json.migrated.
+    """
+    def __init__(self, log=None, path=None):
+        self.log = log or (lambda message: None)
+        self.lock = threading.Lock()
+        vry_directory = os.path.join(os.getenv('APPDATA'), "vry")
         try:
-            os.mkdir(os.path.join(os.getenv('APPDATA'), "vry"))
+            os.mkdir(vry_directory)
         except FileExistsError:
             pass
+        self.db = sqlite3.connect(path or os.path.join(vry_directory, "stats.db"), check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS encounters ("
+            "puuid TEXT, match_id TEXT, name TEXT, agent TEXT, map TEXT, rank INTEGER, rr INTEGER, epoch REAL,"
+            " PRIMARY KEY (puuid, match_id))"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS encounters_puuid_epoch ON encounters (puuid, epoch)")
+        self.db.commit()
+        self.migrate_json(os.path.join(vry_directory, "stats.json"))
+
+    def migrate_json(self, json_path):
+        if not os.path.exists(json_path):
+            return
         try:
-            with open(os.path.join(os.getenv('APPDATA'), "vry/stats.json"), "r") as f:
+            with open(json_path, "r") as f:
                 original_data = json.load(f)
-        except (FileNotFoundError, json.decoder.JSONDecodeError):
+        except json.decoder.JSONDecodeError:
             original_data = {}
+        rows = [
+            self.to_row(puuid, entry)
+            for puuid, entries in original_data.items()
+            for entry in entries
+        ]
+        with self.lock:
+            # entries of the same match were appended on every refresh, the last one wins like before
+            self.db.executemany("INSERT OR REPLACE INTO encounters VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.db.commit()
+        os.replace(json_path, json_path + ".migrated")
+        self.log(f"migrated {len(rows)} entries from stats.json")
 
-        updated_data = original_data.copy()
-        for puuid in data.keys():
-            if original_data.get(puuid) is None:
-                updated_data.update({puuid: [data[puuid]]})
-            else:
-                updated_data[puuid].append(data[puuid])
-        
-        # updated_data.update(data)
-        # print(updated_data)
-
-        with open(os.path.join(os.getenv('APPDATA'), "vry/stats.json"), "w") as f:
-            json.dump(updated_data, f)
-    
-    def read_data(self):
-        try:
-            with open(os.path.join(os.getenv('APPDATA'), "vry/stats.json"), "r") as f:
-                return json.load(f)
-        except (FileNotFoundError, json.decoder.JSONDecodeError):
+    def to_row(self, puuid, entry):
+        return (
+            puuid,
+            entry.get("match_id"),
+            entry.get("name"),
+            entry.get("agent"),
+            json.dumps(entry.get("map")),
+            entry.get("rank"),
+            entry.get("rr"),
+            entry.get("epoch"),
+        )
+
+    def save_data(self, data):
+        # data: {puuid: {"name", "agent", "map", "rank", "rr", "match_id", "epoch"}}, written in one transaction
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO encounters VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [self.to_row(puuid, entry) for puuid, entry in data.items()],
+            )
+            self.db.commit()
+
+    def get_encounters(self, puuids, exclude_match_id=None):
+        """
+        Last encounter and number of matches played together for every puuid met before,
+        not counting exclude_match_id (the match currently being played).
+        """
+        puuids = list(dict.fromkeys(puuids))
+        if not puuids:
             return {}
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT puuid, match_id, name, agent, epoch FROM encounters"
+                f" WHERE puuid IN ({', '.join('?' * len(puuids))}) AND match_id IS NOT ?"
+                f" ORDER BY epoch",
+                (*puuids, exclude_match_id),
+            ).fetchall()
+        encounters = {}
+        for puuid, match_id, name, agent, epoch in rows:
+            encounter = encounters.setdefault(puuid, {"times": 0})
+            encounter["times"] += 1
+            encounter["last"] = {"match_id": match_id, "name": name, "agent": agent, "epoch": epoch}
+        return encounters
+
+    def get_last_encounter(self, puuid, exclude_match_id=None):
+        return self.get_encounters([puuid], exclude_match_id).get(puuid, {}).get("last")
+
+    def get_encounter_count(self, puuid, exclude_match_id=None):
+        return self.get_encounters([puuid], exclude_match_id).get(puuid, {}).get("times", 0)
+
+    def get_last_name(self, puuid):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT name FROM encounters WHERE puuid = ? ORDER BY epoch DESC LIMIT 1", (puuid,)
+            ).fetchone()
+        return row[0] if row is not None else None
 
     def convert_time(self, s):
         s = int(s)
@@ -1,6 +1,7 @@
 from typing import Literal, get_args
 
 # from prettytable import PrettyTable
+from rich.live import Live
 from rich.table import Table as RichTable
 from rich.console import Console as RichConsole
 from rich.table import Table as RichInnerTable
@@ -84,6 +85,8 @@ class Table:
             c for c, i in zip(self.field_names_candidates, self.col_flags) if i
         ]
         self.console = RichConsole(color_system="truecolor", width=300)
+        self.title = None
+        self.caption = None
 
         # only to get init value not used
         self.overall_col_flags = [
@@ -101,10 +104,12 @@ class Table:
         self.rows = []
 
     def set_title(self, title):
-        self.rich_table.title = self.ansi_to_console(title)
+        self.title = self.ansi_to_console(title)
+        self.rich_table.title = self.title
 
     def set_caption(self, caption):
-        self.rich_table.caption = self.ansi_to_console(caption)
+        self.caption = self.ansi_to_console(caption)
+        self.rich_table.caption = self.caption
 
     def set_default_field_names(self):
         self.rich_table.field_names = self.field_names[:]
@@ -136,6 +141,11 @@ class Table:
     def add_row_table(self, args: list):
         # Store field/value pairs; convert to a list so we can safely inspect multiple times
         self.rows.append(list(zip(self.field_names_candidates, args)))
+        return len(self.rows) - 1
+
+    def set_row_table(self, index: int, args: list):
+        # replaces a placeholder row once the player's data has arrived
+        self.rows[index] = list(zip(self.field_names_candidates, args))
 
     def add_empty_row(self):
         self.rows.append(
@@ -169,21 +179,34 @@ class Table:
 
 
     def display(self):
-        self.log("rows: " + str(self.rows))
+        self.log.debug("table.rows", rows=self.rows)
+        self.console.print(self.build())
+
+    def live(self):
+        # progressive display, redrawn with live.update(self.build()) whenever a row was filled in
+        return Live(self.build(), console=self.console, auto_refresh=False)
+
+    def build(self):
+        # a fresh rich table from the current rows, the live table is rebuilt like this on every update
+        self.new_rich_table()
         self.set_columns()
         self.apply_rows()
-
-        self.console.print(self.rich_table)
+        return self.rich_table
 
     def clear(self):
-        self.rich_table = RichTable()
+        self.title = None
+        self.caption = None
         self.rows = []
+        self.new_rich_table()
+
+    def new_rich_table(self):
+        self.rich_table = RichTable()
+        self.rich_table.title = self.title
+        self.rich_table.caption = self.caption
         self.rich_table.title_style = "bold"
         self.rich_table.caption_style = "italic rgb(50,505,50)"
         self.rich_table.caption_justify = "left"
 
-        pass
-
     def ansi_to_console(self, line):
         if not isinstance(line, str):
             return line
@@ -0,0 +1,142 @@
+import base64
+import json
+import threading
+import time
+
+from requests.exceptions import ConnectionError, RequestException, Timeout
+
+# refresh the access token this many seconds before it expires
+REFRESH_MARGIN = 120
+# riot access tokens last an hour, used when the exp claim can't be read
+DEFAULT_TOKEN_LIFETIME = 3600
+# delay before the background refresh tries again when the local client didn't answer
+RETRY_DELAY = 30
+# a hung local client must not block the callers waiting for headers
+REQUEST_TIMEOUT = 10
+
+CLIENT_PLATFORM = ("ew0KCSJwbGF0Zm9ybVR5cGUiOiAiUEMiLA0KCSJwbGF0Zm9ybU9TIjog"
+                   "IldpbmRvd3MiLA0KCSJwbGF0Zm9ybU9TVmVyc2lvbiI6ICIxMC4wLjE5"
+                   "MDQyLjEuMjU2LjY0Yml0IiwNCgkicGxhdGZvcm1DaGlwc2V0IjogIlVua25vd24iDQp9")
+
+
+def get_token_expiry(access_token):
+    # exp claim of the jwt payload, the signature isn't checked since the token comes from the local client
+    try:
+        payload = access_token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return time.time() + DEFAULT_TOKEN_LIFETIME
+
+
+class TokenManager:
+    """
+    Owns the pd/glz auth headers. The token is refreshed in the background before it expires,
+    and only one entitlements request is in flight no matter how many threads need new headers.
+    """
+    def __init__(self, Requests, log):
+        self.Requests = Requests
+        self.log = log
+        self.headers = {}
+        self.expires_at = 0
+        self.stale = False
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def get_headers(self, refresh=False, init=False):
+        # fast path, the last good headers stay in use until they expire, also while a background refresh is running
+        if self.headers and not refresh and not self.stale and time.time() < self.expires_at:
+            return self.headers
+
+        generation = self.generation
+        with self.lock:
+            if self.generation != generation and self.headers and not self.stale:
+                # another caller refreshed while we were waiting for the lock
+                return self.headers
+            if not self.refresh(init=init):
+                return False
+        return self.headers
+
+    def invalidate(self):
+        # the next caller refreshes the token, until then nobody sends the rejected headers again
+        self.stale = True
+
+    def refresh(self, init=False):
+        try_again = True
+        while try_again:
+            try:
+                entitlements = self.request_entitlements()
+            except ConnectionError:
+                self.log("Connection error, retrying in 1 seconds, getting new lockfile")
+                time.sleep(1)
+                self.Requests.lockfile = self.Requests.get_lockfile()
+                continue
+            except Timeout:
+                self.log(f"Local client did not answer within {REQUEST_TIMEOUT}s, retrying")
+                continue
+            if entitlements.get("message") == "Entitlements token is not ready yet":
+                try_again = True
+                time.sleep(1)
+            elif entitlements.get("message") == "Invalid URI format":
+                self.log(f"Invalid uri format: {entitlements}")
+                if init:
+                    return False
+                else:
+                    try_again = True
+                    time.sleep(5)
+            else:
+                try_again = False
+
+        self.set_entitlements(entitlements, self.build_headers(entitlements))
+        return True
+
+    def request_entitlements(self):
+        lockfile = self.Requests.lockfile
+        local_headers = {'Authorization': 'Basic ' + base64.b64encode(
+            ('riot:' + lockfile['password']).encode()).decode()}
+        self.log(f"https://127.0.0.1:{lockfile['port']}/entitlements/v1/token")
+        response = self.Requests.get_session("local").get(f"https://127.0.0.1:{lockfile['port']}/entitlements/v1/token",
+                                                          headers=local_headers, verify=False, timeout=REQUEST_TIMEOUT)
+        return response.json()
+
+    def build_headers(self, entitlements):
+        return {
+            'Authorization': f"Bearer {entitlements['accessToken']}",
+            'X-Riot-Entitlements-JWT': entitlements['token'],
+            'X-Riot-ClientPlatform': CLIENT_PLATFORM,
+            'X-Riot-ClientVersion': self.Requests.get_current_version(),
+            "User-Agent": "ShooterGame/13 Windows/10.0.19043.1.256.64bit"
+        }
+
+    def set_entitlements(self, entitlements, headers):
+        # called with self.lock held
+        self.Requests.puuid = entitlements['subject']
+        self.headers = headers
+        self.expires_at = get_token_expiry(entitlements['accessToken'])
+        self.stale = False
+        self.generation += 1
+        self.log(f"new access token, expires in {int(self.expires_at - time.time())}s")
+        self.schedule(self.expires_at - REFRESH_MARGIN - time.time())
+
+    def schedule(self, delay):
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = threading.Timer(max(delay, RETRY_DELAY), self.background_refresh)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def background_refresh(self):
+        # the request runs without the lock, get_headers() keeps serving the current token until it expires
+        # and a failed attempt is retried after RETRY_DELAY, only the swap itself is done under the lock
+        try:
+            entitlements = self.request_entitlements()
+            if "accessToken" in entitlements:
+                headers = self.build_headers(entitlements)
+                with self.lock:
+                    self.set_entitlements(entitlements, headers)
+                return
+            self.log(f"background token refresh not ready: {entitlements.get('message')}")
+        except (RequestException, OSError, ValueError, KeyError, TypeError) as e:
+            self.log(f"background token refresh failed: {e}")
+        self.schedule(RETRY_DELAY)
@@ -5,10 +5,26 @@ import ssl
 import base64
 import json
 import asyncio
+import queue
+import threading
+from contextlib import contextmanager
 from colr import color
 
+# client api events and the message that subscribes to them
+EVENTS = {
+    "presence": "OnJsonApiEvent_chat_v4_presences",
+    "chat": "OnJsonApiEvent_chat_v6_messages",
+}
+MAX_RETRIES = 5
+
+
 class Ws:
-    def __init__(self, lockfile, Requests, cfg, colors, hide_names, server, rpc=None):
+    """
+    One websocket subscription to the local client for the whole session, running on the AsyncRuntime.
+    Own presence changes are decoded once and passed to the "presence" subscribers, game state changes
+    are queued for wait_for_state_change() so none are missed while the table is being built.
+    """
+    def __init__(self, lockfile, Requests, cfg, colors, hide_names, server, runtime, rpc=None):
         self.lockfile = lockfile
         self.Requests = Requests
         self.log = Requests.log  # Inherit logger from Requests
@@ -24,49 +40,99 @@ class Ws:
         self.message_history = []
         self.up = "\033[A"
         self.chat_limit = cfg.chat_limit
+        # chat is handled on the asyncio thread, held back while main draws the table
+        self.chat_lock = threading.Lock()
+        self.chat_pending = None
         self.server = server
+        self.runtime = runtime
+        self.task = None
+        self.last_state = None
+        self.states = queue.Queue()
+        self.subscribers = {event: [] for event in EVENTS}
+        if self.cfg.get_feature_flag("game_chat"):
+            self.subscribe("chat", self.handle_chat)
         if self.cfg.get_feature_flag("discord_rpc"):
             self.rpc = rpc
+            self.subscribe("presence", rpc.set_rpc)
 
     def set_player_data(self, player_data):
         self.player_data = player_data
 
-    async def recconect_to_websocket(self, initial_game_state):
+    def subscribe(self, event, callback):
+        self.subscribers[event].append(callback)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = self.runtime.submit(self.run())
+
+    def restart(self, lockfile):
+        # the client restarted, same subscribers on a new port
+        if self.task is not None:
+            self.task.cancel()
+        self.lockfile = lockfile
+        self.last_state = None
+        self.states = queue.Queue()
+        self.task = None
+        self.start()
+
+    def wait_for_state_change(self, game_state):
+        # blocks until the game state differs from game_state, states queued meanwhile collapse into the latest
+        while True:
+            state = self.states.get()
+            while True:
+                try:
+                    state = self.states.get_nowait()
+                except queue.Empty:
+                    break
+            if state != game_state:
+                return state
+
+    async def run(self):
         local_headers = {
             'Authorization': 'Basic ' + base64.b64encode(('riot:' + self.lockfile['password']).encode()).decode()
         }
         url = f"wss://127.0.0.1:{self.lockfile['port']}"
-        
-        max_retries = 5
-        retry_delay = 2
 
-        for attempt in range(max_retries):
+        retry_delay = 2
+        attempt = 0
+        while True:
             try:
                 async with websockets.connect(url, ssl=self.ssl_context, extra_headers=local_headers) as websocket:
-                    await websocket.send('[5, "OnJsonApiEvent_chat_v4_presences"]')
-                    if self.cfg.get_feature_flag("game_chat"):
-                        await websocket.send('[5, "OnJsonApiEvent_chat_v6_messages"]')
-                    
+                    await websocket.send(f'[5, "{EVENTS["presence"]}"]')
+                    if self.subscribers["chat"]:
+                        await websocket.send(f'[5, "{EVENTS["chat"]}"]')
+                    self.log("Websocket subscribed to client events")
+                    attempt = 0
+                    retry_delay = 2
+
                     while True:
                         response = await websocket.recv()
-                        result = self.handle(response, initial_game_state)
-                        if result is not None:
-                            return result
+                        self.handle(response)
+            except asyncio.CancelledError:
+                raise
             except (websockets.exceptions.ConnectionClosed, websockets.exceptions.InvalidURI, websockets.exceptions.InvalidHandshake, ConnectionRefusedError, OSError) as e:
-                self.log(f"Websocket failed (attempt {attempt + 1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(retry_delay)
-                    retry_delay *= 2
-                else:
-                    self.log(f"Websocket failed after {max_retries} attempts.")
-                    return "DISCONNECTED"
+                attempt += 1
+                self.log(f"Websocket failed (attempt {attempt}/{MAX_RETRIES}): {e}")
+                if attempt >= MAX_RETRIES:
+                    self.log(f"Websocket failed after {MAX_RETRIES} attempts.")
+                    self.states.put("DISCONNECTED")
+                    return
+                await asyncio.sleep(retry_delay)
+                retry_delay *= 2
             except Exception as e:
                 self.log(f"Unexpected websocket error: {e}")
-                return "DISCONNECTED"
-        
-        return "DISCONNECTED"
+                self.states.put("DISCONNECTED")
+                return
 
-    def handle(self, m, initial_game_state):
+    def dispatch(self, event, data):
+        for callback in self.subscribers[event]:
+            try:
+                callback(data)
+            except Exception as e:
+                # one broken subscriber must not take the subscription down
+                self.log(f"Websocket {event} subscriber failed: {e}")
+
+    def handle(self, m):
         try:
             if not m or len(m) <= 10:
                 return None
@@ -101,54 +167,79 @@ class Ws:
                     state = None
 
                 if state is not None:
-                    if self.cfg.get_feature_flag("discord_rpc") and private_data:
-                        self.rpc.set_rpc(private_data)
-                    if state != initial_game_state:
-                        self.messages = 0
-                        self.message_history = []
-                        return state
+                    if private_data:
+                        self.dispatch("presence", private_data)
+                    if state != self.last_state:
+                        self.last_state = state
+                        # main may be flushing held chat right now
+                        with self.chat_lock:
+                            self.messages = 0
+                            self.message_history = []
+                        self.states.put(state)
 
         elif resp_json[2].get("uri") == "/chat/v6/messages":
-            message = resp_json[2].get("data", {}).get("messages", [{}])[0]
-            if "ares-coregame" in message.get("cid", "") and message.get("id") not in self.id_seen:
-                
-                self.ally_team = self.player_data.get(self.Requests.puuid, {}).get("team")
-                
-                msg_puuid = message['puuid']
-                msg_player_data = self.player_data.get(msg_puuid, {})
+            self.dispatch("chat", resp_json[2].get("data", {}).get("messages", [{}])[0])
+        return None
 
-                if msg_puuid == self.Requests.puuid:
-                    clr = (221, 224, 41)
-                elif msg_player_data.get("team") == self.ally_team:
-                    clr = (76, 151, 237)
-                else:
-                    clr = (238, 77, 77)
+    def handle_chat(self, message):
+        if "ares-coregame" in message.get("cid", "") and message.get("id") not in self.id_seen:
+            
+            self.ally_team = self.player_data.get(self.Requests.puuid, {}).get("team")
+            
+            msg_puuid = message['puuid']
+            msg_player_data = self.player_data.get(msg_puuid, {})
 
-                chat_indicator = message["cid"].split("@")[0].rsplit("-", 1)[1]
-                chat_prefix = color("[Team]", fore=(116, 162, 214)) if chat_indicator == "blue" else "[All]"
+            if msg_puuid == self.Requests.puuid:
+                clr = (221, 224, 41)
+            elif msg_player_data.get("team") == self.ally_team:
+                clr = (76, 151, 237)
+            else:
+                clr = (238, 77, 77)
 
-                agent = self.colors.get_agent_from_uuid(msg_player_data.get('agent', '').lower())
-                name = f"{message['game_name']}#{message['game_tag']}"
-                
-                if msg_player_data.get('streamer_mode') and self.hide_names and msg_puuid not in self.player_data.get("ignore", []):
-                    self.print_message(f"{chat_prefix} {color(self.colors.escape_ansi(agent), clr)}: {message['body']}")
-                    self.server.send_payload("chat", {
-                        "time": message["time"], "puuid": msg_puuid, "self": msg_puuid == self.Requests.puuid,
-                        "group": re.sub(r"\[|\]", "", self.colors.escape_ansi(chat_prefix)),
-                        "agent": self.colors.escape_ansi(agent), "text": message['body']
-                    })
-                else:
-                    agent_str = f" ({agent})" if agent else ""
-                    self.print_message(f"{chat_prefix} {color(name, clr)}{agent_str}: {message['body']}")
-                    self.server.send_payload("chat", {
-                        "time": message["time"], "puuid": msg_puuid, "self": msg_puuid == self.Requests.puuid,
-                        "group": re.sub(r"\[|\]", "", self.colors.escape_ansi(chat_prefix)),
-                        "player": name, "agent": self.colors.escape_ansi(agent), "text": message['body']
-                    })
-                self.id_seen.append(message['id'])
-        return None
+            chat_indicator = message["cid"].split("@")[0].rsplit("-", 1)[1]
+            chat_prefix = color("[Team]", fore=(116, 162, 214)) if chat_indicator == "blue" else "[All]"
+
+            agent = self.colors.get_agent_from_uuid(msg_player_data.get('agent', '').lower())
+            name = f"{message['game_name']}#{message['game_tag']}"
+            
+            if msg_player_data.get('streamer_mode') and self.hide_names and msg_puuid not in self.player_data.get("ignore", []):
+                self.print_message(f"{chat_prefix} {color(self.colors.escape_ansi(agent), clr)}: {message['body']}")
+                self.server.send_payload("chat", {
+                    "time": message["time"], "puuid": msg_puuid, "self": msg_puuid == self.Requests.puuid,
+                    "group": re.sub(r"\[|\]", "", self.colors.escape_ansi(chat_prefix)),
+                    "agent": self.colors.escape_ansi(agent), "text": message['body']
+                })
+            else:
+                agent_str = f" ({agent})" if agent else ""
+                self.print_message(f"{chat_prefix} {color(name, clr)}{agent_str}: {message['body']}")
+                self.server.send_payload("chat", {
+                    "time": message["time"], "puuid": msg_puuid, "self": msg_puuid == self.Requests.puuid,
+                    "group": re.sub(r"\[|\]", "", self.colors.escape_ansi(chat_prefix)),
+                    "player": name, "agent": self.colors.escape_ansi(agent), "text": message['body']
+                })
+            self.id_seen.append(message['id'])
+
+    @contextmanager
+    def chat_held(self):
+        with self.chat_lock:
+            self.chat_pending = []
+        try:
+            yield
+        finally:
+            with self.chat_lock:
+                pending, self.chat_pending = self.chat_pending, None
+                for message in pending:
+                    self.write_message(message)
 
     def print_message(self, message):
+        with self.chat_lock:
+            if self.chat_pending is not None:
+                self.chat_pending.append(message)
+            else:
+                self.write_message(message)
+
+    def write_message(self, message):
+        # called with chat_lock held
         self.messages += 1
         if self.messages > self.chat_limit:
             print(self.up * self.chat_limit, end="")
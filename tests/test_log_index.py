@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from src.log_index import ShooterLogIndex
+
+VERSION_LINE = "[2024.01.01-00.00.00:000][  0]LogShooter: Display: CI server version: release-08.00-12-2217093\n"
+PD_LINE = "[2024.01.01-00.00.01:000][  0]LogPlatform: GET https://pd.eu.a.pvp.net/account-xp/v1/players/abc\n"
+GLZ_LINE = "[2024.01.01-00.00.02:000][  0]LogPlatform: GET https://glz-eu-1.eu.a.pvp.net/parties/v1/players/abc\n"
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return tmp_path / "ShooterGame.log"
+
+
+def append(path, text):
+    with open(path, "a", encoding="utf8") as f:
+        f.write(text)
+
+
+def test_values_are_parsed(log_path):
+    append(log_path, "noise\n" + VERSION_LINE + PD_LINE + GLZ_LINE)
+    index = ShooterLogIndex(lambda message: None, str(log_path))
+    assert index.get("version") == "release-08.00-shipping-12-2217093"
+    assert index.get("pd_shard") == "eu"
+    assert index.get("glz") == ["eu-1", "eu"]
+
+
+def test_only_new_whole_lines_are_read(log_path):
+    append(log_path, VERSION_LINE)
+    index = ShooterLogIndex(lambda message: None, str(log_path))
+    assert index.get("version") is not None
+    offset = index.offset
+    assert offset == os.path.getsize(log_path)
+
+    # a partially written line is left for the next refresh
+    append(log_path, PD_LINE[:20])
+    assert index.get("pd_shard") is None
+    assert index.offset == offset
+
+    append(log_path, PD_LINE[20:])
+    assert index.get("pd_shard") == "eu"
+    assert index.offset == os.path.getsize(log_path)
+
+
+def test_a_new_log_is_indexed_from_the_start(log_path):
+    append(log_path, VERSION_LINE + PD_LINE + GLZ_LINE)
+    index = ShooterLogIndex(lambda message: None, str(log_path))
+    assert index.get("pd_shard") == "eu"
+
+    # the game restarted and wrote a shorter log for another shard
+    log_path.write_text(PD_LINE.replace("pd.eu.", "pd.na."), encoding="utf8")
+    assert index.get("pd_shard") == "na"
+    assert index.get("version") is None
+
+
+def test_wait_for_returns_once_the_markers_are_there(log_path):
+    append(log_path, VERSION_LINE + PD_LINE + GLZ_LINE)
+    index = ShooterLogIndex(lambda message: None, str(log_path))
+    assert index.wait_for("pd_shard", "glz") == {"pd_shard": "eu", "glz": ["eu-1", "eu"]}
+
+
+def test_wait_for_gives_up_on_a_missing_log(log_path):
+    index = ShooterLogIndex(lambda message: None, str(log_path))
+    with pytest.raises(FileNotFoundError):
+        index.wait_for("version", timeout=0)
+
+
+def test_wait_for_gives_up_when_the_markers_never_show_up(log_path):
+    append(log_path, VERSION_LINE)
+    index = ShooterLogIndex(lambda message: None, str(log_path))
+    with pytest.raises(TimeoutError):
+        index.wait_for("version", "glz", timeout=0)
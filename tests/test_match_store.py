@@ -0,0 +1,120 @@
+import threading
+import time
+
+from src.match_store import MatchStore, MatchSummary, RequestBudget
+
+MATCH = {
+    "roundResults": [
+        {"playerStats": [
+            {"subject": "a", "damage": [{"headshots": 2, "bodyshots": 3, "legshots": 1}]},
+            {"subject": "b", "damage": [{"headshots": 0, "bodyshots": 4, "legshots": 0}]},
+        ]},
+        {"playerStats": [
+            {"subject": "a", "damage": [{"headshots": 1, "bodyshots": 0, "legshots": 0}]},
+        ]},
+    ],
+    "players": [
+        {"subject": "a", "stats": {"kills": 5, "deaths": 2}},
+        {"subject": "b", "stats": {"kills": 1, "deaths": 4}},
+    ],
+}
+
+
+class Response:
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self.data
+
+
+class FakeRequests:
+    """Serves match-details from a dict and counts the downloads per match."""
+    def __init__(self, matches, delay=0, cached=()):
+        self.matches = matches
+        self.delay = delay
+        self.cached = set(cached)
+        self.downloads = {}
+        self.lock = threading.Lock()
+
+    def is_cached(self, url_type, endpoint):
+        return endpoint.rsplit("/", 1)[1] in self.cached
+
+    def fetch_many(self, calls):
+        time.sleep(self.delay)
+        responses = []
+        for url_type, endpoint, method in calls:
+            match_id = endpoint.rsplit("/", 1)[1]
+            with self.lock:
+                self.downloads[match_id] = self.downloads.get(match_id, 0) + 1
+            data = self.matches.get(match_id)
+            responses.append(Response(data) if data is not None else Response({}, status_code=404))
+        return responses
+
+
+def make_store(matches, **kwargs):
+    return MatchStore(FakeRequests(matches, **kwargs), lambda message: None)
+
+
+def test_summary_has_the_stats_of_every_subject():
+    summary = MatchSummary("m", MATCH)
+    a, b = summary.get("a"), summary.get("b")
+    assert (a.hits, a.headshots, a.kills, a.deaths) == (7, 3, 5, 2)
+    assert (b.hits, b.headshots, b.kills, b.deaths) == (4, 0, 1, 4)
+    assert summary.get("c") is None
+
+
+def test_matches_are_downloaded_once():
+    store = make_store({"m": MATCH})
+    assert store.get("m").get("a").kills == 5
+    assert store.get_many(["m", "m"])["m"] is store.get("m")
+    assert store.Requests.downloads == {"m": 1}
+
+
+def test_concurrent_callers_wait_for_the_same_download():
+    store = make_store({"m": MATCH}, delay=0.1)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get("m"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.Requests.downloads == {"m": 1}
+    assert len(results) == 5 and all(result is results[0] for result in results)
+
+
+def test_failed_matches_are_not_stored():
+    store = make_store({})
+    assert store.get("m") is None
+    store.Requests.matches["m"] = MATCH
+    assert store.get("m") is not None
+    assert store.Requests.downloads == {"m": 2}
+
+
+def test_the_store_is_bounded():
+    store = MatchStore(FakeRequests({match_id: MATCH for match_id in "abc"}), lambda message: None, max_matches=2)
+    store.get_many(["a", "b"])
+    store.get("a")
+    store.get("c")
+    assert list(store.matches) == ["a", "c"]
+
+
+def test_budget_limits_the_downloads_of_one_refresh():
+    logged = []
+    budget = RequestBudget(logged.append, 2)
+    store = make_store({match_id: MATCH for match_id in "abcd"})
+    assert sorted(store.get_many("abcd", budget=budget)) == ["a", "b"]
+    assert budget.skipped == 2
+
+    budget.reset()
+    assert logged and "left out 2" in logged[0]
+    assert sorted(store.get_many("abcd", budget=budget)) == ["a", "b", "c", "d"]
+
+
+def test_stored_and_cached_matches_do_not_use_the_budget():
+    budget = RequestBudget(lambda message: None, 1)
+    store = make_store({match_id: MATCH for match_id in "abcd"}, cached="bc")
+    store.get("a")
+    assert sorted(store.get_many("abcd", budget=budget)) == ["a", "b", "c", "d"]
+    assert budget.left == 0 and budget.skipped == 0
@@ -0,0 +1,67 @@
+import pytest
+
+from src import rank
+from src.rank import RankCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rank, "time", clock)
+    return clock
+
+
+def test_hit_and_miss(clock):
+    cache = RankCache(ttl=60, max_size=10)
+    assert cache.get("a") is None
+    cache.put("a", "mmr a")
+    assert cache.get("a") == "mmr a"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = RankCache(ttl=60, max_size=10)
+    cache.put("a", "mmr a")
+    clock.now += 60
+    assert cache.get("a") == "mmr a"
+    clock.now += 1
+    assert cache.get("a") is None
+
+
+def test_put_renews_the_ttl(clock):
+    cache = RankCache(ttl=60, max_size=10)
+    cache.put("a", "old")
+    clock.now += 50
+    cache.put("a", "new")
+    clock.now += 50
+    assert cache.get("a") == "new"
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = RankCache(ttl=60, max_size=2)
+    cache.put("a", "mmr a")
+    cache.put("b", "mmr b")
+    cache.get("a")
+    cache.put("c", "mmr c")
+    assert cache.get("b") is None
+    assert cache.get("a") == "mmr a"
+    assert cache.get("c") == "mmr c"
+    assert cache.evictions == 1
+
+
+def test_invalidate_only_drops_the_given_players(clock):
+    cache = RankCache(ttl=60, max_size=10)
+    for puuid in ("a", "b", "c"):
+        cache.put(puuid, f"mmr {puuid}")
+    cache.invalidate(["a", "c", "unknown"])
+    assert cache.get("a") is None
+    assert cache.get("b") == "mmr b"
+    assert cache.get("c") is None
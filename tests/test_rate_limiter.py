@@ -0,0 +1,139 @@
+from email.utils import formatdate
+
+import pytest
+
+from src import rate_limiter
+from src.rate_limiter import MIN_RATE, RateLimiter, TokenBucket, get_endpoint_class, get_retry_after
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # like a real sleep it takes some time, however small the rounding leftover it is asked to wait for
+        self.slept.append(seconds)
+        self.now += max(seconds, 0.001)
+
+
+class Response:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def test_bucket_starts_full_and_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+    assert [bucket.try_take() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_take() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.try_take() == 0
+    # never more than the burst, however long it was idle
+    clock.now += 100
+    assert [bucket.try_take() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_take() > 0
+
+
+def test_penalize_blocks_until_retry_after_and_halves_the_rate(clock):
+    bucket = TokenBucket(rate=4.0, burst=10)
+    bucket.penalize(5)
+    assert bucket.rate == 2.0
+    assert bucket.try_take() == pytest.approx(5)
+
+    clock.now += 5
+    # the tokens were dropped, they come back at the halved rate
+    assert bucket.try_take() == pytest.approx(0.5)
+
+
+def test_penalize_never_goes_below_min_rate_and_reward_recovers(clock):
+    bucket = TokenBucket(rate=1.0, burst=1)
+    for _ in range(20):
+        bucket.penalize(0)
+    assert bucket.rate == MIN_RATE
+
+    for _ in range(100):
+        bucket.reward()
+    assert bucket.rate == 1.0
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"Retry-After": "7"}, 7),
+    ({"Retry-After": "-3"}, 0),
+    ({"Retry-After": "soon"}, 4),
+    ({}, 4),
+])
+def test_get_retry_after(headers, expected):
+    assert get_retry_after(Response(headers), default=4) == expected
+
+
+def test_get_retry_after_http_date(clock):
+    response = Response({"Retry-After": formatdate(clock.now + 30, usegmt=True)})
+    assert get_retry_after(response, default=4) == pytest.approx(30, abs=1)
+
+
+def test_get_endpoint_class():
+    assert get_endpoint_class("/mmr/v1/players/x/competitiveupdates?startIndex=0") == "competitiveupdates"
+    assert get_endpoint_class("/mmr/v1/players/x") == "mmr"
+    assert get_endpoint_class("/somewhere/else") == "other"
+
+
+def test_rate_limited_endpoint_does_not_block_the_host(clock):
+    limiter = RateLimiter(lambda message: None)
+    limiter.acquire("pd", "/mmr/v1/players/x")
+    limiter.on_rate_limited("pd", "/mmr/v1/players/x", Response({"Retry-After": "10"}), default=5)
+
+    host = limiter.buckets["pd"]
+    assert host.rate == rate_limiter.HOST_RATE
+    assert host.try_take() == 0
+    assert limiter.buckets[("pd", "mmr")].try_take() == pytest.approx(10)
+    # other endpoint classes go out right away
+    limiter.acquire("pd", "/name-service/v2/players")
+    assert clock.slept == []
+
+
+def test_rate_limit_is_host_wide_when_a_second_class_is_limited_or_the_response_says_so(clock):
+    limiter = RateLimiter(lambda message: None)
+    limiter.on_rate_limited("pd", "/mmr/v1/players/x", Response(), default=1)
+    clock.now += 2
+    limiter.on_rate_limited("pd", "/name-service/v2/players", Response(), default=1)
+    assert limiter.buckets["pd"].rate == rate_limiter.HOST_RATE / 2
+
+    limiter.on_rate_limited("glz", "/core-game/v1/players/x", Response({"X-Rate-Limit-Type": "application"}), default=1)
+    assert limiter.buckets["glz"].rate == rate_limiter.HOST_RATE / 2
+
+
+def test_classes_limited_far_apart_stay_separate(clock):
+    limiter = RateLimiter(lambda message: None)
+    limiter.on_rate_limited("pd", "/mmr/v1/players/x", Response(), default=1)
+    clock.now += rate_limiter.HOST_WIDE_WINDOW + 1
+    limiter.on_rate_limited("pd", "/name-service/v2/players", Response(), default=1)
+    assert limiter.buckets["pd"].rate == rate_limiter.HOST_RATE
+
+
+def test_acquire_waits_for_a_blocked_bucket_and_gives_the_other_token_back(clock):
+    limiter = RateLimiter(lambda message: None)
+    limiter.on_rate_limited("pd", "/mmr/v1/players/x", Response({"Retry-After": "3"}), default=1)
+    limiter.acquire("pd", "/mmr/v1/players/x")
+    assert sum(clock.slept) >= 3
+    host = limiter.buckets["pd"]
+    assert host.tokens == pytest.approx(rate_limiter.HOST_BURST - 1)
+
+
+def test_local_and_custom_urls_are_not_limited():
+    limiter = RateLimiter(lambda message: None)
+    assert limiter.get_buckets("local", "/chat/v4/presences") == []
+    assert limiter.on_rate_limited("custom", "https://x", Response({"Retry-After": "2"}), default=1) == 2
@@ -0,0 +1,121 @@
+import pytest
+import requests
+
+from src import response_cache
+from src.response_cache import ResponseCache, get_ttl
+
+PD = "https://pd.eu.a.pvp.net"
+MATCH = "/match-details/v1/matches/abc"
+MMR = "/mmr/v1/players/abc"
+UPDATES = "/mmr/v1/players/abc/competitiveupdates?startIndex=0&endIndex=5&queue=competitive"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def make_response(body=b'{"ok": true}', status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    return response
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return ResponseCache(lambda message: None, str(tmp_path / "cache.db"))
+
+
+def test_policies():
+    assert get_ttl(MATCH) is None
+    assert get_ttl(MMR) == 60
+    assert get_ttl(UPDATES) == 60
+    assert get_ttl("/name-service/v2/players") == 0
+
+
+def test_round_trip(cache):
+    cache.put(PD + MATCH, MATCH, make_response())
+    response = cache.get(PD + MATCH, MATCH)
+    assert response.ok
+    assert response.json() == {"ok": True}
+    assert cache.contains(PD + MATCH, MATCH)
+
+
+def test_uncacheable_responses_are_not_stored(cache):
+    cache.put(PD + "/name-service/v2/players", "/name-service/v2/players", make_response())
+    cache.put(PD + MMR, MMR, make_response(status_code=500))
+    assert cache.get(PD + "/name-service/v2/players", "/name-service/v2/players") is None
+    assert cache.get(PD + MMR, MMR) is None
+
+
+def test_entries_expire_after_their_ttl(cache, clock):
+    cache.put(PD + MMR, MMR, make_response())
+    cache.put(PD + MATCH, MATCH, make_response())
+    clock.now += 59
+    assert cache.get(PD + MMR, MMR) is not None
+
+    clock.now += 2
+    assert cache.get(PD + MMR, MMR) is None
+    assert not cache.contains(PD + MMR, MMR)
+    # finished matches never expire
+    assert cache.get(PD + MATCH, MATCH) is not None
+
+
+def test_invalidate(cache):
+    cache.put(PD + MMR, MMR, make_response())
+    cache.put(PD + UPDATES, UPDATES, make_response())
+    cache.put(PD + "/mmr/v1/players/abcd/competitiveupdates", "/mmr/v1/players/abcd/competitiveupdates",
+              make_response())
+
+    cache.invalidate(PD + MMR)
+    assert cache.get(PD + MMR, MMR) is None
+
+    cache.invalidate_prefix(PD + "/mmr/v1/players/abc/competitiveupdates")
+    assert cache.get(PD + UPDATES, UPDATES) is None
+    assert cache.contains(PD + "/mmr/v1/players/abcd/competitiveupdates", "/mmr/v1/players/abcd/competitiveupdates")
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(response_cache, "EVICTION_INTERVAL", 1)
+    cache = ResponseCache(lambda message: None, str(tmp_path / "cache.db"), max_bytes=250)
+    body = b"x" * 100
+    for match_id in ("a", "b"):
+        clock.now += 1
+        cache.put(f"{PD}/match-details/v1/matches/{match_id}", f"/match-details/v1/matches/{match_id}",
+                  make_response(body))
+    # reading a makes b the least recently used one
+    clock.now += 1
+    assert cache.get(f"{PD}/match-details/v1/matches/a", "/match-details/v1/matches/a") is not None
+
+    clock.now += 1
+    cache.put(f"{PD}/match-details/v1/matches/c", "/match-details/v1/matches/c", make_response(body))
+    assert cache.contains(f"{PD}/match-details/v1/matches/a", "/match-details/v1/matches/a")
+    assert not cache.contains(f"{PD}/match-details/v1/matches/b", "/match-details/v1/matches/b")
+    assert cache.contains(f"{PD}/match-details/v1/matches/c", "/match-details/v1/matches/c")
+
+
+def test_expired_entries_are_evicted_first(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(response_cache, "EVICTION_INTERVAL", 1)
+    cache = ResponseCache(lambda message: None, str(tmp_path / "cache.db"))
+    cache.put(PD + MMR, MMR, make_response())
+    clock.now += 61
+    cache.put(PD + MATCH, MATCH, make_response())
+    assert cache.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 1
+
+
+def test_an_unusable_database_disables_the_cache(tmp_path):
+    cache = ResponseCache(lambda message: None, str(tmp_path / "missing" / "cache.db"))
+    assert cache.db is None
+    cache.put(PD + MATCH, MATCH, make_response())
+    assert cache.get(PD + MATCH, MATCH) is None
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from src.startup import Startup
+
+
+def make_startup():
+    return Startup(lambda message: None)
+
+
+def test_steps_get_the_results_of_their_dependencies_in_order():
+    startup = make_startup()
+    startup.add("a", lambda: 1)
+    startup.add("b", lambda: 2)
+    startup.add("sum", lambda b, a: (b, a), deps=["b", "a"])
+    startup.run()
+    assert startup.get("sum") == (2, 1)
+
+
+def test_a_step_only_starts_after_its_dependencies_finished():
+    finished = []
+    startup = make_startup()
+
+    def slow():
+        time.sleep(0.1)
+        finished.append("slow")
+    startup.add("slow", slow)
+    startup.add("after", lambda _: list(finished), deps=["slow"])
+    startup.run()
+    assert startup.get("after") == ["slow"]
+
+
+def test_independent_steps_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    startup = make_startup()
+    startup.add("a", barrier.wait)
+    startup.add("b", barrier.wait)
+    startup.run()
+    # both would time out if they ran one after the other
+    startup.get("a")
+    startup.get("b")
+
+
+def test_deferred_steps_wait_for_every_other_step():
+    order = []
+    startup = make_startup()
+    startup.add("deferred", lambda: order.append("deferred"), deferred=True)
+
+    def critical():
+        time.sleep(0.1)
+        order.append("critical")
+    startup.add("critical", critical)
+    startup.run()
+    startup.get("deferred")
+    assert order == ["critical", "deferred"]
+
+
+def test_a_failed_step_fails_its_dependents_only():
+    startup = make_startup()
+
+    def broken():
+        raise RuntimeError("boom")
+    startup.add("broken", broken)
+    startup.add("dependent", lambda _: "never", deps=["broken"])
+    startup.add("other", lambda: "fine")
+    startup.add("deferred", lambda: "still runs", deferred=True)
+    startup.run()
+    with pytest.raises(RuntimeError):
+        startup.get("dependent")
+    assert startup.get("other") == "fine"
+    assert startup.get("deferred") == "still runs"
+
+
+def test_unknown_dependencies_are_rejected():
+    startup = make_startup()
+    startup.add("a", lambda _: None, deps=["missing"])
+    with pytest.raises(ValueError):
+        startup.run()
+
+
+def test_report_logs_every_step():
+    lines = []
+    startup = Startup(lines.append)
+    startup.add("a", lambda: None)
+    startup.run()
+    startup.get("a")
+    startup.report("done")
+    assert any("startup step 'a'" in line for line in lines)
@@ -0,0 +1,119 @@
+import base64
+import json
+import threading
+import time
+
+import pytest
+from requests.exceptions import ReadTimeout
+
+from src import token_manager
+from src.token_manager import TokenManager, get_token_expiry
+
+
+def make_token(exp):
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+
+class FakeRequests:
+    lockfile = {"password": "secret", "port": "1234"}
+    puuid = ""
+
+    def get_current_version(self):
+        return "release-08.00-shipping-12-2217093"
+
+
+class Entitlements:
+    """Stands in for the local entitlements endpoint."""
+    def __init__(self, lifetime=3600):
+        self.lifetime = lifetime
+        self.calls = 0
+        self.error = None
+
+    def __call__(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return {"subject": "me", "accessToken": make_token(time.time() + self.lifetime), "token": "jwt"}
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    # no real timers, background refreshes are triggered by the tests
+    monkeypatch.setattr(TokenManager, "schedule", lambda self, delay: setattr(self, "scheduled", delay))
+    manager = TokenManager(FakeRequests(), lambda message: None)
+    manager.request_entitlements = Entitlements()
+    return manager
+
+
+def test_get_token_expiry():
+    assert get_token_expiry(make_token(1234)) == 1234
+    assert get_token_expiry("not a jwt") == pytest.approx(time.time() + token_manager.DEFAULT_TOKEN_LIFETIME, abs=5)
+
+
+def test_headers_are_reused_until_the_token_expires(manager):
+    headers = manager.get_headers()
+    assert headers["Authorization"].startswith("Bearer ")
+    assert manager.Requests.puuid == "me"
+    assert manager.get_headers() is headers
+    assert manager.request_entitlements.calls == 1
+
+    manager.expires_at = time.time() - 1
+    assert manager.get_headers() is not headers
+    assert manager.request_entitlements.calls == 2
+
+
+def test_invalidated_headers_are_refreshed(manager):
+    manager.get_headers()
+    manager.invalidate()
+    manager.get_headers()
+    assert manager.request_entitlements.calls == 2
+
+
+def test_a_new_token_schedules_the_next_refresh_before_it_expires(manager):
+    manager.get_headers()
+    assert manager.scheduled == pytest.approx(3600 - token_manager.REFRESH_MARGIN, abs=5)
+
+
+def test_concurrent_callers_share_one_refresh(manager):
+    entitlements = manager.request_entitlements
+
+    def slow():
+        time.sleep(0.2)
+        return entitlements()
+    manager.request_entitlements = slow
+
+    threads = [threading.Thread(target=manager.get_headers) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert entitlements.calls == 1
+
+
+def test_background_refresh_swaps_in_the_new_headers(manager):
+    headers = manager.get_headers()
+    manager.background_refresh()
+    assert manager.get_headers() is not headers
+    assert manager.request_entitlements.calls == 2
+
+
+def test_failed_background_refresh_keeps_the_current_token_and_retries(manager):
+    headers = manager.get_headers()
+    manager.request_entitlements.error = ReadTimeout("client hung")
+    manager.background_refresh()
+    assert manager.scheduled == token_manager.RETRY_DELAY
+    assert manager.get_headers() is headers
+
+
+def test_background_refresh_does_not_hold_the_lock_during_the_request(manager):
+    manager.get_headers()
+    entitlements = manager.request_entitlements
+    locked = []
+
+    def check():
+        locked.append(manager.lock.locked())
+        return entitlements()
+    manager.request_entitlements = check
+    manager.background_refresh()
+    assert locked == [False]